@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy import Integer, String, cast, func
+
+from .models import db, Port, Vessel, Voyage, ContainerMovement, VoyageCostEstimation
+from .port_totals import movement_sums
+from .db_routing import read_replica_blueprint
+
+analytics_bp = Blueprint('analytics_bp', __name__)
+# Agregat dashboard read-only: GET dibaca dari replica bila dikonfigurasi
+read_replica_blueprint(analytics_bp)
+
+BUCKETS = ('month', 'quarter', 'year')
+
+# Dimensi pengelompokan (?group_by=port,vessel): nama -> kolom kunci yang dikirim
+DIMENSIONS = {
+    'port': (('port_id', Voyage.port_id), ('port_name', Port.name)),
+    'vessel': (('vessel_id', Voyage.vessel_id), ('vessel_name', Vessel.name)),
+}
+
+COST_COLUMNS = ('estimation_cost1', 'estimation_cost2', 'final_cost')
+
+# Persentase funnel, rumus sama dengan percentage_routes._payload_from_row
+FUNNEL = {
+    'pct_pengajuan': (('pengajuan_20dc', 'pengajuan_40hc'), ('bongkaran_20dc', 'bongkaran_40hc')),
+    'pct_acc': (('acc_20dc', 'acc_40hc'), ('pengajuan_20dc', 'pengajuan_40hc')),
+    'pct_tl': (('acc_20dc', 'acc_40hc'), ('bongkaran_20dc', 'bongkaran_40hc')),
+    'pct_realisasi': (('tlss_20dc', 'tlss_40hc'), ('pengajuan_20dc', 'pengajuan_40hc')),
+}
+
+
+def _bucket_expr(bucket):
+    """date_berth -> label periode yang urut secara teks: '2024-05', '2024-Q2', '2024'."""
+    column = Voyage.date_berth
+    if db.session.get_bind().dialect.name == 'postgresql':
+        fmt = {'month': 'YYYY-MM', 'quarter': 'YYYY-"Q"Q', 'year': 'YYYY'}[bucket]
+        return func.to_char(column, fmt)
+    if bucket == 'quarter':
+        quarter = (cast(func.strftime('%m', column), Integer) + 2) / 3
+        return func.strftime('%Y', column, type_=String) + '-Q' + cast(cast(quarter, Integer), String)
+    return func.strftime('%Y-%m' if bucket == 'month' else '%Y', column)
+
+
+def _metric_exprs():
+    vce = VoyageCostEstimation
+    return {
+        'voyages': func.count(Voyage.id),
+        **movement_sums(),
+        'cost_voyages': func.count(vce.id),
+        **{name: func.sum(getattr(vce, name)) for name in COST_COLUMNS},
+    }
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _args():
+    """Validasi query string -> dict parameter, atau (None, pesan error)."""
+    bucket = request.args.get('bucket', 'month')
+    if bucket not in BUCKETS:
+        return None, f"bucket harus salah satu dari: {', '.join(BUCKETS)}"
+    group_by = [g for g in request.args.get('group_by', 'port,vessel').split(',') if g]
+    if any(g not in DIMENSIONS for g in group_by) or len(set(group_by)) != len(group_by):
+        return None, f"group_by hanya boleh berisi: {', '.join(DIMENSIONS)}"
+    try:
+        date_from = _parse_date(request.args.get('from'))
+        date_to = _parse_date(request.args.get('to'))
+    except ValueError:
+        return None, "Format from/to harus tanggal ISO (YYYY-MM-DD)"
+    return {
+        'bucket': bucket,
+        'group_by': group_by,
+        'date_from': date_from,
+        'date_to': date_to,
+        'port_id': request.args.get('port_id', type=int),
+        'vessel_id': request.args.get('vessel_id', type=int),
+        'rollup': request.args.get('rollup', '0').lower() in ('1', 'true', 'yes'),
+    }, None
+
+
+def _query(params):
+    """Satu SELECT ... GROUP BY periode x dimensi; baris sudah terurut menurut kunci."""
+    period = _bucket_expr(params['bucket']).label('period')
+    keys = [column.label(name) for dim in params['group_by'] for name, column in DIMENSIONS[dim]]
+    metrics = _metric_exprs()
+
+    query = (
+        db.session.query(period, *keys, *[func.coalesce(expr, 0).label(name) for name, expr in metrics.items()])
+        .select_from(Voyage)
+        .outerjoin(ContainerMovement, ContainerMovement.voyage_id == Voyage.id)
+        .outerjoin(VoyageCostEstimation, VoyageCostEstimation.voyage_id == Voyage.id)
+    )
+    if 'port' in params['group_by']:
+        query = query.join(Port, Port.id == Voyage.port_id)
+    if 'vessel' in params['group_by']:
+        query = query.join(Vessel, Vessel.id == Voyage.vessel_id)
+
+    if params['date_from']:
+        query = query.filter(Voyage.date_berth >= params['date_from'])
+    if params['date_to']:
+        # 'to' inklusif sampai akhir hari jika hanya tanggal
+        query = query.filter(Voyage.date_berth < params['date_to'] + _one_day(params['date_to']))
+    if params['port_id']:
+        query = query.filter(Voyage.port_id == params['port_id'])
+    if params['vessel_id']:
+        query = query.filter(Voyage.vessel_id == params['vessel_id'])
+
+    group = [period, *keys]
+    return query.group_by(*group).order_by(*group), [k.name for k in keys], list(metrics)
+
+
+def _one_day(value):
+    is_date_only = (value.hour, value.minute, value.second, value.microsecond) == (0, 0, 0, 0)
+    return timedelta(days=1) if is_date_only else timedelta(microseconds=1)
+
+
+def _pct(num, den):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, np.round(num / den * 100.0, 2), 0.0)
+
+
+def _columnar(keys, key_values, metric_names, matrix):
+    """Kunci + matriks metrik -> {"columns": [...], "data": {kolom: [nilai...]}, "rows": n}."""
+    data = {name: list(values) for name, values in zip(keys, key_values)}
+    for i, name in enumerate(metric_names):
+        column = matrix[:, i]
+        data[name] = column.astype(np.int64).tolist() if name not in COST_COLUMNS else np.round(column, 2).tolist()
+
+    index = {name: i for i, name in enumerate(metric_names)}
+    for name, (num, den) in FUNNEL.items():
+        total_num = sum(matrix[:, index[c]] for c in num)
+        total_den = sum(matrix[:, index[c]] for c in den)
+        data[name] = _pct(total_num, total_den).tolist()
+    return {"columns": list(data), "data": data, "rows": len(matrix)}
+
+
+def _rollup(keys, key_values, matrix, level_keys):
+    """Jumlahkan ulang matriks metrik ke subset kunci `level_keys` (seperti GROUP BY ROLLUP)."""
+    positions = [keys.index(k) for k in level_keys]
+    groups = {}
+    inverse = np.empty(len(matrix), dtype=np.int64)
+    for row, key in enumerate(zip(*[key_values[p] for p in positions]) if positions else [()] * len(matrix)):
+        inverse[row] = groups.setdefault(key, len(groups))
+    totals = np.zeros((len(groups), matrix.shape[1]))
+    np.add.at(totals, inverse, matrix)
+    level_values = [list(column) for column in zip(*groups)] if positions else []
+    if not positions and not len(matrix):
+        totals = np.zeros((1, matrix.shape[1]))
+    return level_values, totals
+
+
+@analytics_bp.get('/voyages')
+@jwt_required()
+def voyage_analytics():
+    """
+    TEU, jumlah box per tahap, persentase funnel dan total cost per periode date_berth
+    (?bucket=month|quarter|year) x dimensi (?group_by=port,vessel; kosong = hanya periode).
+    Filter: ?from=&to= (tanggal date_berth), ?port_id=, ?vessel_id=.
+    ?rollup=1 menambahkan subtotal untuk tiap prefix kunci sampai grand total.
+    Respons kolumnar: {"columns": [...], "data": {kolom: [nilai per baris]}, "rows": n}.
+    """
+    params, error = _args()
+    if error:
+        return jsonify({"error": error}), 400
+
+    query, dim_keys, metric_names = _query(params)
+    rows = query.all()
+    keys = ['period', *dim_keys]
+    key_count = len(keys)
+    key_values = [list(column) for column in zip(*rows)][:key_count] if rows else [[] for _ in keys]
+    matrix = np.array(
+        [[float(value or 0) for value in row[key_count:]] for row in rows],
+        dtype=np.float64,
+    ).reshape(len(rows), len(metric_names))
+
+    payload = {
+        "bucket": params['bucket'],
+        "group_by": params['group_by'],
+        **_columnar(keys, key_values, metric_names, matrix),
+    }
+    if params['rollup']:
+        payload["rollups"] = []
+        # Subtotal per prefix kunci: (periode, port) -> (periode) -> grand total
+        levels = [keys[:n] for n in range(key_count - 1, -1, -1)]
+        for level in levels:
+            # Nama & id satu dimensi selalu ikut bersama
+            if level and level[-1].endswith('_id'):
+                continue
+            level_values, totals = _rollup(keys, key_values, matrix, level)
+            payload["rollups"].append({
+                "keys": level,
+                **_columnar(level, level_values, metric_names, totals),
+            })
+    return jsonify(payload), 200
@@ -2,7 +2,8 @@ from flask import Blueprint, request, jsonify
 from .models import User
 from . import db
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
-from . import BLOCKLIST
+from .token_blocklist import blocklist
+from .passwords import PasswordHasherBusy
 
 auth_bp = Blueprint('auth_bp', __name__)
 
@@ -23,7 +24,10 @@ def register():
         return jsonify({"msg": "Email sudah terdaftar"}), 409
     
     new_user = User(username=username, email=email)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except PasswordHasherBusy as e:
+        return jsonify({"msg": str(e)}), 503, {"Retry-After": "1"}
 
     db.session.add(new_user)
     db.session.commit()
@@ -41,7 +45,15 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if user and user.check_password(password):
+    try:
+        valid = user is not None and user.check_password(password)
+    except PasswordHasherBusy as e:
+        return jsonify({"msg": str(e)}), 503, {"Retry-After": "1"}
+
+    if valid:
+        # Hash di-upgrade ke BCRYPT_LOG_ROUNDS saat ini oleh check_password
+        if db.session.is_modified(user):
+            db.session.commit()
         access_token = create_access_token(identity=user.email)
         refresh_token = create_refresh_token(identity=user.email)
         return jsonify(
@@ -62,6 +74,7 @@ def refresh():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    jti = get_jwt()["jti"]
-    BLOCKLIST.add(jti)
+    token = get_jwt()
+    # Berlaku di semua worker sampai token ini kedaluwarsa (klaim exp)
+    blocklist.revoke(token["jti"], token["exp"])
     return jsonify({"msg": "Berhasil logout"}), 200
\ No newline at end of file
@@ -1,276 +1,95 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required
-from .models import db, ContainerMovement, Voyage, Port, PercentageContainerMovement, CostRate, VoyageCostEstimation, Vessel
-from datetime import datetime
+from .models import db, ContainerMovement, Voyage, Port, PortMovementTotal
+from .stored_predictions import enqueue_prediction_refresh
+from .derived_values import enqueue_derived_refresh
+from .port_totals import PERIOD_ALL, movement_totals, record_movement_change
+from .pagination import CountCache, keyset_page
+from .read_models import CM_EXPORT, CM_LIST
+from .exports import EXPORT_FORMATS, EXPORT_LAYOUTS, export_stream, require_pyarrow
+from .importer import ImportFileError, import_csv
+from .workbook import import_workbook, is_workbook
+from .search import prefix_filter, typed_filter
+from .http_cache import cached_response
+from .db_routing import read_replica
 from sqlalchemy.sql import func
 from sqlalchemy.orm import joinedload
-from sqlalchemy import or_, cast, String
 
 cm_bp = Blueprint('container_movements', __name__)
 
 
-def _safe_int(x):
-    try:
-        return int(x or 0)
-    except Exception:
-        return 0
-
-
-def _get_rate(rates: CostRate | None, prefix: str, suffix: str) -> float:
-    # prefix: 'tl' | 'tdk_tl' | 'shipside_yes' | 'shipside_no' | 'turun_cy'
-    # suffix: '20mt' | '40mt' | '20fl' | '40fl'
-    if not rates:
-        return 0.0
-    key = f"{prefix}_{suffix}"
-    val = getattr(rates, key, 0) if hasattr(rates, key) else 0
-    try:
-        return float(val or 0)
-    except Exception:
-        return 0.0
-
-
-def _compute_and_save_voyage_cost(cm: ContainerMovement):
-    """Compute Estimasi Cost 1/2 and Final Cost using CostRate per voyage port and persist."""
-    if not cm or not cm.voyage_id:
-        return
+# Kolom urutan paginasi cursor (kolom, label di read_models.CM_LIST)
+CM_LIST_ORDER = ((Voyage.created_at, 'voyage_created_at'), (Voyage.id, 'voyage_id'))
 
-    voyage = Voyage.query.get(cm.voyage_id)
-    if not voyage:
-        return
+_total_cache = CountCache()
 
-    # Fetch rates for the voyage port (one row per port expected)
-    rates = CostRate.query.filter_by(port_id=voyage.port_id).first()
-
-    # Build category map for 4 combos: (empty/full) x (20dc/40hc)
-    categories = [
-        {
-            'name': 'empty_20dc',
-            'suffix': '20mt',
-            'b': _safe_int(cm.bongkaran_empty_20dc),
-            'p': _safe_int(cm.pengajuan_empty_20dc),
-            'acc': _safe_int(cm.acc_pengajuan_empty_20dc),
-            'real': _safe_int(cm.realisasi_mxd_20dc),
-            'ship_yes': _safe_int(cm.shipside_yes_mxd_20dc),
-            'ship_no': _safe_int(cm.shipside_no_mxd_20dc),
-        },
-        {
-            'name': 'empty_40hc',
-            'suffix': '40mt',
-            'b': _safe_int(cm.bongkaran_empty_40hc),
-            'p': _safe_int(cm.pengajuan_empty_40hc),
-            'acc': _safe_int(cm.acc_pengajuan_empty_40hc),
-            'real': _safe_int(cm.realisasi_mxd_40hc),
-            'ship_yes': _safe_int(cm.shipside_yes_mxd_40hc),
-            'ship_no': _safe_int(cm.shipside_no_mxd_40hc),
-        },
-        {
-            'name': 'full_20dc',
-            'suffix': '20fl',
-            'b': _safe_int(cm.bongkaran_full_20dc),
-            'p': _safe_int(cm.pengajuan_full_20dc),
-            'acc': _safe_int(cm.acc_pengajuan_full_20dc),
-            'real': _safe_int(cm.realisasi_fxd_20dc),
-            'ship_yes': _safe_int(cm.shipside_yes_fxd_20dc),
-            'ship_no': _safe_int(cm.shipside_no_fxd_20dc),
-        },
-        {
-            'name': 'full_40hc',
-            'suffix': '40fl',
-            'b': _safe_int(cm.bongkaran_full_40hc),
-            'p': _safe_int(cm.pengajuan_full_40hc),
-            'acc': _safe_int(cm.acc_pengajuan_full_40hc),
-            'real': _safe_int(cm.realisasi_fxd_40hc),
-            'ship_yes': _safe_int(cm.shipside_yes_fxd_40hc),
-            'ship_no': _safe_int(cm.shipside_no_fxd_40hc),
-        },
-    ]
 
-    est1_total = 0.0
-    est2_total = 0.0
-    final_total = 0.0
-
-    # Detect data readiness for each estimation
-    has_pengajuan = any(
-        getattr(cm, f, None) is not None for f in (
-            'pengajuan_empty_20dc','pengajuan_empty_40hc','pengajuan_full_20dc','pengajuan_full_40hc'
-        )
-    )
-    has_acc = any(
-        getattr(cm, f, None) is not None for f in (
-            'acc_pengajuan_empty_20dc','acc_pengajuan_empty_40hc','acc_pengajuan_full_20dc','acc_pengajuan_full_40hc'
-        )
-    )
-    has_real_or_shipside = any(
-        getattr(cm, f, None) is not None for f in (
-            'realisasi_mxd_20dc','realisasi_mxd_40hc','realisasi_fxd_20dc','realisasi_fxd_40hc',
-            'shipside_yes_mxd_20dc','shipside_yes_mxd_40hc','shipside_yes_fxd_20dc','shipside_yes_fxd_40hc',
-            'shipside_no_mxd_20dc','shipside_no_mxd_40hc','shipside_no_fxd_20dc','shipside_no_fxd_40hc'
-        )
-    )
+def _search_args():
+    q = (request.args.get('q') or '').strip()
+    field = (request.args.get('field') or 'all').strip().lower()
+    return q, field
 
-    for cat in categories:
-        suffix = cat['suffix']
-        b = max(0, cat['b'])
-        p = max(0, cat['p'])
-        acc = max(0, cat['acc'])
-        real_only = max(0, cat['real'])  # Realisasi (tidak termasuk shipside)
-        ship_yes = max(0, cat['ship_yes'])
-        ship_no = max(0, cat['ship_no'])
-
-        not_submitted = max(0, b - p)
-        not_tl = max(0, b - acc)  # dianggap: yang tidak diterima TL
-
-        # Total realisasi per kategori (untuk hitung turun cy)
-        total_real_cat = real_only + ship_yes + ship_no
-        turun_cy_cat = max(0, acc - total_real_cat)
-
-        tl_rate = _get_rate(rates, 'tl', suffix)
-        tdk_tl_rate = _get_rate(rates, 'tdk_tl', suffix)
-        ship_yes_rate = _get_rate(rates, 'shipside_yes', suffix)
-        ship_no_rate = _get_rate(rates, 'shipside_no', suffix)
-        turun_cy_rate = _get_rate(rates, 'turun_cy', suffix)
-
-        # Estimasi 1: Diajukan + Tidak Diajukan
-        if has_pengajuan:
-            est1_total += p * tl_rate + not_submitted * tdk_tl_rate
-
-        # Estimasi 2: ACC Pengajuan + Tidak TL
-        if has_acc:
-            est2_total += acc * tl_rate + not_tl * tdk_tl_rate
-
-        # Final: Tidak TL + Realisasi + Shipside + Turun CY
-        if has_real_or_shipside:
-            final_total += (
-                not_tl * tdk_tl_rate
-                + real_only * tl_rate
-                + ship_yes * ship_yes_rate
-                + ship_no * ship_no_rate
-                + turun_cy_cat * turun_cy_rate
-            )
 
-    # Upsert to VoyageCostEstimation
-    vce = VoyageCostEstimation.query.filter_by(voyage_id=cm.voyage_id).first()
-    if not vce:
-        vce = VoyageCostEstimation(voyage_id=cm.voyage_id)
-        db.session.add(vce)
-    vce.estimation_cost1 = est1_total if has_pengajuan else None
-    vce.estimation_cost2 = est2_total if has_acc else None
-    vce.final_cost = final_total if has_real_or_shipside else None
-    vce.computed_at = datetime.now()
+def _apply_search(query, q, field):
+    if q:
+        # ?search_mode=prefix: pencarian lama (cast ke teks, tanpa index)
+        if request.args.get('search_mode') == 'prefix':
+            return query.filter(prefix_filter(q, field))
+        return query.filter(typed_filter(q, field))
+    return query
 
-    # No separate commit here; caller will commit
-    return
 
 @cm_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_container_movements():
-
+    """
+    Daftar voyage + ContainerMovement, urut dari voyage terbaru.
+
+    Default: paginasi halaman (?page=&per_page=) seperti sebelumnya.
+    Mode cursor: kirim ?cursor= (kosong untuk halaman pertama, lalu nilai next_cursor).
+    Diurutkan pada (Voyage.created_at, Voyage.id) tanpa OFFSET/COUNT, jadi waktu per halaman
+    tetap sama sedalam apa pun. ?include_total=1 menambahkan total perkiraan (COUNT yang
+    di-cache CM_TOTAL_CACHE_TTL detik per filter).
+    Pencarian ?q=&field= memakai predicate bertipe per field (lihat search.py);
+    ?search_mode=prefix untuk perilaku lama.
+    """
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
     except (TypeError, ValueError):
         return jsonify({"msg": "Parameter halaman tidak valid"}), 400
 
-    q = (request.args.get('q') or '').strip()
-    field = (request.args.get('field') or 'all').strip().lower()
-
-    base_query = db.session.query(Voyage, ContainerMovement, Port).select_from(Voyage).outerjoin(
-        ContainerMovement, Voyage.id == ContainerMovement.voyage_id
-    ).join(Port, Voyage.port_id == Port.id)\
-     .outerjoin(Vessel, Voyage.vessel_id == Vessel.id)\
-     .order_by(Voyage.created_at.desc())
-
-    def ci_prefix(col, text):
-        return func.lower(cast(col, String)).like((text or '').lower() + '%')
-
-    if q:
-        columns_map = {
-            'vessel_name': Vessel.name,
-            'voyage_number': Voyage.voyage_no,
-            'voyage_year':   Voyage.voyage_yr,
-            'port_name':     Port.name,
-            'voyage_date_berth': Voyage.date_berth,
-            'created_at':    ContainerMovement.created_at,
-            'updated_at':    ContainerMovement.updated_at,
-            'voyage_created_at': Voyage.created_at,
-            'obstacles':     ContainerMovement.obstacles,
+    q, field = _search_args()
+    base_query = _apply_search(CM_LIST.query(), q, field)
+
+    if 'cursor' in request.args:
+        per_page = min(max(per_page, 1), 500)
+        try:
+            rows, next_cursor = keyset_page(base_query, CM_LIST_ORDER, request.args.get('cursor'), per_page)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+
+        body = {
+            "data": CM_LIST.serialize(rows),
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+            "per_page": per_page,
         }
-
-        if field != 'all' and field in columns_map:
-            base_query = base_query.filter(ci_prefix(columns_map[field], q))
-        else:
-            base_query = base_query.filter(or_(
-                ci_prefix(columns_map['vessel_name'], q),
-                ci_prefix(columns_map['voyage_number'], q),
-                ci_prefix(columns_map['voyage_year'], q),
-                ci_prefix(columns_map['port_name'], q),
-                ci_prefix(columns_map['voyage_date_berth'], q),
-                ci_prefix(columns_map['voyage_created_at'], q),
-                ci_prefix(columns_map['created_at'], q),
-                ci_prefix(columns_map['updated_at'], q),
-                ci_prefix(columns_map['obstacles'], q),
-            ))
+        if request.args.get('include_total') == '1':
+            count_query = base_query.order_by(None).with_entities(func.count(Voyage.id))
+            body["total"] = _total_cache.get(
+                (q, field, request.args.get('search_mode')), count_query.scalar, ttl=current_app.config.get('CM_TOTAL_CACHE_TTL', 30)
+            )
+            body["total_is_estimate"] = True
+        return jsonify(body), 200
 
     paginated_query = base_query.paginate(page=page, per_page=per_page, error_out=False)
- 
-    results = paginated_query.items
-
-    response_data = []
-    for voyage, movement, port in results:
-        item_data = {
-            "id": movement.id if movement else None,
-            "voyage_id": voyage.id,
-            "vessel_name": voyage.vessel.name if voyage.vessel else None,
-            "voyage_number": voyage.voyage_no,
-            "voyage_year": voyage.voyage_yr,
-            "port_id": voyage.port_id,
-            "port_name": port.name if port else (voyage.port.name if voyage.port else None),
-            "voyage_date_berth": voyage.date_berth.isoformat() if voyage.date_berth else None,
-            "bongkaran_empty_20dc": movement.bongkaran_empty_20dc if movement else None,
-            "bongkaran_empty_40hc": movement.bongkaran_empty_40hc if movement else None,
-            "bongkaran_full_20dc": movement.bongkaran_full_20dc if movement else None,
-            "bongkaran_full_40hc": movement.bongkaran_full_40hc if movement else None,
-            "pengajuan_empty_20dc": movement.pengajuan_empty_20dc if movement else None,
-            "pengajuan_empty_40hc": movement.pengajuan_empty_40hc if movement else None,
-            "pengajuan_full_20dc": movement.pengajuan_full_20dc if movement else None,
-            "pengajuan_full_40hc": movement.pengajuan_full_40hc if movement else None,
-            "acc_pengajuan_empty_20dc": movement.acc_pengajuan_empty_20dc if movement else None,
-            "acc_pengajuan_empty_40hc": movement.acc_pengajuan_empty_40hc if movement else None,
-            "acc_pengajuan_full_20dc": movement.acc_pengajuan_full_20dc if movement else None,
-            "acc_pengajuan_full_40hc": movement.acc_pengajuan_full_40hc if movement else None,
-            "total_pengajuan_20dc": movement.total_pengajuan_20dc if movement else None,
-            "total_pengajuan_40hc": movement.total_pengajuan_40hc if movement else None,
-            "teus_pengajuan": movement.teus_pengajuan if movement else None,
-            "realisasi_mxd_20dc": movement.realisasi_mxd_20dc if movement else None,
-            "realisasi_mxd_40hc": movement.realisasi_mxd_40hc if movement else None,
-            "realisasi_fxd_20dc": movement.realisasi_fxd_20dc if movement else None,
-            "realisasi_fxd_40hc": movement.realisasi_fxd_40hc if movement else None,
-            "shipside_yes_mxd_20dc": movement.shipside_yes_mxd_20dc if movement else None,
-            "shipside_yes_mxd_40hc": movement.shipside_yes_mxd_40hc if movement else None,
-            "shipside_yes_fxd_20dc": movement.shipside_yes_fxd_20dc if movement else None,
-            "shipside_yes_fxd_40hc": movement.shipside_yes_fxd_40hc if movement else None,
-            "shipside_no_mxd_20dc": movement.shipside_no_mxd_20dc if movement else None,
-            "shipside_no_mxd_40hc": movement.shipside_no_mxd_40hc if movement else None,
-            "shipside_no_fxd_20dc": movement.shipside_no_fxd_20dc if movement else None,
-            "shipside_no_fxd_40hc": movement.shipside_no_fxd_40hc if movement else None,
-            "total_realisasi_20dc": movement.total_realisasi_20dc if movement else None,
-            "total_realisasi_40hc": movement.total_realisasi_40hc if movement else None,
-            "teus_realisasi": movement.teus_realisasi if movement else None,
-            "turun_cy_20dc": movement.turun_cy_20dc if movement else None,
-            "turun_cy_40hc": movement.turun_cy_40hc if movement else None,
-            "teus_turun_cy": movement.teus_turun_cy if movement else None,
-            "percentage_vessel": movement.percentage_vessel if movement else None,
-            "obstacles": movement.obstacles if movement else "",
-            "created_at": movement.created_at.isoformat() if movement and movement.created_at else None,
-            "updated_at": movement.updated_at.isoformat() if movement and movement.updated_at else None,
-            "voyage_created_at": voyage.created_at.isoformat() if voyage.created_at else None
-        }
-        response_data.append(item_data)
-        
+
     # Mengubah struktur respons JSON untuk menyertakan info paginasi
     # Respons sekarang adalah objek yang berisi data dan info paginasi
     return jsonify({
-        "data": response_data,
+        "data": CM_LIST.serialize(paginated_query.items),
         "total": paginated_query.total,
         "pages": paginated_query.pages,
         "current_page": paginated_query.page,
@@ -278,6 +97,75 @@ def get_container_movements():
         "has_prev": paginated_query.has_prev
     }), 200
 
+@cm_bp.route('/export', methods=['GET'])
+@jwt_required()
+@read_replica
+def export_container_movements():
+    """
+    Ekspor semua baris daftar (filter ?q=&field=&search_mode= sama dengan GET /) secara
+    streaming: ?format=ndjson (default) | csv | parquet.
+    ?layout=seeder memakai header Ship_Operation_Data_Cleaned.csv dan hanya voyage yang
+    punya ContainerMovement, jadi file CSV-nya bisa di-seed ulang.
+    Baris dibaca per EXPORT_BATCH_SIZE lewat server-side cursor, memori tetap.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    layout = request.args.get('layout', 'api')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"msg": f"format harus salah satu dari: {', '.join(EXPORT_FORMATS)}"}), 400
+    if layout not in EXPORT_LAYOUTS:
+        return jsonify({"msg": f"layout harus salah satu dari: {', '.join(EXPORT_LAYOUTS)}"}), 400
+    if fmt == 'parquet':
+        try:
+            require_pyarrow()
+        except RuntimeError as e:
+            return jsonify({"msg": str(e)}), 400
+
+    q, field = _search_args()
+    query = _apply_search(CM_EXPORT.query(), q, field)
+    if layout == 'seeder':
+        query = query.filter(ContainerMovement.id.isnot(None))
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    stream = export_stream(fmt, layout, query, current_app.config['EXPORT_BATCH_SIZE'])
+    return Response(
+        stream_with_context(stream),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=container_movements.{extension}"},
+    )
+
+@cm_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_container_movements():
+    """
+    Upload CSV layout Ship_Operation_Data_Cleaned.csv atau workbook operasional .xlsx
+    (multipart field `file`) untuk diimpor sekaligus (lihat importer.py, workbook.py).
+    Baris tidak valid dilewati dan dilaporkan per baris (nomor baris Excel untuk .xlsx);
+    ?strict=1 membatalkan seluruh impor jika ada yang tidak valid.
+    ?sync=1 = mode upsert: voyage yang sudah ada dicocokkan, baris yang tidak berubah
+    dilewati dan yang berubah diperbarui (aman diulang untuk file yang sama).
+    """
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"msg": "File CSV/XLSX diperlukan (field 'file')"}), 400
+    strict = request.args.get('strict') == '1'
+    sync = request.args.get('sync') == '1'
+    batch_size = current_app.config['IMPORT_BATCH_SIZE']
+    try:
+        if is_workbook(upload.filename):
+            report = import_workbook(
+                upload.stream, sync=sync, strict=strict, batch_size=batch_size,
+                chunk_rows=current_app.config['XLSX_CHUNK_ROWS'],
+            )
+        else:
+            report = import_csv(upload.stream, sync=sync, strict=strict, batch_size=batch_size)
+    except (ImportFileError, RuntimeError) as e:
+        return jsonify({"msg": str(e)}), 400
+    except (ValueError, UnicodeDecodeError):
+        return jsonify({"msg": "File bukan CSV yang valid"}), 400
+    if report.get("aborted"):
+        return jsonify({"msg": "Impor dibatalkan karena ada baris tidak valid", **report}), 400
+    return jsonify({"msg": "Impor selesai", **report}), 200
+
 @cm_bp.route('/bongkaran', methods=['POST'])
 @jwt_required()
 def create_bongkaran():
@@ -306,30 +194,15 @@ def create_bongkaran():
         bongkaran_full_40hc=bongkaran_full_40hc
     )
     db.session.add(new_cm)
-    # Flush supaya ID tersedia sebelum membuat record persentase
+    # Flush supaya ID tersedia untuk job persentase & cost
     db.session.flush()
 
-    # Hitung total bongkaran per size
-    total_bongkaran_20dc = bongkaran_empty_20dc + bongkaran_full_20dc
-    total_bongkaran_40hc = bongkaran_empty_40hc + bongkaran_full_40hc
-
-    # Buat record PercentageContainerMovement (awalnya pengajuan & acc belum ada => 0)
-    pcm = PercentageContainerMovement(
-        cm_id=new_cm.id,
-        total_bongkaran_20dc=total_bongkaran_20dc,
-        total_bongkaran_40hc=total_bongkaran_40hc,
-        # Field rasio pengajuan terhadap bongkaran masih 0 karena pengajuan belum diinput
-        bongkaran_pengajuan_empty_20dc=0,
-        bongkaran_pengajuan_full_20dc=0,
-        bongkaran_pengajuan_empty_40hc=0,
-        bongkaran_pengajuan_full_40hc=0,
-        # Persentase total pengajuan per size juga 0 (belum ada pengajuan)
-        percentage_pengajuan_20dc=0,
-        percentage_pengajuan_40hc=0
-    )
-    db.session.add(pcm)
-    # Compute and save costs
-    _compute_and_save_voyage_cost(new_cm)
+    # Rekap per port (port_movement_totals) ikut transaksi ini
+    record_movement_change(new_cm, None)
+
+    # Persentase & estimasi cost dihitung oleh job background (lihat derived_values.py)
+    job = enqueue_derived_refresh(new_cm)
+    enqueue_prediction_refresh(new_cm)
     db.session.commit()
 
     return jsonify({
@@ -344,11 +217,9 @@ def create_bongkaran():
             "created_at": new_cm.created_at.isoformat() if new_cm.created_at else None
         },
         "percentage_container_movement": {
-            "cm_id": pcm.cm_id,
-            "total_bongkaran_20dc": pcm.total_bongkaran_20dc,
-            "total_bongkaran_40hc": pcm.total_bongkaran_40hc,
-            "percentage_pengajuan_20dc": pcm.percentage_pengajuan_20dc,
-            "percentage_pengajuan_40hc": pcm.percentage_pengajuan_40hc
+            "cm_id": new_cm.id,
+            "status": "stale",
+            "job_id": job.id
         }
     }), 201
 
@@ -371,6 +242,7 @@ def create_pengajuan():
     cm = ContainerMovement.query.filter_by(id=cm_id).first()
     if not cm:
         return jsonify({"msg": "ContainerMovement tidak ditemukan"}), 404
+    before = movement_totals(cm)
 
     # Update nilai pengajuan di ContainerMovement
     cm.pengajuan_empty_20dc = pengajuan_empty_20dc
@@ -378,51 +250,11 @@ def create_pengajuan():
     cm.pengajuan_full_20dc = pengajuan_full_20dc
     cm.pengajuan_full_40hc = pengajuan_full_40hc
 
-    # Upsert ke tabel PercentageContainerMovement
-    pcm = PercentageContainerMovement.query.filter_by(cm_id=cm.id).first()
-    created_new_pcm = False
-    if not pcm:
-        pcm = PercentageContainerMovement(cm_id=cm.id)
-        pcm.total_bongkaran_20dc = (cm.bongkaran_empty_20dc or 0) + (cm.bongkaran_full_20dc or 0)
-        pcm.total_bongkaran_40hc = (cm.bongkaran_empty_40hc or 0) + (cm.bongkaran_full_40hc or 0)
-        db.session.add(pcm)
-        created_new_pcm = True
-
-    # Hitung total pengajuan per size
-    total_pengajuan_20dc = pengajuan_empty_20dc + pengajuan_full_20dc
-    total_pengajuan_40hc = pengajuan_empty_40hc + pengajuan_full_40hc
-
-    # Helper fungsi safe division (hasil 0..1; jika bongkaran 0 => 0)
-    def ratio(pengajuan, bongkaran):
-        if bongkaran and bongkaran > 0:
-            return pengajuan / bongkaran
-        return 0
-
-    # Rasio per kategori (pengajuan / bongkaran)
-    bongkaran_pengajuan_empty_20dc = ratio(pengajuan_empty_20dc, cm.bongkaran_empty_20dc)
-    bongkaran_pengajuan_full_20dc = ratio(pengajuan_full_20dc, cm.bongkaran_full_20dc)
-    bongkaran_pengajuan_empty_40hc = ratio(pengajuan_empty_40hc, cm.bongkaran_empty_40hc)
-    bongkaran_pengajuan_full_40hc = ratio(pengajuan_full_40hc, cm.bongkaran_full_40hc)
-
-    # Rasio total per size
-    percentage_pengajuan_20dc = ratio(total_pengajuan_20dc, pcm.total_bongkaran_20dc)
-    percentage_pengajuan_40hc = ratio(total_pengajuan_40hc, pcm.total_bongkaran_40hc)
-
-    pcm.bongkaran_pengajuan_empty_20dc = bongkaran_pengajuan_empty_20dc
-    pcm.bongkaran_pengajuan_full_20dc = bongkaran_pengajuan_full_20dc
-    pcm.bongkaran_pengajuan_empty_40hc = bongkaran_pengajuan_empty_40hc
-    pcm.bongkaran_pengajuan_full_40hc = bongkaran_pengajuan_full_40hc
-
-    pcm.total_pengajuan_20dc = total_pengajuan_20dc
-    pcm.total_pengajuan_40hc = total_pengajuan_40hc
-    pcm.percentage_pengajuan_20dc = percentage_pengajuan_20dc
-    pcm.percentage_pengajuan_40hc = percentage_pengajuan_40hc
-
-    if created_new_pcm:
-        db.session.add(pcm)
-
-    # Compute and save costs
-    _compute_and_save_voyage_cost(cm)
+    record_movement_change(cm, before)
+
+    # Persentase & estimasi cost dihitung oleh job background (lihat derived_values.py)
+    job = enqueue_derived_refresh(cm)
+    enqueue_prediction_refresh(cm)
     db.session.commit()
 
     return jsonify({
@@ -437,16 +269,9 @@ def create_pengajuan():
             "updated_at": cm.updated_at.isoformat() if cm.updated_at else None
         },
         "percentage_container_movement": {
-            "cm_id": pcm.cm_id,
-            "bongkaran_pengajuan_empty_20dc": pcm.bongkaran_pengajuan_empty_20dc,
-            "bongkaran_pengajuan_full_20dc": pcm.bongkaran_pengajuan_full_20dc,
-            "bongkaran_pengajuan_empty_40hc": pcm.bongkaran_pengajuan_empty_40hc,
-            "bongkaran_pengajuan_full_40hc": pcm.bongkaran_pengajuan_full_40hc,
-            "total_pengajuan_20dc": pcm.total_pengajuan_20dc,
-            "total_pengajuan_40hc": pcm.total_pengajuan_40hc,
-            "percentage_pengajuan_20dc": pcm.percentage_pengajuan_20dc,
-            "percentage_pengajuan_40hc": pcm.percentage_pengajuan_40hc,
-            "created": created_new_pcm
+            "cm_id": cm.id,
+            "status": "stale",
+            "job_id": job.id
         }
     }), 200
 
@@ -478,7 +303,7 @@ def create_acc_pengajuan():
         cm.pengajuan_full_20dc, cm.pengajuan_full_40hc
     ]):
         return jsonify({"msg": "Data pengajuan belum tersedia untuk ContainerMovement ini"}), 400
-
+    before = movement_totals(cm)
 
     cm.acc_pengajuan_empty_20dc = acc_pengajuan_empty_20dc
     cm.acc_pengajuan_empty_40hc = acc_pengajuan_empty_40hc
@@ -488,42 +313,11 @@ def create_acc_pengajuan():
     cm.total_pengajuan_40hc = total_pengajuan_40hc
     cm.teus_pengajuan = teus_pengajuan
 
-    # Update / buat PercentageContainerMovement untuk rasio ACC terhadap Pengajuan & Bongkaran
-    pcm = PercentageContainerMovement.query.filter_by(cm_id=cm.id).first()
-    if not pcm:
-        # Seharusnya sudah dibuat saat bongkaran, tapi fallback jika belum ada
-        pcm = PercentageContainerMovement(cm_id=cm.id)
-        # Tarik total bongkaran dari cm (jika belum diset di pcm)
-        pcm.total_bongkaran_20dc = (cm.bongkaran_empty_20dc or 0) + (cm.bongkaran_full_20dc or 0)
-        pcm.total_bongkaran_40hc = (cm.bongkaran_empty_40hc or 0) + (cm.bongkaran_full_40hc or 0)
-        db.session.add(pcm)
-
-    # Total ACC per size
-    total_acc_20dc = acc_pengajuan_empty_20dc + acc_pengajuan_full_20dc
-    total_acc_40hc = acc_pengajuan_empty_40hc + acc_pengajuan_full_40hc
-
-    # Helper pembagi aman
-    def ratio(pengajuan, bongkaran):
-        if bongkaran and bongkaran > 0:
-            return pengajuan / bongkaran
-        return 0
-
-    # Rasio pengajuan -> ACC per kategori
-    pcm.pengajuan_acc_empty_20dc = ratio(acc_pengajuan_empty_20dc, cm.pengajuan_empty_20dc)
-    pcm.pengajuan_acc_full_20dc = ratio(acc_pengajuan_full_20dc, cm.pengajuan_full_20dc)
-    pcm.pengajuan_acc_empty_40hc = ratio(acc_pengajuan_empty_40hc, cm.pengajuan_empty_40hc)
-    pcm.pengajuan_acc_full_40hc = ratio(acc_pengajuan_full_40hc, cm.pengajuan_full_40hc)
-
-    # Simpan total ACC
-    pcm.total_acc_20dc = total_acc_20dc
-    pcm.total_acc_40hc = total_acc_40hc
-
-    # Persentase ACC terhadap total bongkaran (mirip pola percentage_pengajuan_*)
-    pcm.percentage_acc_20dc = ratio(total_acc_20dc, pcm.total_bongkaran_20dc)
-    pcm.percentage_acc_40hc = ratio(total_acc_40hc, pcm.total_bongkaran_40hc)
-
-    # Compute and save costs
-    _compute_and_save_voyage_cost(cm)
+    record_movement_change(cm, before)
+
+    # Persentase & estimasi cost dihitung oleh job background (lihat derived_values.py)
+    job = enqueue_derived_refresh(cm)
+    enqueue_prediction_refresh(cm)
     db.session.commit()
 
     return jsonify({
@@ -541,15 +335,9 @@ def create_acc_pengajuan():
             "updated_at": cm.updated_at.isoformat() if cm.updated_at else None
         },
         "percentage_container_movement": {
-            "cm_id": pcm.cm_id,
-            "pengajuan_acc_empty_20dc": pcm.pengajuan_acc_empty_20dc,
-            "pengajuan_acc_full_20dc": pcm.pengajuan_acc_full_20dc,
-            "pengajuan_acc_empty_40hc": pcm.pengajuan_acc_empty_40hc,
-            "pengajuan_acc_full_40hc": pcm.pengajuan_acc_full_40hc,
-            "total_acc_20dc": pcm.total_acc_20dc,
-            "total_acc_40hc": pcm.total_acc_40hc,
-            "percentage_acc_20dc": pcm.percentage_acc_20dc,
-            "percentage_acc_40hc": pcm.percentage_acc_40hc
+            "cm_id": cm.id,
+            "status": "stale",
+            "job_id": job.id
         }
     }), 200
 
@@ -582,6 +370,7 @@ def create_realisasi_shipside():
         return jsonify({"msg": "ContainerMovement tidak ditemukan"}), 404
     if any(v is None for v in [cm.acc_pengajuan_empty_20dc, cm.acc_pengajuan_empty_40hc, cm.acc_pengajuan_full_20dc, cm.acc_pengajuan_full_40hc]):
         return jsonify({"msg": "Data ACC Pengajuan belum tersedia untuk ContainerMovement ini"}), 400
+    before = movement_totals(cm)
 
     total_realisasi_empty_20dc = realisasi_mxd_20dc + shipside_yes_mxd_20dc + shipside_no_mxd_20dc
     total_realisasi_empty_40hc = realisasi_mxd_40hc + shipside_yes_mxd_40hc + shipside_no_mxd_40hc
@@ -621,57 +410,11 @@ def create_realisasi_shipside():
     cm.teus_turun_cy = teus_turun_cy
     cm.percentage_vessel = percentage_vessel
 
-    # Update PercentageContainerMovement (TLSS & Turun CY & Realisasi)
-    pcm = PercentageContainerMovement.query.filter_by(cm_id=cm.id).first()
-    if not pcm:
-        pcm = PercentageContainerMovement(cm_id=cm.id)
-        pcm.total_bongkaran_20dc = (cm.bongkaran_empty_20dc or 0) + (cm.bongkaran_full_20dc or 0)
-        pcm.total_bongkaran_40hc = (cm.bongkaran_empty_40hc or 0) + (cm.bongkaran_full_40hc or 0)
-        db.session.add(pcm)
-
-    # Turun CY per kategori (ACC - realisasi)
-    turun_cy_empty_20dc = (cm.acc_pengajuan_empty_20dc or 0) - total_realisasi_empty_20dc
-    turun_cy_full_20dc = (cm.acc_pengajuan_full_20dc or 0) - total_realisasi_full_20dc
-    turun_cy_empty_40hc = (cm.acc_pengajuan_empty_40hc or 0) - total_realisasi_empty_40hc
-    turun_cy_full_40hc = (cm.acc_pengajuan_full_40hc or 0) - total_realisasi_full_40hc
-
-    # Total TLSS & Turun per size
-    total_tlss_20dc = total_realisasi_20dc
-    total_tlss_40hc = total_realisasi_40hc
-    total_turun_20dc = turun_cy_empty_20dc + turun_cy_full_20dc
-    total_turun_40hc = turun_cy_empty_40hc + turun_cy_full_40hc
-
-    def ratio(pengajuan, bongkaran):
-        if bongkaran and bongkaran > 0:
-            return pengajuan / bongkaran
-        return 0
-
-    # Rasio ACC -> TLSS (anggap TLSS = total realisasi per kategori)
-    pcm.acc_tlss_empty_20dc = ratio(total_realisasi_empty_20dc, cm.acc_pengajuan_empty_20dc)
-    pcm.acc_tlss_full_20dc  = ratio(total_realisasi_full_20dc, cm.acc_pengajuan_full_20dc)
-    pcm.acc_tlss_empty_40hc = ratio(total_realisasi_empty_40hc, cm.acc_pengajuan_empty_40hc)
-    pcm.acc_tlss_full_40hc  = ratio(total_realisasi_full_40hc, cm.acc_pengajuan_full_40hc)
-
-    # Rasio ACC -> Turun CY per kategori
-    pcm.acc_turun_cy_empty_20dc = ratio(turun_cy_empty_20dc, cm.acc_pengajuan_empty_20dc)
-    pcm.acc_turun_cy_full_20dc  = ratio(turun_cy_full_20dc, cm.acc_pengajuan_full_20dc)
-    pcm.acc_turun_cy_empty_40hc = ratio(turun_cy_empty_40hc, cm.acc_pengajuan_empty_40hc)
-    pcm.acc_turun_cy_full_40hc  = ratio(turun_cy_full_40hc, cm.acc_pengajuan_full_40hc)
-
-    # Simpan totals TLSS & Turun
-    pcm.total_tlss_20dc = total_tlss_20dc
-    pcm.total_tlss_40hc = total_tlss_40hc
-    pcm.total_turun_20dc = total_turun_20dc
-    pcm.total_turun_40hc = total_turun_40hc
-
-    # Persentase TLSS & Realisasi terhadap baseline bongkaran
-    pcm.percentage_tl_20dc = ratio(total_tlss_20dc, pcm.total_bongkaran_20dc)
-    pcm.percentage_tl_40hc = ratio(total_tlss_40hc, pcm.total_bongkaran_40hc)
-    pcm.percentage_realisasi_20dc = pcm.percentage_tl_20dc
-    pcm.percentage_realisasi_40hc = pcm.percentage_tl_40hc
-
-    # Compute and save costs
-    _compute_and_save_voyage_cost(cm)
+    record_movement_change(cm, before)
+
+    # Persentase & estimasi cost dihitung oleh job background (lihat derived_values.py)
+    job = enqueue_derived_refresh(cm)
+    enqueue_prediction_refresh(cm)
     db.session.commit()
 
     return jsonify({
@@ -701,23 +444,9 @@ def create_realisasi_shipside():
             "updated_at": cm.updated_at.isoformat() if cm.updated_at else None
         },
         "percentage_container_movement": {
-            "cm_id": pcm.cm_id,
-            "acc_tlss_empty_20dc": pcm.acc_tlss_empty_20dc,
-            "acc_tlss_full_20dc": pcm.acc_tlss_full_20dc,
-            "acc_tlss_empty_40hc": pcm.acc_tlss_empty_40hc,
-            "acc_tlss_full_40hc": pcm.acc_tlss_full_40hc,
-            "acc_turun_cy_empty_20dc": pcm.acc_turun_cy_empty_20dc,
-            "acc_turun_cy_full_20dc": pcm.acc_turun_cy_full_20dc,
-            "acc_turun_cy_empty_40hc": pcm.acc_turun_cy_empty_40hc,
-            "acc_turun_cy_full_40hc": pcm.acc_turun_cy_full_40hc,
-            "total_tlss_20dc": pcm.total_tlss_20dc,
-            "total_tlss_40hc": pcm.total_tlss_40hc,
-            "total_turun_20dc": pcm.total_turun_20dc,
-            "total_turun_40hc": pcm.total_turun_40hc,
-            "percentage_tl_20dc": pcm.percentage_tl_20dc,
-            "percentage_tl_40hc": pcm.percentage_tl_40hc,
-            "percentage_realisasi_20dc": pcm.percentage_realisasi_20dc,
-            "percentage_realisasi_40hc": pcm.percentage_realisasi_40hc
+            "cm_id": cm.id,
+            "status": "stale",
+            "job_id": job.id
         }
     }), 200
 
@@ -747,20 +476,23 @@ def add_obstacles():
 
 @cm_bp.route('/summary-by-port', methods=['GET'])
 @jwt_required()
+@read_replica
+@cached_response('port_movement_totals', 'ports')
 def get_summary_by_port():
     """
     Endpoint untuk mendapatkan rekap total pengajuan, acc pengajuan,
     dan realisasi per lokasi sandar (port).
     """
+    # Dibaca dari rekap port_movement_totals (satu baris per port), bukan GROUP BY semua CM
     summary_data = db.session.query(
         Port.id.label('port_id'),
         Port.name.label('port_name'),
-        func.sum(ContainerMovement.teus_pengajuan).label('total_pengajuan'),
-        func.sum(ContainerMovement.teus_pengajuan).label('acc_pengajuan'),
-        func.sum(ContainerMovement.teus_realisasi).label('total_realisasi')
-    ).join(Voyage, Voyage.id == ContainerMovement.voyage_id)\
-     .join(Port, Voyage.port_id == Port.id)\
-     .group_by(Port.id, Port.name)\
+        PortMovementTotal.teus_pengajuan.label('total_pengajuan'),
+        PortMovementTotal.teus_pengajuan.label('acc_pengajuan'),
+        PortMovementTotal.teus_realisasi.label('total_realisasi')
+    ).join(Port, PortMovementTotal.port_id == Port.id)\
+     .filter(PortMovementTotal.period == PERIOD_ALL, PortMovementTotal.movements > 0)\
+     .order_by(Port.id)\
      .all()
 
     result = [
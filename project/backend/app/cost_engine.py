@@ -0,0 +1,280 @@
+import time
+from datetime import datetime
+
+import click
+import numpy as np
+from flask.cli import with_appcontext
+from sqlalchemy import insert, update
+
+from . import db
+from .jobs import job_handler
+from .models import ContainerMovement, CostRate, Voyage, VoyageCostEstimation
+
+# Kategori container: (suffix field bongkaran/pengajuan/acc, suffix realisasi/shipside, suffix tarif)
+CATEGORIES = (
+    ('empty_20dc', 'mxd_20dc', '20mt'),
+    ('empty_40hc', 'mxd_40hc', '40mt'),
+    ('full_20dc', 'fxd_20dc', '20fl'),
+    ('full_40hc', 'fxd_40hc', '40fl'),
+)
+# Urutan hitungan per kategori pada array counts[..., 6]
+COUNT_PREFIXES = ('bongkaran', 'pengajuan', 'acc_pengajuan', 'realisasi', 'shipside_yes', 'shipside_no')
+# Urutan tarif per kategori pada array rates[..., 5]
+RATE_PREFIXES = ('tl', 'tdk_tl', 'shipside_yes', 'shipside_no', 'turun_cy')
+
+COUNT_COLUMNS = tuple(
+    f"{prefix}_{cm_suffix if i < 3 else real_suffix}"
+    for cm_suffix, real_suffix, _ in CATEGORIES
+    for i, prefix in enumerate(COUNT_PREFIXES)
+)
+RATE_COLUMNS = tuple(
+    f"{prefix}_{rate_suffix}"
+    for _, _, rate_suffix in CATEGORIES
+    for prefix in RATE_PREFIXES
+)
+
+
+class RateMatrix:
+    """
+    Tabel CostRate sebagai matriks (port x 20) float, kolom urut RATE_COLUMNS.
+    Satu baris per port (CostRate dengan id terkecil); port tanpa tarif memakai baris nol,
+    sama seperti perhitungan lama yang menganggap tarif kosong = 0.
+    """
+
+    def __init__(self, port_ids, matrix):
+        self.index = {port_id: i for i, port_id in enumerate(port_ids)}
+        # Baris terakhir = nol, untuk port yang tidak punya CostRate
+        self.matrix = np.vstack([matrix.reshape(len(port_ids), len(RATE_COLUMNS)),
+                                 np.zeros((1, len(RATE_COLUMNS)))])
+
+    @classmethod
+    def load(cls, port_ids=None):
+        """Satu query kolom tarif untuk port tertentu (None = semua port)."""
+        query = db.session.query(CostRate.port_id, *[getattr(CostRate, col) for col in RATE_COLUMNS])\
+            .order_by(CostRate.port_id, CostRate.id)
+        if port_ids is not None:
+            port_ids = {pid for pid in port_ids if pid is not None}
+            if not port_ids:
+                return cls([], np.zeros((0, len(RATE_COLUMNS))))
+            query = query.filter(CostRate.port_id.in_(port_ids))
+
+        rows = {}
+        for port_id, *values in query:
+            rows.setdefault(port_id, values)
+        matrix = np.array(
+            [[float(v or 0) for v in values] for values in rows.values()], dtype=np.float64
+        ).reshape(len(rows), len(RATE_COLUMNS))
+        return cls(list(rows), matrix)
+
+    def has(self, port_id):
+        return port_id in self.index
+
+    def for_ports(self, port_ids):
+        """Array tarif (N, 4, 5) untuk tiap port_id (port tanpa tarif -> nol)."""
+        missing = len(self.matrix) - 1
+        rows = np.fromiter((self.index.get(pid, missing) for pid in port_ids), dtype=np.intp, count=len(port_ids))
+        return self.matrix[rows].reshape(len(port_ids), len(CATEGORIES), len(RATE_PREFIXES))
+
+
+def _count_value(value):
+    # None = belum diinput (NaN); nilai lain diperlakukan seperti int(x or 0), gagal -> 0
+    if value is None:
+        return np.nan
+    try:
+        return int(value or 0)
+    except Exception:
+        return 0
+
+
+def counts_from_values(values_list):
+    """List dict field ContainerMovement (lihat COUNT_COLUMNS) -> array counts (N, 4, 6)."""
+    counts = np.array(
+        [[_count_value(values.get(col)) for col in COUNT_COLUMNS] for values in values_list], dtype=np.float64
+    )
+    return counts.reshape(len(values_list), len(CATEGORIES), len(COUNT_PREFIXES))
+
+
+def counts_from_rows(rows):
+    """Baris hasil query kolom COUNT_COLUMNS (None = NaN) -> array counts (N, 4, 6)."""
+    counts = np.array([[np.nan if v is None else v for v in row] for row in rows], dtype=np.float64)
+    return counts.reshape(len(rows), len(CATEGORIES), len(COUNT_PREFIXES))
+
+
+def compute_costs(counts, rates):
+    """
+    Estimasi Cost 1/2 dan Final Cost untuk banyak voyage sekaligus.
+
+    counts: array (N, 4, 6) berisi hitungan (urutan COUNT_PREFIXES), NaN = belum diinput.
+    rates: array (4, 5) atau (N, 4, 5) tarif (urutan RATE_PREFIXES).
+    Mengembalikan (est1, est2, final) masing-masing array (N,) dengan NaN jika tahapnya belum ada.
+
+    Rumus per kategori:
+      Estimasi 1 = pengajuan x TL + (bongkaran - pengajuan) x Tidak TL
+      Estimasi 2 = ACC x TL + (bongkaran - ACC) x Tidak TL
+      Final      = (bongkaran - ACC) x Tidak TL + realisasi x TL + shipside yes/no x tarifnya
+                   + (ACC - realisasi - shipside) x Turun CY
+    """
+    present = ~np.isnan(counts)
+    has_pengajuan = present[:, :, 1].any(axis=1)
+    has_acc = present[:, :, 2].any(axis=1)
+    has_real = present[:, :, 3:6].any(axis=(1, 2))
+
+    c = np.maximum(np.nan_to_num(counts, nan=0.0), 0)
+    b, p, acc, real, ship_yes, ship_no = (c[:, :, i] for i in range(6))
+    tl, tdk_tl, ship_yes_rate, ship_no_rate, turun_cy_rate = (rates[..., i] for i in range(5))
+
+    not_submitted = np.maximum(b - p, 0)
+    not_tl = np.maximum(b - acc, 0)
+    turun_cy = np.maximum(acc - (real + ship_yes + ship_no), 0)
+
+    est1 = (p * tl + not_submitted * tdk_tl).sum(axis=1)
+    est2 = (acc * tl + not_tl * tdk_tl).sum(axis=1)
+    final = (
+        not_tl * tdk_tl
+        + real * tl
+        + ship_yes * ship_yes_rate
+        + ship_no * ship_no_rate
+        + turun_cy * turun_cy_rate
+    ).sum(axis=1)
+
+    return (
+        np.where(has_pengajuan, est1, np.nan),
+        np.where(has_acc, est2, np.nan),
+        np.where(has_real, final, np.nan),
+    )
+
+
+def _to_optional(value):
+    return None if np.isnan(value) else float(value)
+
+
+def estimate(values_list, port_ids, rate_matrix=None):
+    """
+    Estimasi cost untuk banyak voyage dari dict hitungan (mis. hasil prediksi pipeline).
+    Mengembalikan list (estimation_cost1, estimation_cost2, final_cost), None jika tahapnya belum ada.
+    """
+    if not values_list:
+        return []
+    if rate_matrix is None:
+        rate_matrix = RateMatrix.load(port_ids)
+    est1, est2, final = compute_costs(counts_from_values(values_list), rate_matrix.for_ports(port_ids))
+    return [
+        (_to_optional(e1), _to_optional(e2), _to_optional(f))
+        for e1, e2, f in zip(est1, est2, final)
+    ]
+
+
+def save_voyage_cost(cm):
+    """
+    Hitung dan upsert VoyageCostEstimation voyage milik `cm` (jalur per-request / job).
+    Tidak commit; pemanggil yang commit.
+    """
+    if not cm or not cm.voyage_id:
+        return
+    port_id = db.session.query(Voyage.port_id).filter(Voyage.id == cm.voyage_id).scalar()
+    if port_id is None:
+        return
+
+    counts = counts_from_rows([[getattr(cm, col) for col in COUNT_COLUMNS]])
+    est1, est2, final = compute_costs(counts, RateMatrix.load([port_id]).for_ports([port_id]))
+
+    vce = VoyageCostEstimation.query.filter_by(voyage_id=cm.voyage_id).first()
+    if not vce:
+        vce = VoyageCostEstimation(voyage_id=cm.voyage_id)
+        db.session.add(vce)
+    vce.estimation_cost1 = _to_optional(est1[0])
+    vce.estimation_cost2 = _to_optional(est2[0])
+    vce.final_cost = _to_optional(final[0])
+    vce.computed_at = datetime.now()
+    vce.status = 'fresh'
+
+
+def recompute_costs(port_ids=None, batch_size=5000, voyage_ids=None):
+    """
+    Hitung ulang VoyageCostEstimation untuk semua voyage (yang punya ContainerMovement)
+    di port tertentu (None = semua port): satu SELECT kolom hitungan, satu SELECT tarif,
+    perhitungan numpy per batch, lalu UPDATE/INSERT massal (executemany), tanpa memuat
+    objek ORM per voyage. `voyage_ids` membatasi ke voyage tertentu saja (mis. hasil
+    impor sync). Mengembalikan ringkasan termasuk rows_per_sec.
+    """
+    started = time.perf_counter()
+    rate_matrix = RateMatrix.load(port_ids)
+
+    rows_query = db.session.query(
+        ContainerMovement.voyage_id, Voyage.port_id, *[getattr(ContainerMovement, col) for col in COUNT_COLUMNS]
+    ).join(Voyage, Voyage.id == ContainerMovement.voyage_id)
+    existing_query = db.session.query(VoyageCostEstimation.id, VoyageCostEstimation.voyage_id)\
+        .join(Voyage, Voyage.id == VoyageCostEstimation.voyage_id)
+    if port_ids is not None:
+        rows_query = rows_query.filter(Voyage.port_id.in_(list(port_ids)))
+        existing_query = existing_query.filter(Voyage.port_id.in_(list(port_ids)))
+    if voyage_ids is not None:
+        rows_query = rows_query.filter(Voyage.id.in_(list(voyage_ids)))
+        existing_query = existing_query.filter(Voyage.id.in_(list(voyage_ids)))
+    rows = rows_query.order_by(ContainerMovement.voyage_id).all()
+
+    existing = {}
+    for vce_id, voyage_id in existing_query:
+        existing.setdefault(voyage_id, []).append(vce_id)
+
+    updated = inserted = 0
+    now = datetime.now()
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        counts = counts_from_rows([row[2:] for row in batch])
+        est1, est2, final = compute_costs(counts, rate_matrix.for_ports([row[1] for row in batch]))
+
+        updates, inserts = [], []
+        for i, row in enumerate(batch):
+            voyage_id = row[0]
+            values = {
+                "estimation_cost1": _to_optional(est1[i]),
+                "estimation_cost2": _to_optional(est2[i]),
+                "final_cost": _to_optional(final[i]),
+                "computed_at": now,
+                "status": "fresh",
+            }
+            if voyage_id in existing:
+                updates.extend({"id": vce_id, **values} for vce_id in existing[voyage_id])
+            else:
+                inserts.append({"voyage_id": voyage_id, **values})
+        if updates:
+            db.session.execute(update(VoyageCostEstimation), updates)
+        if inserts:
+            db.session.execute(insert(VoyageCostEstimation), inserts)
+        updated += len(updates)
+        inserted += len(inserts)
+
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+    return {
+        "port_ids": sorted(port_ids) if port_ids is not None else None,
+        "voyages": len(rows),
+        "updated": updated,
+        "inserted": inserted,
+        "seconds": round(elapsed, 4),
+        "rows_per_sec": round(len(rows) / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def mark_port_costs_stale(port_id):
+    """Tandai estimasi cost semua voyage di port sebagai 'stale' (ikut transaksi pemanggil)."""
+    voyage_ids = db.session.query(Voyage.id).filter(Voyage.port_id == port_id)
+    VoyageCostEstimation.query.filter(VoyageCostEstimation.voyage_id.in_(voyage_ids.scalar_subquery()))\
+        .update({"status": "stale"}, synchronize_session=False)
+
+
+@job_handler('cost_recompute')
+def _cost_recompute_job(payload):
+    result = recompute_costs(payload.get("port_ids"), voyage_ids=payload.get("voyage_ids"))
+    print(f"  [COST] Port {result['port_ids'] or 'semua'}: {result['voyages']} voyage dalam {result['seconds']}s ({result['rows_per_sec']} baris/detik)")
+
+
+@click.command('recompute-costs')
+@click.option('--port-id', type=int, multiple=True, help='Port yang dihitung ulang (default: semua port).')
+@with_appcontext
+def recompute_costs_command(port_id):
+    """Hitung ulang estimasi cost voyage untuk port tertentu atau semua port."""
+    result = recompute_costs(list(port_id) or None)
+    click.echo(f"Port {result['port_ids'] or 'semua'}: {result['voyages']} voyage, {result['updated']} diperbarui, "
+               f"{result['inserted']} baru, {result['seconds']}s ({result['rows_per_sec']} baris/detik)")
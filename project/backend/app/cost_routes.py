@@ -1,11 +1,36 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from .models import db, CostRate, VoyageCostEstimation
+from .cost_engine import mark_port_costs_stale, recompute_costs
+from .jobs import enqueue_job
+from .http_cache import cached_response
+from .db_routing import read_replica
 
 cost_bp = Blueprint('cost', __name__)
 
+
+def _recompute_after_rate_change(port_ids):
+    """
+    Estimasi cost voyage di port yang tarifnya berubah ditandai 'stale' lalu dihitung ulang.
+    ?recompute=async (default) lewat job background, sync langsung di request ini
+    (hasil + baris/detik dikembalikan), none untuk melewati.
+    Dipanggil sebelum commit. Mengembalikan fungsi yang dipanggil setelah commit.
+    """
+    mode = request.args.get('recompute', 'async')
+    port_ids = sorted({pid for pid in port_ids if pid})
+    if mode == 'none' or not port_ids:
+        return lambda: None
+    for pid in port_ids:
+        mark_port_costs_stale(pid)
+    if mode == 'sync':
+        return lambda: {'recompute': recompute_costs(port_ids)}
+    job = enqueue_job('cost_recompute', 'port:' + ','.join(map(str, port_ids)), {'port_ids': port_ids})
+    return lambda: {'recompute': {'status': 'queued', 'job_id': job.id, 'port_ids': port_ids}}
+
 @cost_bp.route('/cost-rates', methods=['GET'])
 @jwt_required()
+@read_replica
+@cached_response('cost_rates')
 def list_cost_rates():
     port_id = request.args.get('port_id', type=int)
     q = CostRate.query
@@ -50,8 +75,9 @@ def create_cost_rate():
             setattr(rec, key, val)
 
     db.session.add(rec)
+    after_commit = _recompute_after_rate_change([port_id])
     db.session.commit()
-    return jsonify({'msg': 'Cost rate dibuat', 'id': rec.id}), 201
+    return jsonify({'msg': 'Cost rate dibuat', 'id': rec.id, **(after_commit() or {})}), 201
 
 
 @cost_bp.route('/cost-rates/<int:rate_id>', methods=['PUT'])
@@ -59,13 +85,17 @@ def create_cost_rate():
 def update_cost_rate(rate_id):
     data = request.get_json() or {}
     rate = CostRate.query.get_or_404(rate_id)
+    # Port lama juga dihitung ulang bila tarif dipindah ke port lain
+    affected_ports = [rate.port_id]
     if 'port_id' in data:
         rate.port_id = data['port_id']
+        affected_ports.append(rate.port_id)
     for key, val in (data or {}).items():
         if hasattr(CostRate, key) and key not in ['id', 'port_id', 'created_at', 'updated_at']:
             setattr(rate, key, val)
+    after_commit = _recompute_after_rate_change(affected_ports)
     db.session.commit()
-    return jsonify({'msg': 'Cost rate diperbarui'})
+    return jsonify({'msg': 'Cost rate diperbarui', **(after_commit() or {})})
 
 
 @cost_bp.route('/cost-rates/<int:rate_id>', methods=['DELETE'])
@@ -73,8 +103,10 @@ def update_cost_rate(rate_id):
 def delete_cost_rate(rate_id):
     rate = CostRate.query.get_or_404(rate_id)
     db.session.delete(rate)
+    # Tanpa tarif, voyage di port ini dihitung dengan tarif 0 (atau CostRate lain port itu)
+    after_commit = _recompute_after_rate_change([rate.port_id])
     db.session.commit()
-    return jsonify({'msg': 'Cost rate dihapus'})
+    return jsonify({'msg': 'Cost rate dihapus', **(after_commit() or {})})
 
 
 @cost_bp.route('/cost-estimation/<int:voyage_id>', methods=['GET'])
@@ -100,5 +132,7 @@ def get_voyage_cost_estimation(voyage_id: int):
         'estimation_cost1': to_float(rec.estimation_cost1) if rec else None,
         'estimation_cost2': to_float(rec.estimation_cost2) if rec else None,
         'final_cost': to_float(rec.final_cost) if rec else None,
-        'computed_at': rec.computed_at.isoformat() if rec and rec.computed_at else None
+        'computed_at': rec.computed_at.isoformat() if rec and rec.computed_at else None,
+        # 'stale' selama job background belum menghitung ulang setelah data CM berubah
+        'status': rec.status if rec else None
     })
\ No newline at end of file
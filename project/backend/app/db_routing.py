@@ -0,0 +1,209 @@
+# Konfigurasi engine DB (pool, pre-ping, recycle, statement timeout) dan routing query baca
+# ke read replica untuk handler GET read-only, dengan fallback ke primary.
+
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+# Bind key Flask-SQLAlchemy (SQLALCHEMY_BINDS) untuk replica; tidak ada model yang memakainya,
+# jadi create_all/drop_all/migrasi tetap hanya ke primary
+REPLICA_BIND = 'replica'
+
+# Lag replica (detik) di PostgreSQL; 0 bila semua WAL yang diterima sudah di-replay (replica
+# idle tidak dianggap tertinggal), NULL bila server bukan standby
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(uri, config, statement_timeout_ms):
+    """Opsi create_engine untuk satu URL dari konfigurasi DB_* aplikasi."""
+    url = make_url(uri)
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if _is_memory_sqlite(url):
+        # SQLite in-memory memakai StaticPool (satu koneksi): opsi ukuran pool tidak berlaku
+        return options
+    options.update(
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {'connect_timeout': config['DB_CONNECT_TIMEOUT']}
+        if statement_timeout_ms:
+            # Diset sekali per koneksi saat connect, tanpa round trip tambahan per query
+            connect_args['options'] = f"-c statement_timeout={int(statement_timeout_ms)}"
+        options['connect_args'] = connect_args
+    return options
+
+
+def configure_engines(app):
+    """Isi SQLALCHEMY_ENGINE_OPTIONS (dan bind replica bila ada); panggil sebelum db.init_app."""
+    config = app.config
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        config['SQLALCHEMY_DATABASE_URI'], config, config['DB_STATEMENT_TIMEOUT_MS'],
+    )
+    replica_url = config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = {
+            'url': replica_url,
+            **engine_options(replica_url, config, config['DB_REPLICA_STATEMENT_TIMEOUT_MS']),
+        }
+
+
+class ReplicaState:
+    """
+    Status replica per proses worker. Replica dicek (SELECT 1 / lag di PostgreSQL) paling
+    sering sekali tiap `check_seconds`; di antaranya status terakhir dipakai tanpa query.
+    Replica yang tidak bisa dihubungi atau tertinggal lebih dari `max_lag` detik
+    dilewati sampai pengecekan berikutnya berhasil.
+    """
+
+    def __init__(self, engine, check_seconds=5, max_lag=30):
+        self.engine = engine
+        self.check_seconds = check_seconds
+        self.max_lag = max_lag
+        self.ok = False
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        checked_at = self.checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.check_seconds:
+            return self.ok
+        # Satu thread yang mengecek; thread lain memakai status terakhir (awal: primary)
+        if not self._lock.acquire(blocking=False):
+            return self.ok
+        try:
+            self._probe()
+        finally:
+            self._lock.release()
+        return self.ok
+
+    def _probe(self):
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    lag = connection.execute(REPLICA_LAG_SQL).scalar()
+                else:
+                    connection.execute(text('SELECT 1'))
+                    lag = None
+        except Exception as e:
+            self.mark_down(str(e).splitlines()[0])
+            return
+        lag = float(lag) if lag is not None else None
+        if lag is not None and self.max_lag and lag > self.max_lag:
+            self.ok, self.error = False, f"Replica tertinggal {lag:.1f} detik"
+        else:
+            self.ok, self.error = True, None
+        self.lag = lag
+        self.checked_at = time.monotonic()
+
+    def mark_down(self, error):
+        if self.ok or self.checked_at is None:
+            print(f"[DB] Replica tidak dipakai, fallback ke primary: {error}")
+        self.ok, self.error = False, error
+        self.checked_at = time.monotonic()
+
+    def status(self):
+        return {
+            "ok": self.ok,
+            "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+            "error": self.error,
+            "pool": self.engine.pool.status(),
+        }
+
+
+def init_replica(app, db):
+    """Daftarkan status replica (bila DATABASE_REPLICA_URL diset); panggil setelah db.init_app."""
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    with app.app_context():
+        engine = db.engines[REPLICA_BIND]
+    # init_app membuat MetaData kosong per bind; tanpa dibuang, create_all/drop_all ('__all__')
+    # ikut membuka koneksi ke replica dan gagal di app lain yang tidak punya bind ini
+    db.metadatas.pop(REPLICA_BIND, None)
+    state = ReplicaState(
+        engine,
+        check_seconds=app.config['DB_REPLICA_CHECK_SECONDS'],
+        max_lag=app.config['DB_REPLICA_MAX_LAG'],
+    )
+
+    @event.listens_for(engine, 'handle_error')
+    def _replica_error(context):
+        # Koneksi gagal/putus: request berikutnya langsung ke primary sampai replica pulih.
+        # Error query biasa (mis. statement timeout) tidak mengubah status.
+        if context.is_disconnect or context.connection is None:
+            state.mark_down(str(context.original_exception).splitlines()[0])
+
+    app.extensions['db_replica'] = state
+
+
+def replica_status():
+    """Status replica untuk /readyz, atau None bila replica tidak dikonfigurasi."""
+    state = current_app.extensions.get('db_replica')
+    if state is None:
+        return None
+    state.available()
+    return state.status()
+
+
+def _replica_engine():
+    state = current_app.extensions.get('db_replica')
+    if state is not None and state.available():
+        return state.engine
+    return None
+
+
+class RoutingSession(Session):
+    """
+    db.session yang mengirim query baca ke replica selama request ditandai read-only
+    (@read_replica / read_replica_blueprint) dan replica sehat; selain itu ke primary.
+    Flush dan INSERT/UPDATE/DELETE selalu ke primary, dan setelah session menulis, sisa
+    request tetap di primary supaya tulisan sendiri terbaca.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and g.get('db_replica'):
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['db_primary'] = True
+            elif not self.info.get('db_primary'):
+                engine = _replica_engine()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """
+    Tandai handler GET read-only: query-nya boleh dibaca dari replica (bisa sedikit
+    tertinggal dari primary). Pasang di bawah @jwt_required() dan di atas @cached_response
+    supaya versi tabel untuk ETag dibaca dari database yang sama dengan datanya.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def read_replica_blueprint(blueprint):
+    """Semua request GET/HEAD ke blueprint (yang seluruhnya read-only) dibaca dari replica."""
+    @blueprint.before_request
+    def _use_replica():
+        if request.method in ('GET', 'HEAD'):
+            g.db_replica = True
+    return blueprint
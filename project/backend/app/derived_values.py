@@ -0,0 +1,116 @@
+from . import db
+from .cost_engine import save_voyage_cost
+from .jobs import enqueue_job, job_handler
+from .models import ContainerMovement, PercentageContainerMovement, VoyageCostEstimation
+
+
+def _ratio(num, den):
+    # Pembagi aman (hasil 0 jika penyebut kosong/0), sama seperti helper ratio() di route lama
+    if den and den > 0:
+        return num / den
+    return 0
+
+
+def recompute_percentages(cm, pcm):
+    """
+    Hitung ulang semua field PercentageContainerMovement dari data mentah `cm`.
+    Tiap blok hanya dihitung bila tahap inputnya sudah diisi; hasilnya sama dengan
+    perhitungan bertahap di handler bongkaran/pengajuan/acc_pengajuan/realisasi_shipside.
+    """
+    pcm.total_bongkaran_20dc = (cm.bongkaran_empty_20dc or 0) + (cm.bongkaran_full_20dc or 0)
+    pcm.total_bongkaran_40hc = (cm.bongkaran_empty_40hc or 0) + (cm.bongkaran_full_40hc or 0)
+
+    pengajuan = (cm.pengajuan_empty_20dc, cm.pengajuan_empty_40hc, cm.pengajuan_full_20dc, cm.pengajuan_full_40hc)
+    if any(v is not None for v in pengajuan):
+        pe20, pe40, pf20, pf40 = (v or 0 for v in pengajuan)
+        pcm.bongkaran_pengajuan_empty_20dc = _ratio(pe20, cm.bongkaran_empty_20dc)
+        pcm.bongkaran_pengajuan_full_20dc = _ratio(pf20, cm.bongkaran_full_20dc)
+        pcm.bongkaran_pengajuan_empty_40hc = _ratio(pe40, cm.bongkaran_empty_40hc)
+        pcm.bongkaran_pengajuan_full_40hc = _ratio(pf40, cm.bongkaran_full_40hc)
+        pcm.total_pengajuan_20dc = pe20 + pf20
+        pcm.total_pengajuan_40hc = pe40 + pf40
+        pcm.percentage_pengajuan_20dc = _ratio(pcm.total_pengajuan_20dc, pcm.total_bongkaran_20dc)
+        pcm.percentage_pengajuan_40hc = _ratio(pcm.total_pengajuan_40hc, pcm.total_bongkaran_40hc)
+    else:
+        pcm.bongkaran_pengajuan_empty_20dc = 0
+        pcm.bongkaran_pengajuan_full_20dc = 0
+        pcm.bongkaran_pengajuan_empty_40hc = 0
+        pcm.bongkaran_pengajuan_full_40hc = 0
+        pcm.percentage_pengajuan_20dc = 0
+        pcm.percentage_pengajuan_40hc = 0
+
+    acc = (cm.acc_pengajuan_empty_20dc, cm.acc_pengajuan_empty_40hc, cm.acc_pengajuan_full_20dc, cm.acc_pengajuan_full_40hc)
+    if any(v is not None for v in acc):
+        ae20, ae40, af20, af40 = (v or 0 for v in acc)
+        pcm.pengajuan_acc_empty_20dc = _ratio(ae20, cm.pengajuan_empty_20dc)
+        pcm.pengajuan_acc_full_20dc = _ratio(af20, cm.pengajuan_full_20dc)
+        pcm.pengajuan_acc_empty_40hc = _ratio(ae40, cm.pengajuan_empty_40hc)
+        pcm.pengajuan_acc_full_40hc = _ratio(af40, cm.pengajuan_full_40hc)
+        pcm.total_acc_20dc = ae20 + af20
+        pcm.total_acc_40hc = ae40 + af40
+        pcm.percentage_acc_20dc = _ratio(pcm.total_acc_20dc, pcm.total_bongkaran_20dc)
+        pcm.percentage_acc_40hc = _ratio(pcm.total_acc_40hc, pcm.total_bongkaran_40hc)
+
+    if cm.total_realisasi_20dc is not None or cm.total_realisasi_40hc is not None:
+        def total(kind, size):
+            return sum(getattr(cm, f"{prefix}_{kind}_{size}") or 0 for prefix in ('realisasi', 'shipside_yes', 'shipside_no'))
+
+        real_empty_20 = total('mxd', '20dc')
+        real_empty_40 = total('mxd', '40hc')
+        real_full_20 = total('fxd', '20dc')
+        real_full_40 = total('fxd', '40hc')
+
+        # Turun CY per kategori (ACC - realisasi)
+        turun_empty_20 = (cm.acc_pengajuan_empty_20dc or 0) - real_empty_20
+        turun_full_20 = (cm.acc_pengajuan_full_20dc or 0) - real_full_20
+        turun_empty_40 = (cm.acc_pengajuan_empty_40hc or 0) - real_empty_40
+        turun_full_40 = (cm.acc_pengajuan_full_40hc or 0) - real_full_40
+
+        pcm.acc_tlss_empty_20dc = _ratio(real_empty_20, cm.acc_pengajuan_empty_20dc)
+        pcm.acc_tlss_full_20dc = _ratio(real_full_20, cm.acc_pengajuan_full_20dc)
+        pcm.acc_tlss_empty_40hc = _ratio(real_empty_40, cm.acc_pengajuan_empty_40hc)
+        pcm.acc_tlss_full_40hc = _ratio(real_full_40, cm.acc_pengajuan_full_40hc)
+
+        pcm.acc_turun_cy_empty_20dc = _ratio(turun_empty_20, cm.acc_pengajuan_empty_20dc)
+        pcm.acc_turun_cy_full_20dc = _ratio(turun_full_20, cm.acc_pengajuan_full_20dc)
+        pcm.acc_turun_cy_empty_40hc = _ratio(turun_empty_40, cm.acc_pengajuan_empty_40hc)
+        pcm.acc_turun_cy_full_40hc = _ratio(turun_full_40, cm.acc_pengajuan_full_40hc)
+
+        pcm.total_tlss_20dc = real_empty_20 + real_full_20
+        pcm.total_tlss_40hc = real_empty_40 + real_full_40
+        pcm.total_turun_20dc = turun_empty_20 + turun_full_20
+        pcm.total_turun_40hc = turun_empty_40 + turun_full_40
+
+        pcm.percentage_tl_20dc = _ratio(pcm.total_tlss_20dc, pcm.total_bongkaran_20dc)
+        pcm.percentage_tl_40hc = _ratio(pcm.total_tlss_40hc, pcm.total_bongkaran_40hc)
+        pcm.percentage_realisasi_20dc = pcm.percentage_tl_20dc
+        pcm.percentage_realisasi_40hc = pcm.percentage_tl_40hc
+
+    pcm.status = 'fresh'
+
+
+def enqueue_derived_refresh(cm):
+    """
+    Tandai PercentageContainerMovement dan VoyageCostEstimation milik `cm` sebagai 'stale'
+    (UPDATE langsung, tanpa SELECT) lalu antrekan job untuk menghitung ulang keduanya.
+    Dipanggil sebelum commit di handler tulis.
+    """
+    PercentageContainerMovement.query.filter_by(cm_id=cm.id)\
+        .update({"status": "stale"}, synchronize_session=False)
+    VoyageCostEstimation.query.filter_by(voyage_id=cm.voyage_id)\
+        .update({"status": "stale"}, synchronize_session=False)
+    return enqueue_job('derived_values', f"cm:{cm.id}", {"cm_id": cm.id})
+
+
+@job_handler('derived_values')
+def refresh_derived_values(payload):
+    """Job: hitung ulang persentase dan estimasi cost satu ContainerMovement."""
+    cm = db.session.get(ContainerMovement, payload["cm_id"])
+    if cm is None:
+        return
+    pcm = PercentageContainerMovement.query.filter_by(cm_id=cm.id).first()
+    if pcm is None:
+        pcm = PercentageContainerMovement(cm_id=cm.id)
+        db.session.add(pcm)
+    recompute_percentages(cm, pcm)
+    save_voyage_cost(cm)
@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from . import db
+from .read_models import CM_EXPORT
+from .ship_csv import CSV_COLUMNS, CSV_DATE_FORMAT
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+EXPORT_LAYOUTS = ('api', 'seeder')
+
+
+def export_columns(layout):
+    """
+    (nama kolom output, index kolom di CM_EXPORT) untuk layout:
+    'api' = nama field seperti daftar GET /container_movements/,
+    'seeder' = header Ship_Operation_Data_Cleaned.csv (bisa di-seed ulang).
+    """
+    index = {key: i for i, key in enumerate(CM_EXPORT.keys)}
+    if layout == 'seeder':
+        return [(header, index[field]) for header, field in CSV_COLUMNS]
+    return [(key, i) for key, i in index.items()]
+
+
+def row_batches(query, batch_size):
+    """
+    Baris hasil query per batch lewat server-side cursor (yield_per; di PostgreSQL
+    memakai stream_results), jadi memori tetap sebesar satu batch berapa pun jumlah barisnya.
+    """
+    result = db.session.execute(query.statement.execution_options(yield_per=batch_size))
+    try:
+        for rows in result.partitions():
+            yield rows
+    finally:
+        result.close()
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def ndjson_stream(batches, columns):
+    """Satu objek JSON per baris; satu chunk response per batch."""
+    names = [name for name, _ in columns]
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(names, [_json_value(row[i]) for _, i in columns])), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def csv_stream(batches, columns, date_format=None):
+    """CSV dengan header; tanggal ISO, atau `date_format` (strftime) bila diberikan."""
+    def text(value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return value.strftime(date_format) if date_format else value.isoformat()
+        return value
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows([text(row[i]) for _, i in columns] for row in rows)
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """File tujuan ParquetWriter: menampung byte sampai diambil generator response."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_schema(pa, columns):
+    types = {int: pa.int64(), float: pa.float64(), datetime: pa.timestamp('us')}
+    fields = []
+    for name, i in columns:
+        column = CM_EXPORT.fields[i][1]
+        fields.append(pa.field(name, types.get(column.type.python_type, pa.string())))
+    return pa.schema(fields)
+
+
+def parquet_stream(batches, columns):
+    """
+    Parquet ditulis per row group (satu per batch) dan tiap row group langsung dikirim,
+    jadi file tidak pernah utuh di memori. Butuh paket `pyarrow` (cek dengan require_pyarrow).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+    try:
+        for rows in batches:
+            arrays = [pa.array([row[i] for row in rows], type=field.type) for (_, i), field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Format parquet membutuhkan paket 'pyarrow' (pip install pyarrow).") from e
+
+
+def export_stream(fmt, layout, query, batch_size):
+    """Generator chunk response untuk format dan layout ekspor."""
+    columns = export_columns(layout)
+    batches = row_batches(query, batch_size)
+    if fmt == 'ndjson':
+        return ndjson_stream(batches, columns)
+    if fmt == 'csv':
+        return csv_stream(batches, columns, CSV_DATE_FORMAT if layout == 'seeder' else None)
+    return parquet_stream(batches, columns)
@@ -0,0 +1,55 @@
+import time
+
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+
+from . import db
+from .db_routing import replica_status
+from .prediction_routes import model_registry
+
+health_bp = Blueprint('health_bp', __name__)
+
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: proses worker hidup dan bisa melayani request (tanpa cek DB/model)."""
+    return jsonify({"status": "ok"}), 200
+
+
+def _check_database():
+    started = time.perf_counter()
+    try:
+        # Lewat pool engine (bukan session request) supaya yang dicek memang koneksi pool
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    except Exception as e:
+        return {"ok": False, "error": str(e).splitlines()[0]}
+    return {
+        "ok": True,
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": db.engine.pool.status(),
+    }
+
+
+def _check_models():
+    if model_registry.is_warm():
+        return {"ok": True}
+    # Belum warm (mis. MODEL_PRELOAD=0 dengan lazy load): mulai warmup di latar belakang,
+    # probe berikutnya ready setelah semua model termuat
+    model_registry.start_background_warmup()
+    return {"ok": False, "error": "Model belum selesai dimuat"}
+
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness: 200 hanya jika koneksi dari pool DB berhasil (SELECT 1) dan semua model ML
+    sudah di memori; selain itu 503 supaya load balancer belum mengirim traffic.
+    """
+    checks = {"database": _check_database(), "models": _check_models()}
+    ready = all(check["ok"] for check in checks.values())
+    # Replica tidak menentukan readiness: bila tidak sehat, query baca fallback ke primary
+    replica = replica_status()
+    if replica is not None:
+        checks["replica"] = replica
+    return jsonify({"status": "ready" if ready else "not_ready", "checks": checks}), 200 if ready else 503
@@ -0,0 +1,198 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, inspect as sa_inspect
+
+from . import db
+from .models import TableVersion
+
+# Tabel yang dibaca endpoint ber-cache (diisi oleh @cached_response); hanya versi
+# tabel-tabel ini yang dinaikkan saat commit
+TRACKED_TABLES = set()
+
+_PENDING = 'http_cache_changed_tables'
+
+
+class ResponseCache:
+    """
+    Cache body response per path (LRU), dibatasi jumlah entri dan total byte.
+    Tiap entri menyimpan ETag saat dibuat; entri dengan ETag lama tidak pernah dipakai
+    lagi dan tertimpa saat path yang sama diminta dengan versi tabel yang baru.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, etag):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != etag:
+                return None
+            self._items.move_to_end(key)
+            return item
+
+    def put(self, key, etag, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old:
+                self.size -= len(old[1])
+            self._items[key] = (etag, body, mimetype)
+            self.size += len(body)
+            while len(self._items) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted, _) = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+def init_http_cache(app):
+    app.extensions['http_cache'] = ResponseCache(
+        max_entries=app.config['HTTP_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['HTTP_CACHE_MAX_BYTES'],
+    )
+
+
+# --- Versi tabel: dinaikkan di transaksi yang sama dengan perubahan datanya ---
+
+def _mark_changed(session, tables):
+    tables = TRACKED_TABLES.intersection(tables)
+    if tables:
+        session.info.setdefault(_PENDING, set()).update(tables)
+
+
+def _collect_flushed(session, flush_context):
+    objects = (*session.new, *session.dirty, *session.deleted)
+    _mark_changed(session, {sa_inspect(obj).mapper.local_table.name for obj in objects})
+
+
+def _collect_executed(orm_execute_state):
+    # INSERT/UPDATE/DELETE lewat session.execute (bulk, upsert rekap) tidak lewat flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None):
+            _mark_changed(orm_execute_state.session, {table.name})
+
+
+def _bump_versions(session):
+    # Flush dulu supaya perubahan yang masih pending ikut terkumpul sebelum commit
+    session.flush()
+    tables = session.info.pop(_PENDING, None)
+    if not tables:
+        return
+    table = TableVersion.__table__
+    now = datetime.now()
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    # Urutan tetap supaya transaksi paralel mengunci baris dalam urutan yang sama
+    for name in sorted(tables):
+        if dialect_insert is not None:
+            stmt = dialect_insert(table).values(name=name, version=1, updated_at=now)
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=['name'],
+                set_={'version': table.c.version + 1, 'updated_at': now},
+            ))
+            continue
+        updated = session.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1, updated_at=now)
+        ).rowcount
+        if not updated:
+            session.execute(table.insert().values(name=name, version=1, updated_at=now))
+
+
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
+
+
+event.listen(db.session, 'after_flush', _collect_flushed)
+event.listen(db.session, 'do_orm_execute', _collect_executed)
+event.listen(db.session, 'before_commit', _bump_versions)
+event.listen(db.session, 'after_rollback', _discard_pending)
+
+
+def current_versions(tables):
+    """{tabel: (version, updated_at)}; tabel yang belum pernah berubah -> (0, None)."""
+    rows = (
+        db.session.query(TableVersion.name, TableVersion.version, TableVersion.updated_at)
+        .filter(TableVersion.name.in_(tables))
+        .all()
+    )
+    versions = dict.fromkeys(tables, (0, None))
+    versions.update({name: (version, updated_at) for name, version, updated_at in rows})
+    return versions
+
+
+def _etag(path, versions):
+    raw = path + '|' + ','.join(f"{name}:{versions[name][0]}" for name in sorted(versions))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cached_response(*tables):
+    """
+    Cache HTTP untuk endpoint GET yang hanya membaca `tables`. Pasang di bawah
+    @jwt_required() supaya autentikasi tetap dicek lebih dulu.
+
+    ETag (weak) = hash path + versi tiap tabel, dibaca dengan satu query kecil ke
+    table_versions. If-None-Match cocok -> 304 tanpa menjalankan view; body yang sudah
+    diserialisasi untuk ETag yang sama diambil dari ResponseCache. Last-Modified =
+    perubahan terakhir tabel-tabel tersebut (If-None-Match lebih diutamakan).
+    """
+    TRACKED_TABLES.update(tables)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config['HTTP_CACHE_ENABLED']:
+                return view(*args, **kwargs)
+
+            versions = current_versions(tables)
+            path = request.full_path
+            etag = _etag(path, versions)
+            changed = [updated_at for _, updated_at in versions.values() if updated_at]
+            last_modified = max(changed).astimezone().replace(microsecond=0) if changed else None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(last_modified and since and last_modified <= since)
+
+            cache = current_app.extensions['http_cache']
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                cached = cache.get(path, etag)
+                if cached:
+                    response = current_app.response_class(cached[1], mimetype=cached[2])
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    cache.put(path, etag, response.get_data(), response.mimetype)
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Browser selalu revalidasi (If-None-Match), tidak dibagi antar user di proxy
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,592 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+
+import click
+import numpy as np
+import pandas as pd
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select, update
+
+from . import db
+from .jobs import enqueue_job
+from .models import (
+    ContainerMovement, ContainerMovementPrediction, PercentageContainerMovement, Port, Vessel, Voyage,
+    VoyageCostEstimation,
+)
+from .port_totals import MOVEMENT_COLUMNS, apply_deltas
+from .ship_csv import CM_CSV_COLUMNS, CSV_COLUMNS, VOYAGE_CSV_COLUMNS
+
+# Format tanggal yang dicoba berurutan, sisanya lewat parser pandas
+DATE_FORMATS = ("%d/%m/%Y %H.%M", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S")
+
+# Maksimal error per baris yang dikirim di laporan (jumlah lengkap tetap dihitung)
+MAX_REPORTED_ERRORS = 200
+
+# Kunci baris untuk mode sync; satu kunci bisa muncul lebih dari sekali di file
+# (voyage sama, date_berth beda), jadi dicocokkan juga urutan kemunculannya
+SYNC_KEY = ('vessel_id', 'port_id', 'voyage_no', 'voyage_yr')
+
+# Di atas jumlah ini job cost dikirim per port saja, bukan daftar voyage_id (batas parameter IN)
+MAX_COST_VOYAGE_IDS = 10000
+
+
+class ImportFileError(ValueError):
+    """File tidak bisa diimpor sama sekali (mis. kolom wajib tidak ada)."""
+
+
+def read_csv(source):
+    """CSV (path atau file object) -> DataFrame string apa adanya, tanpa konversi NaN."""
+    return pd.read_csv(source, dtype=str, keep_default_na=False, encoding='utf-8')
+
+
+def _header(field):
+    return dict((f, h) for h, f in VOYAGE_CSV_COLUMNS)[field]
+
+
+def _numbers(series):
+    """
+    Kolom teks -> (angka float, mask nilai tidak valid). Kosong/tidak valid jadi 0
+    (perilaku seeder lama); mask hanya untuk nilai tidak kosong yang gagal dibaca.
+    """
+    values = pd.to_numeric(series, errors='coerce')
+    # strip() hanya untuk nilai yang gagal dibaca (kebanyakan kolom sudah bersih)
+    retry = values.isna() & (series != '')
+    invalid = np.isinf(values)
+    if retry.any():
+        text = series[retry].str.strip()
+        values[retry] = pd.to_numeric(text, errors='coerce')
+        invalid |= (values.isna() & retry & (series.str.strip() != ''))
+    return values.where(~invalid).fillna(0.0).to_numpy(dtype=np.float64), invalid.to_numpy()
+
+
+def _dates(series):
+    text = series.str.strip()
+    parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna() & (text != '')
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+    rest = parsed.isna() & (text != '')
+    if rest.any():
+        parsed[rest] = [pd.to_datetime(value, errors='coerce') for value in text[rest]]
+    return parsed
+
+
+def parse_frame(frame, first_row=2):
+    """
+    Validasi + konversi DataFrame layout Ship_Operation_Data_Cleaned.csv secara vektor.
+    Mengembalikan (parsed, errors, warnings):
+    - parsed: DataFrame baris valid (kolom = field model, plus `row` = nomor baris file)
+    - errors: [{row, column, msg}] untuk baris yang dilewati
+    - warnings: {header: jumlah} nilai angka tidak valid yang dianggap 0
+    """
+    required = [h for h, _ in VOYAGE_CSV_COLUMNS] + [h for h, _, _ in CM_CSV_COLUMNS]
+    missing = [h for h in required if h not in frame.columns]
+    if missing:
+        raise ImportFileError("Kolom wajib tidak ada: " + ", ".join(repr(h) for h in missing))
+
+    rows = np.arange(first_row, first_row + len(frame))
+    parsed = pd.DataFrame({'row': rows}, index=frame.index)
+    errors = []
+    warnings = {}
+
+    def fail(mask, column, msg):
+        for row in rows[np.asarray(mask)]:
+            errors.append({"row": int(row), "column": column, "msg": msg})
+
+    for field in ('vessel_name', 'port_name'):
+        parsed[field] = frame[_header(field)].str.strip()
+        fail(parsed[field] == '', _header(field), "Tidak boleh kosong")
+    parsed['voyage_no'] = frame[_header('voyage_number')]
+    fail(parsed['voyage_no'].str.strip() == '', _header('voyage_number'), "Tidak boleh kosong")
+
+    year, invalid = _numbers(frame[_header('voyage_year')])
+    parsed['voyage_yr'] = np.trunc(year).astype(np.int64)
+    if invalid.any():
+        warnings[_header('voyage_year')] = int(invalid.sum())
+
+    parsed['date_berth'] = _dates(frame[_header('voyage_date_berth')])
+    fail(parsed['date_berth'].isna(), _header('voyage_date_berth'), "Tanggal kosong atau tidak dikenali")
+
+    for header, field, kind in CM_CSV_COLUMNS:
+        if kind == 'text':
+            parsed[field] = frame[header]
+            continue
+        values, invalid = _numbers(frame[header])
+        parsed[field] = np.trunc(values).astype(np.int64) if kind == 'int' else values
+        if invalid.any():
+            warnings[header] = int(invalid.sum())
+
+    bad_rows = {e["row"] for e in errors}
+    valid = parsed[~parsed['row'].isin(bad_rows)]
+    errors.sort(key=lambda e: e["row"])
+    return valid, errors, warnings
+
+
+def row_hashes(frame):
+    """sha1 isi mentah kolom layout CSV per baris (dasar deteksi perubahan mode sync)."""
+    columns = [frame[header].tolist() for header, _ in CSV_COLUMNS]
+    return pd.Series(
+        [hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest() for values in zip(*columns)],
+        index=frame.index,
+    )
+
+
+def _ratio(num, den):
+    # round(num / den, 4), 0.0 jika penyebut <= 0. Pembulatan lewat round() Python
+    # (np.round bisa beda di digit terakhir untuk nilai x.xxxx5)
+    den = np.asarray(den, dtype=np.float64)
+    quotient = np.asarray(num, dtype=np.float64) / np.where(den > 0, den, 1)
+    return np.array([round(value, 4) if ok else 0.0 for value, ok in zip(quotient.tolist(), (den > 0).tolist())])
+
+
+def percentage_rows(cm):
+    """Kolom PercentageContainerMovement untuk semua baris sekaligus (total & persentase seed)."""
+    total_bongkaran_20dc = cm['bongkaran_empty_20dc'] + cm['bongkaran_full_20dc']
+    total_bongkaran_40hc = cm['bongkaran_empty_40hc'] + cm['bongkaran_full_40hc']
+    total_pengajuan_20dc = cm['pengajuan_empty_20dc'] + cm['pengajuan_full_20dc']
+    total_pengajuan_40hc = cm['pengajuan_empty_40hc'] + cm['pengajuan_full_40hc']
+    total_acc_20dc = cm['acc_pengajuan_empty_20dc'] + cm['acc_pengajuan_full_20dc']
+    total_acc_40hc = cm['acc_pengajuan_empty_40hc'] + cm['acc_pengajuan_full_40hc']
+    total_tlss_20dc = cm['total_realisasi_20dc']
+    total_tlss_40hc = cm['total_realisasi_40hc']
+    return pd.DataFrame({
+        'total_bongkaran_20dc': total_bongkaran_20dc,
+        'total_bongkaran_40hc': total_bongkaran_40hc,
+        'total_pengajuan_20dc': total_pengajuan_20dc,
+        'total_pengajuan_40hc': total_pengajuan_40hc,
+        'total_acc_20dc': total_acc_20dc,
+        'total_acc_40hc': total_acc_40hc,
+        'total_tlss_20dc': total_tlss_20dc,
+        'total_tlss_40hc': total_tlss_40hc,
+        'percentage_pengajuan_20dc': _ratio(total_pengajuan_20dc, total_bongkaran_20dc),
+        'percentage_pengajuan_40hc': _ratio(total_pengajuan_40hc, total_bongkaran_40hc),
+        'percentage_acc_20dc': _ratio(total_acc_20dc, total_bongkaran_20dc),
+        'percentage_acc_40hc': _ratio(total_acc_40hc, total_bongkaran_40hc),
+        'percentage_tl_20dc': _ratio(total_tlss_20dc, total_bongkaran_20dc),
+        'percentage_tl_40hc': _ratio(total_tlss_40hc, total_bongkaran_40hc),
+        'percentage_realisasi_20dc': _ratio(total_tlss_20dc, total_pengajuan_20dc),
+        'percentage_realisasi_40hc': _ratio(total_tlss_40hc, total_pengajuan_40hc),
+    }, index=cm.index)
+
+
+def _records(frame):
+    """DataFrame -> list dict dengan tipe Python (int/float/datetime), siap untuk insert()."""
+    columns = []
+    for name in frame.columns:
+        series = frame[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            columns.append(list(series.array.to_pydatetime()))
+        else:
+            columns.append(series.tolist())
+    keys = list(frame.columns)
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+def insert_returning_ids(model, records, batch_size):
+    """INSERT batch (multi-VALUES) dengan RETURNING id, urut sesuai `records`."""
+    table = model.__table__
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids = []
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        ids.extend(db.session.execute(stmt, batch).scalars().all())
+    return ids
+
+
+def insert_rows(model, records, batch_size):
+    table = model.__table__
+    for start in range(0, len(records), batch_size):
+        db.session.execute(insert(table), records[start:start + batch_size])
+
+
+def resolve_names(model, names, batch_size, **defaults):
+    """
+    Nama -> id lewat dict di memori: satu SELECT untuk nama yang sudah ada, lalu satu
+    INSERT ... RETURNING untuk yang baru. Mengembalikan (mapping, jumlah baru).
+    """
+    # Urutan kemunculan pertama di file, jadi id baru sama seperti impor baris per baris
+    names = list(pd.unique(pd.Series(names)))
+    mapping = dict(db.session.execute(select(model.name, model.id).where(model.name.in_(names))).all()) \
+        if names else {}
+    new_names = [name for name in names if name not in mapping]
+    ids = insert_returning_ids(model, [{'name': name, **defaults} for name in new_names], batch_size)
+    mapping.update(zip(new_names, ids))
+    return mapping, len(new_names)
+
+
+def _movement_deltas(voyages, cms, sign=1):
+    """Kolom rekap port_movement_totals per baris (`sign`=-1 untuk nilai lama yang diganti)."""
+    return pd.DataFrame({
+        'port_id': voyages['port_id'],
+        'period': voyages['date_berth'].dt.strftime('%Y-%m'),
+        'voyages': sign,
+        'movements': sign * cms['movements'] if 'movements' in cms else sign,
+        'bongkaran_20dc': sign * (cms['bongkaran_empty_20dc'] + cms['bongkaran_full_20dc']),
+        'bongkaran_40hc': sign * (cms['bongkaran_empty_40hc'] + cms['bongkaran_full_40hc']),
+        'pengajuan_20dc': sign * (cms['pengajuan_empty_20dc'] + cms['pengajuan_full_20dc']),
+        'pengajuan_40hc': sign * (cms['pengajuan_empty_40hc'] + cms['pengajuan_full_40hc']),
+        'acc_20dc': sign * (cms['acc_pengajuan_empty_20dc'] + cms['acc_pengajuan_full_20dc']),
+        'acc_40hc': sign * (cms['acc_pengajuan_empty_40hc'] + cms['acc_pengajuan_full_40hc']),
+        'tlss_20dc': sign * cms['total_realisasi_20dc'],
+        'tlss_40hc': sign * cms['total_realisasi_40hc'],
+        'teus_pengajuan': sign * cms['teus_pengajuan'],
+        'teus_realisasi': sign * cms['teus_realisasi'],
+    }, index=voyages.index)
+
+
+def _apply_port_totals(*deltas):
+    """Jumlahkan delta per (port, bulan) lalu terapkan ke port_movement_totals dalam satu upsert massal."""
+    grouped = pd.concat(deltas).groupby(['port_id', 'period']).sum()
+    columns = ('voyages', *MOVEMENT_COLUMNS)
+    apply_deltas(
+        (int(port_id), period + '-01', {col: int(sums[col]) for col in columns})
+        for (port_id, period), sums in grouped.iterrows()
+    )
+
+
+def _insert_rows(valid, vessels, ports, batch_size):
+    """
+    Insert Voyage, ContainerMovement dan PercentageContainerMovement untuk baris `valid`
+    (sudah di-parse, kolom `source_hash` terisi). Mengembalikan (voyages, cms) dengan
+    kolom id/cm_id hasil RETURNING.
+    """
+    # created_at naik per baris supaya urutan daftar (created_at desc) tetap urutan file
+    now = datetime.now()
+    voyages = pd.DataFrame({
+        'vessel_id': valid['vessel_name'].map(vessels),
+        'port_id': valid['port_name'].map(ports),
+        'voyage_no': valid['voyage_no'],
+        'voyage_yr': valid['voyage_yr'],
+        'date_berth': valid['date_berth'],
+        'created_at': [now + timedelta(microseconds=i) for i in range(len(valid))],
+        'source_hash': valid['source_hash'],
+    }, index=valid.index)
+    voyages['id'] = insert_returning_ids(Voyage, _records(voyages), batch_size)
+
+    cm_fields = [field for _, field, _ in CM_CSV_COLUMNS]
+    cms = valid[cm_fields].copy()
+    cms.insert(0, 'voyage_id', voyages['id'])
+    cms['created_at'] = voyages['created_at']
+    cms['updated_at'] = voyages['created_at']
+    cms['id'] = insert_returning_ids(ContainerMovement, _records(cms), batch_size)
+
+    percentages = percentage_rows(cms)
+    percentages.insert(0, 'cm_id', cms['id'])
+    insert_rows(PercentageContainerMovement, _records(percentages), batch_size)
+    return voyages, cms
+
+
+class _Stages:
+    """Catat durasi tiap tahap impor (detik) untuk laporan."""
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.stages = {}
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages[name] = round(now - self.last, 4)
+        self.last = now
+
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+
+def _parse(frame, strict, first_row, stages):
+    """Parse + validasi + hash baris. Mengembalikan (valid, report); valid None = berhenti."""
+    valid, errors, warnings = parse_frame(frame, first_row=first_row)
+    valid = valid.assign(source_hash=row_hashes(frame.loc[valid.index]))
+    stages.lap('parse')
+    report = {
+        "rows": len(frame),
+        "imported": 0,
+        "skipped": len(frame) - len(valid),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "error_count": len(errors),
+        "warnings": warnings,
+        "vessels_created": 0,
+        "ports_created": 0,
+    }
+    if errors and strict:
+        report["skipped"] = len(frame)
+        report["aborted"] = True
+        return None, report
+    if valid.empty:
+        report["seconds"] = round(stages.seconds(), 4)
+        return None, report
+    return valid, report
+
+
+def _finish(report, stages, rows):
+    seconds = stages.seconds()
+    report.update({
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "stages": stages.stages,
+    })
+    return report
+
+
+def import_frame(frame, strict=False, batch_size=1000, enqueue_derived=True, first_row=2):
+    """
+    Impor DataFrame layout Ship_Operation_Data_Cleaned.csv dalam satu transaksi:
+    parsing/validasi vektor (pandas), vessel & port di-resolve lewat dict, Voyage /
+    ContainerMovement / PercentageContainerMovement di-insert per `batch_size` baris
+    dengan RETURNING id, rekap port diperbarui dengan delta.
+    Baris tidak valid dilewati dan dilaporkan; strict=True membatalkan semuanya bila ada error.
+    enqueue_derived=True mengantrekan hitung ulang cost (port terkait) dan prediksi tersimpan.
+    """
+    stages = _Stages()
+    valid, report = _parse(frame, strict, first_row, stages)
+    if valid is None:
+        return report
+
+    vessels, report["vessels_created"] = resolve_names(Vessel, valid['vessel_name'], batch_size)
+    ports, report["ports_created"] = resolve_names(Port, valid['port_name'], batch_size, code=None)
+    stages.lap('resolve')
+
+    voyages, cms = _insert_rows(valid, vessels, ports, batch_size)
+    stages.lap('insert')
+
+    _apply_port_totals(_movement_deltas(voyages, cms))
+    if enqueue_derived:
+        cm_ids = cms['id'].tolist()
+        port_ids = sorted(int(pid) for pid in voyages['port_id'].unique())
+        enqueue_job('cost_recompute', 'port:' + ','.join(map(str, port_ids)), {'port_ids': port_ids})
+        enqueue_job('prediction_refresh', f"import:{cm_ids[0]}-{cm_ids[-1]}", {'cm_ids': cm_ids})
+    db.session.commit()
+    stages.lap('totals_commit')
+
+    report["imported"] = len(voyages)
+    return _finish(report, stages, len(voyages))
+
+
+def _existing_voyages(vessel_ids, port_ids):
+    """Voyage yang sudah ada untuk vessel/port di file, plus urutan kemunculan per kunci sync."""
+    columns = ('voyage_id', *SYNC_KEY, 'old_date_berth', 'old_hash', 'cm_id')
+    rows = db.session.execute(
+        select(
+            Voyage.id, Voyage.vessel_id, Voyage.port_id, Voyage.voyage_no, Voyage.voyage_yr,
+            Voyage.date_berth, Voyage.source_hash, ContainerMovement.id,
+        )
+        .outerjoin(ContainerMovement, ContainerMovement.voyage_id == Voyage.id)
+        .where(Voyage.vessel_id.in_(vessel_ids), Voyage.port_id.in_(port_ids))
+        .order_by(Voyage.id)
+    ).all()
+    existing = pd.DataFrame(rows, columns=columns)
+    existing['voyage_yr'] = existing['voyage_yr'].astype(np.int64)
+    existing['occurrence'] = existing.groupby(list(SYNC_KEY)).cumcount()
+    return existing
+
+
+def _old_movements(cm_ids, batch_size):
+    """Nilai ContainerMovement saat ini (sebelum di-update) untuk delta rekap port."""
+    columns = [field for _, field, kind in CM_CSV_COLUMNS if kind == 'int']
+    table = ContainerMovement.__table__
+    frames = []
+    for start in range(0, len(cm_ids), batch_size):
+        batch = cm_ids[start:start + batch_size]
+        rows = db.session.execute(
+            select(table.c.id, *[table.c[col] for col in columns]).where(table.c.id.in_(batch))
+        ).all()
+        frames.append(pd.DataFrame(rows, columns=['cm_id', *columns]))
+    return pd.concat(frames).fillna(0) if frames else pd.DataFrame(columns=['cm_id', *columns])
+
+
+def _adopt_rows(adopted, batch_size):
+    """Isi source_hash voyage lama yang belum punya hash, tanpa mengubah data lainnya."""
+    voyages = pd.DataFrame({
+        'id': adopted['voyage_id'].astype(np.int64),
+        'source_hash': adopted['source_hash'],
+    })
+    for start in range(0, len(voyages), batch_size):
+        db.session.execute(update(Voyage), _records(voyages.iloc[start:start + batch_size]))
+
+
+def _update_rows(changed, batch_size):
+    """
+    Perbarui voyage yang cocok tapi berubah: Voyage (date_berth, hash), ContainerMovement
+    (update per primary key, insert bila belum ada) dan PercentageContainerMovement
+    (hapus + insert ulang). Mengembalikan (delta rekap lama, cms baru dengan kolom id).
+    """
+    has_cm = changed['cm_id'].notna()
+    old = _old_movements([int(i) for i in changed.loc[has_cm, 'cm_id']], batch_size)
+    old_cms = changed[['cm_id']].merge(old, on='cm_id', how='left').fillna(0)
+    old_cms.index = changed.index
+    old_cms['movements'] = has_cm.astype(np.int64)
+    old_voyages = pd.DataFrame({'port_id': changed['port_id'], 'date_berth': changed['old_date_berth']})
+    old_deltas = _movement_deltas(old_voyages, old_cms, sign=-1)
+
+    voyages = pd.DataFrame({
+        'id': changed['voyage_id'].astype(np.int64),
+        'date_berth': changed['date_berth'],
+        'source_hash': changed['source_hash'],
+    })
+    for start in range(0, len(voyages), batch_size):
+        db.session.execute(update(Voyage), _records(voyages.iloc[start:start + batch_size]))
+
+    now = datetime.now()
+    cm_fields = [field for _, field, _ in CM_CSV_COLUMNS]
+    cms = changed[cm_fields].copy()
+    cms.insert(0, 'voyage_id', voyages['id'])
+    cms['updated_at'] = now
+    cms['id'] = changed['cm_id']
+    updates = cms[has_cm].astype({'id': np.int64})
+    for start in range(0, len(updates), batch_size):
+        db.session.execute(update(ContainerMovement), _records(updates.iloc[start:start + batch_size]))
+    inserts = cms[~has_cm].drop(columns='id').assign(created_at=now)
+    if len(inserts):
+        cms.loc[~has_cm, 'id'] = insert_returning_ids(ContainerMovement, _records(inserts), batch_size)
+    cms['id'] = cms['id'].astype(np.int64)
+
+    cm_ids = cms['id'].tolist()
+    for start in range(0, len(cm_ids), batch_size):
+        batch = cm_ids[start:start + batch_size]
+        db.session.execute(delete(PercentageContainerMovement).where(PercentageContainerMovement.cm_id.in_(batch)))
+        # Hasil lama tidak berlaku lagi sampai job refresh/cost selesai
+        db.session.execute(
+            update(ContainerMovementPrediction).where(ContainerMovementPrediction.cm_id.in_(batch))
+            .values(status='stale')
+        )
+    voyage_ids = voyages['id'].tolist()
+    for start in range(0, len(voyage_ids), batch_size):
+        db.session.execute(
+            update(VoyageCostEstimation)
+            .where(VoyageCostEstimation.voyage_id.in_(voyage_ids[start:start + batch_size]))
+            .values(status='stale')
+        )
+    percentages = percentage_rows(cms)
+    percentages.insert(0, 'cm_id', cms['id'])
+    insert_rows(PercentageContainerMovement, _records(percentages), batch_size)
+    return old_deltas, cms.assign(voyage_id=voyages['id'])
+
+
+def sync_frame(frame, strict=False, batch_size=1000, enqueue_derived=True, first_row=2, key_counts=None):
+    """
+    Impor idempoten (upsert): tiap baris dicocokkan ke voyage yang ada lewat
+    (vessel, port, voyage_no, voyage_yr) + urutan kemunculan kunci itu di file.
+    Baris yang hash-nya sama dengan saat impor terakhir dilewati tanpa menulis apa pun,
+    baris berubah di-update di tempat, baris tanpa pasangan di-insert seperti import_frame.
+    Voyage di database yang tidak ada di file dibiarkan. Cost, persentase, prediksi dan
+    rekap port hanya dihitung ulang untuk voyage yang berubah/baru.
+    Voyage lama tanpa source_hash (dibuat sebelum sync ada, atau diedit lewat API sejak itu
+    tidak bisa dibedakan) hanya diadopsi: hash diisi dari file, datanya tidak ditimpa.
+    `key_counts` (Counter) meneruskan jumlah kemunculan kunci antar potongan file yang
+    di-sync berurutan (lihat workbook.py).
+    """
+    stages = _Stages()
+    valid, report = _parse(frame, strict, first_row, stages)
+    report.update({"updated": 0, "unchanged": 0, "adopted": 0})
+    if valid is None:
+        return report
+
+    vessels, report["vessels_created"] = resolve_names(Vessel, valid['vessel_name'], batch_size)
+    ports, report["ports_created"] = resolve_names(Port, valid['port_name'], batch_size, code=None)
+    keyed = valid.assign(
+        vessel_id=valid['vessel_name'].map(vessels),
+        port_id=valid['port_name'].map(ports),
+    )
+    keyed['occurrence'] = keyed.groupby(list(SYNC_KEY)).cumcount()
+    if key_counts is not None:
+        keys = list(zip(*(keyed[col].tolist() for col in SYNC_KEY)))
+        keyed['occurrence'] += [key_counts[key] for key in keys]
+        key_counts.update(keys)
+    existing = _existing_voyages(list(vessels.values()), list(ports.values()))
+    merged = keyed.merge(existing, on=[*SYNC_KEY, 'occurrence'], how='left')
+    merged.index = keyed.index
+    stages.lap('match')
+
+    matched = merged['voyage_id'].notna()
+    adopted = matched & merged['old_hash'].isna()
+    unchanged = matched & ~adopted & (merged['old_hash'] == merged['source_hash'])
+    changed = merged[matched & ~adopted & ~unchanged]
+    report["unchanged"] = int(unchanged.sum())
+
+    if adopted.any():
+        _adopt_rows(merged[adopted], batch_size)
+        report["adopted"] = int(adopted.sum())
+    stages.lap('adopt')
+
+    deltas, voyage_ids, cm_ids = [], [], []
+    if len(changed):
+        old_deltas, cms = _update_rows(changed, batch_size)
+        voyages = pd.DataFrame({'port_id': changed['port_id'], 'date_berth': changed['date_berth']})
+        deltas += [old_deltas, _movement_deltas(voyages, cms)]
+        voyage_ids += cms['voyage_id'].tolist()
+        cm_ids += cms['id'].tolist()
+        report["updated"] = len(changed)
+    stages.lap('update')
+
+    new_rows = valid[~matched.to_numpy()]
+    if len(new_rows):
+        voyages, cms = _insert_rows(new_rows, vessels, ports, batch_size)
+        deltas.append(_movement_deltas(voyages, cms))
+        voyage_ids += voyages['id'].tolist()
+        cm_ids += cms['id'].tolist()
+        report["imported"] = len(new_rows)
+    stages.lap('insert')
+
+    if deltas:
+        _apply_port_totals(*deltas)
+    if enqueue_derived and voyage_ids:
+        port_ids = sorted({int(pid) for pid in merged.loc[~unchanged & ~adopted, 'port_id']})
+        payload = {'port_ids': port_ids}
+        if len(voyage_ids) <= MAX_COST_VOYAGE_IDS:
+            payload['voyage_ids'] = sorted(int(vid) for vid in voyage_ids)
+        enqueue_job('cost_recompute', f"sync:{min(voyage_ids)}-{max(voyage_ids)}", payload)
+        enqueue_job('prediction_refresh', f"sync:{min(cm_ids)}-{max(cm_ids)}", {'cm_ids': sorted(int(i) for i in cm_ids)})
+    db.session.commit()
+    stages.lap('totals_commit')
+    return _finish(report, stages, report["rows"])
+
+
+def import_csv(source, sync=False, **options):
+    return (sync_frame if sync else import_frame)(read_csv(source), **options)
+
+
+@click.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--strict', is_flag=True, help='Batalkan seluruh impor jika ada baris yang tidak valid.')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Baris per INSERT.')
+@click.option('--no-derived', is_flag=True, help='Jangan antrekan hitung ulang cost dan prediksi.')
+@click.option('--sync', is_flag=True, help='Upsert: lewati baris yang tidak berubah, perbarui yang berubah.')
+@click.option('--chunk-rows', type=int, default=10000, show_default=True, help='Baris workbook .xlsx per potongan.')
+@with_appcontext
+def import_command(path, strict, batch_size, no_derived, sync, chunk_rows):
+    """
+    Impor file CSV layout Ship_Operation_Data_Cleaned.csv atau workbook operasional .xlsx
+    (dibersihkan seperti cleaning.ipynb) secara bulk, tanpa duplikat vessel/port.
+    """
+    from .workbook import import_workbook, is_workbook
+
+    options = {'sync': sync, 'strict': strict, 'batch_size': batch_size, 'enqueue_derived': not no_derived}
+    try:
+        if is_workbook(path):
+            report = import_workbook(path, chunk_rows=chunk_rows, **options)
+        else:
+            report = import_csv(path, **options)
+    except (ImportFileError, RuntimeError) as e:
+        raise click.ClickException(str(e))
+    for error in report["errors"]:
+        click.echo(f"  baris {error['row']} [{error['column']}]: {error['msg']}")
+    for header, count in report["warnings"].items():
+        click.echo(f"  peringatan: {count} nilai tidak valid di {header!r} dianggap 0")
+    if report.get("aborted"):
+        raise click.ClickException(f"Impor dibatalkan: {report['error_count']} baris tidak valid (--strict).")
+    if sync:
+        click.echo(
+            f"Sync: {report['updated']} baris diperbarui, {report['unchanged']} tidak berubah, "
+            f"{report['adopted']} diadopsi (hash diisi, data tidak ditimpa)"
+        )
+    click.echo(
+        f"Impor selesai: {report['imported']} baris baru, dilewati {report['skipped']}, "
+        f"vessel baru {report['vessels_created']}, port baru {report['ports_created']} "
+        f"dalam {report.get('seconds', 0)}s"
+    )
+    if report.get("stages"):
+        click.echo("  tahap: " + ", ".join(f"{name} {seconds}s" for name, seconds in report["stages"].items()))
+    if (report["imported"] or report.get("updated")) and not no_derived:
+        click.echo("Hitung ulang cost & prediksi diantrekan: jalankan `flask run-jobs`.")
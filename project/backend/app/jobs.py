@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, after_this_request, has_request_context
+from flask.cli import with_appcontext
+
+from . import db
+from .models import BackgroundJob
+
+# kind -> fungsi handler(payload: dict); didaftarkan lewat @job_handler
+JOB_HANDLERS = {}
+
+_executor = None
+_executor_pid = None
+
+
+def job_handler(kind):
+    """Daftarkan fungsi sebagai handler untuk job dengan `kind` tertentu."""
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue_job(kind, key, payload):
+    """
+    Tambahkan job ke tabel background_jobs di transaksi pemanggil, jadi job hanya ada bila
+    data mentahnya ikut ter-commit. Setelah response dikirim job diproses oleh thread pool
+    (JOB_MODE='async', default) atau langsung (JOB_MODE='sync').
+    `key` mengelompokkan job untuk objek yang sama (mis. "cm:12"): job antre yang lebih
+    lama dengan key sama dianggap selesai saat job yang lebih baru dijalankan.
+    """
+    job = BackgroundJob(kind=kind, key=key, payload=json.dumps(payload), status='queued')
+    db.session.add(job)
+
+    if has_request_context():
+        _dispatch_after_request(job)
+    return job
+
+
+def _dispatch_after_request(job):
+    app = current_app._get_current_object()
+
+    @after_this_request
+    def _dispatch(response):
+        # job.id baru ada setelah commit; response error berarti transaksi tidak di-commit
+        if response.status_code < 400 and job.id is not None:
+            if app.config.get('JOB_MODE', 'async') == 'sync':
+                _run_until_settled(job.id)
+            else:
+                _get_executor(app).submit(_run_in_context, app, job.id)
+        return response
+
+
+def _get_executor(app):
+    """
+    Thread pool per proses. Dibuat ulang setelah fork (gunicorn) karena thread tidak ikut
+    ter-fork; saat dibuat, job yang masih tertinggal di tabel ikut diproses, lalu antrean
+    diproses ulang tiap JOB_DRAIN_SECONDS selama proses hidup.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(
+            max_workers=int(app.config.get('JOB_WORKERS', 2)),
+            thread_name_prefix='background-job',
+        )
+        _executor_pid = os.getpid()
+        _executor.submit(_drain_in_context, app)
+        threading.Thread(target=_drain_periodically, args=(app,), name='background-job-drain', daemon=True).start()
+    return _executor
+
+
+def _drain_periodically(app):
+    interval = float(app.config.get('JOB_DRAIN_SECONDS', 60))
+    pid = os.getpid()
+    while interval > 0 and _executor_pid == pid:
+        time.sleep(interval)
+        _get_executor(app).submit(_drain_in_context, app)
+
+
+def _schedule_retry(app, job_id, attempts):
+    """Jalankan lagi job yang gagal setelah jeda yang berlipat tiap percobaan."""
+    delay = float(app.config.get('JOB_RETRY_DELAY', 5)) * 2 ** max(attempts - 1, 0)
+    timer = threading.Timer(delay, lambda: _get_executor(app).submit(_run_in_context, app, job_id))
+    timer.daemon = True
+    timer.start()
+
+
+def _run_in_context(app, job_id):
+    with app.app_context():
+        try:
+            run_job(job_id)
+        finally:
+            db.session.remove()
+
+
+def _run_until_settled(job_id):
+    """JOB_MODE='sync': ulangi langsung sampai job selesai atau JOB_MAX_ATTEMPTS habis."""
+    while run_job(job_id):
+        if db.session.get(BackgroundJob, job_id).status != 'queued':
+            break
+
+
+def _drain_in_context(app):
+    with app.app_context():
+        try:
+            drain_jobs()
+        except Exception as e:
+            db.session.rollback()
+            print(f"  [ERROR] Gagal memproses job tertunda: {e}")
+        finally:
+            db.session.remove()
+
+
+def run_job(job_id):
+    """
+    Jalankan satu job. Job di-claim dengan UPDATE bersyarat (status='queued'), jadi aman
+    bila beberapa worker/proses mencoba menjalankan job yang sama.
+    Mengembalikan True jika job dijalankan oleh pemanggil ini.
+    """
+    claimed = BackgroundJob.query.filter_by(id=job_id, status='queued').update(
+        {"status": "running", "started_at": datetime.now(), "attempts": BackgroundJob.attempts + 1},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    if not claimed:
+        return False
+
+    job = db.session.get(BackgroundJob, job_id)
+    handler = JOB_HANDLERS.get(job.kind)
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f"Handler untuk job '{job.kind}' tidak ada.")
+        handler(json.loads(job.payload or '{}'))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(BackgroundJob, job_id)
+        max_attempts = int(current_app.config.get('JOB_MAX_ATTEMPTS', 3))
+        job.status = 'queued' if job.attempts < max_attempts else 'failed'
+        job.error = str(e)
+        job.finished_at = datetime.now()
+        db.session.commit()
+        print(f"  [ERROR] Job {job_id} ({job.kind}) gagal: {e}")
+        # Percobaan masih tersisa dan proses ini punya thread pool job (mode async): coba lagi
+        # setelah jeda; di CLI/mode sync pemanggil yang mengulang
+        if job.status == 'queued' and _executor_pid == os.getpid():
+            _schedule_retry(current_app._get_current_object(), job_id, job.attempts)
+        return True
+
+    job.status = 'done'
+    job.error = None
+    job.finished_at = datetime.now()
+    # Job lebih lama untuk objek yang sama sudah tercakup oleh job ini
+    BackgroundJob.query.filter(
+        BackgroundJob.kind == job.kind,
+        BackgroundJob.key == job.key,
+        BackgroundJob.status == 'queued',
+        BackgroundJob.id < job.id,
+    ).update({"status": "done", "finished_at": job.finished_at}, synchronize_session=False)
+    db.session.commit()
+    if current_app.debug:
+        print(f"  [JOB] {job.kind} {job.key} selesai dalam {time.perf_counter() - started:.3f}s")
+    return True
+
+
+def drain_jobs(limit=None):
+    """
+    Proses semua job 'queued' (dari yang tertua), termasuk job 'running' yang macet lebih
+    lama dari JOB_STALE_SECONDS (mis. proses mati di tengah jalan).
+    Mengembalikan jumlah job yang dijalankan.
+    """
+    stale_after = int(current_app.config.get('JOB_STALE_SECONDS', 300))
+    BackgroundJob.query.filter(
+        BackgroundJob.status == 'running',
+        BackgroundJob.started_at < datetime.now() - timedelta(seconds=stale_after),
+    ).update({"status": "queued"}, synchronize_session=False)
+    db.session.commit()
+
+    query = db.session.query(BackgroundJob.id).filter_by(status='queued').order_by(BackgroundJob.id)
+    if limit:
+        query = query.limit(limit)
+    job_ids = [job_id for (job_id,) in query.all()]
+    return sum(1 for job_id in job_ids if run_job(job_id))
+
+
+def job_stats():
+    rows = db.session.query(BackgroundJob.kind, BackgroundJob.status, db.func.count(BackgroundJob.id))\
+        .group_by(BackgroundJob.kind, BackgroundJob.status).all()
+    stats = {}
+    for kind, status, count in rows:
+        stats.setdefault(kind, {})[status] = count
+    return stats
+
+
+@click.command('run-jobs')
+@with_appcontext
+def run_jobs_command():
+    """Proses job background yang masih antre (mis. setelah restart)."""
+    count = drain_jobs()
+    click.echo(f"{count} job diproses.")
+    for kind, counts in job_stats().items():
+        click.echo(f"  {kind}: {counts}")
@@ -0,0 +1,143 @@
+# Metrik Prometheus: latency per endpoint/method/status dan jumlah query + waktu DB per
+# request, diekspos di GET /metrics. Di bawah gunicorn (PROMETHEUS_MULTIPROC_DIR diset oleh
+# gunicorn.conf.py) nilai tiap worker ditulis ke file mmap dan dijumlahkan saat scrape.
+
+import os
+import threading
+import time
+
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Detik; dari lookup cache ETag (ms) sampai impor/ekspor besar (puluhan detik)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 1000)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+# Request yang tidak cocok dengan route mana pun (404) dikumpulkan dalam satu label
+UNMATCHED = '<unmatched>'
+
+# Statistik query request yang sedang berjalan di thread ini: [jumlah, detik DB] atau None
+# (job background / CLI tidak dihitung). Satu thread melayani satu request sekaligus (gthread),
+# termasuk body streaming karena teardown baru jalan setelah stream selesai.
+_local = threading.local()
+
+
+def require_prometheus_client():
+    try:
+        import prometheus_client  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Metrik membutuhkan paket 'prometheus_client' (pip install prometheus-client).") from e
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'stats', None) is not None:
+        conn.info['metrics_query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        started = conn.info.pop('metrics_query_started', None)
+        stats[0] += 1
+        if started is not None:
+            stats[1] += time.perf_counter() - started
+
+
+class RequestMetrics:
+    def __init__(self):
+        from prometheus_client import Gauge, Histogram
+
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Durasi request HTTP sampai body selesai dikirim',
+            ('endpoint', 'method', 'status'), buckets=LATENCY_BUCKETS,
+        )
+        self.queries = Histogram(
+            'http_request_db_queries', 'Jumlah query SQL per request',
+            ('endpoint', 'method'), buckets=QUERY_BUCKETS,
+        )
+        self.db_time = Histogram(
+            'http_request_db_seconds', 'Total waktu eksekusi query SQL per request',
+            ('endpoint', 'method'), buckets=DB_TIME_BUCKETS,
+        )
+        self.in_progress = Gauge(
+            'http_requests_in_progress', 'Request yang sedang diproses', multiprocess_mode='livesum',
+        )
+        # Child per kombinasi label di-cache: .labels() memvalidasi dan mengunci tiap panggilan
+        self._children = {}
+
+    def _children_for(self, endpoint, method, status):
+        key = (endpoint, method, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                self.latency.labels(endpoint, method, status),
+                self.queries.labels(endpoint, method),
+                self.db_time.labels(endpoint, method),
+            )
+        return children
+
+    def before_request(self):
+        _local.started = time.perf_counter()
+        _local.stats = [0, 0.0]
+        _local.status = '500'
+        self.in_progress.inc()
+
+    def after_request(self, response):
+        _local.status = str(response.status_code)
+        return response
+
+    def teardown_request(self, exc):
+        stats = getattr(_local, 'stats', None)
+        if stats is None:
+            return
+        _local.stats = None
+        elapsed = time.perf_counter() - _local.started
+        self.in_progress.dec()
+        status = '500' if exc is not None else _local.status
+        latency, queries, db_time = self._children_for(request.endpoint or UNMATCHED, request.method, status)
+        latency.observe(elapsed)
+        queries.observe(stats[0])
+        db_time.observe(stats[1])
+
+
+_metrics = None
+
+
+def metrics_response():
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+    from prometheus_client import multiprocess
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Gabungan semua worker (termasuk worker yang sudah berhenti), bukan hanya proses ini
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Pasang hook request + event SQLAlchemy dan route GET /metrics (bila METRICS_ENABLED)."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    try:
+        require_prometheus_client()
+    except RuntimeError as e:
+        print(f"[METRICS] Dinonaktifkan: {e}")
+        return
+
+    global _metrics
+    # Metrik terdaftar di registry global prometheus_client: satu instance per proses
+    if _metrics is None:
+        _metrics = RequestMetrics()
+    metrics = app.extensions['metrics'] = _metrics
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(metrics.before_request)
+    app.after_request(metrics.after_request)
+    app.teardown_request(metrics.teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_response, methods=['GET'])
@@ -0,0 +1,347 @@
+import gc
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+
+
+def estimate_nbytes(obj, _seen=None):
+    """
+    Perkiraan memori sebuah estimator: buffer numpy + node array pohon sklearn + objek Python.
+    tracemalloc tidak bisa dipakai karena node pohon sklearn dialokasikan lewat malloc C.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.base is None else 0
+    if type(obj).__name__ == 'Tree' and hasattr(obj, 'capacity'):
+        # sklearn.tree._tree.Tree: node array (struct per node) + value array
+        from sklearn.tree._tree import NODE_DTYPE
+        return obj.capacity * NODE_DTYPE.itemsize + obj.value.nbytes
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_nbytes(item, _seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += estimate_nbytes(vars(obj), _seen)
+    return size
+
+
+def _sha256(f):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Registry model ML yang dimuat saat pertama kali diminta (lazy).
+
+    - Jumlah model yang tinggal di memori dibatasi `max_models` (LRU); 0 = tanpa batas.
+    - `warm()` memuat semua model sekaligus, `start_background_warmup()` melakukannya di thread.
+    - `stats()` memberi waktu load dan perkiraan memori per model.
+    - load_mode 'mmap': pickle di-dump ulang sekali (tanpa kompresi) ke `mmap_dir` lalu
+      dimuat dengan joblib mmap_mode='r', sehingga array numpy dibaca dari page cache
+      yang sama oleh semua worker.
+    - `preload()` dipanggil di proses master (gunicorn preload_app) sebelum fork.
+    - `transform` (opsional) dipanggil pada tiap model setelah load, mis. untuk kompilasi.
+    - `get_versioned()` memberi model beserta SHA-256 file saat model itu dimuat; hash ini
+      (bukan hash file di disk sekarang) dipakai cache prediksi untuk membedakan versi model.
+    - `reload()` hanya berlaku di proses ini; worker gunicorn lain tetap memakai model lamanya.
+    """
+
+    def __init__(self, files, models_path=None, max_models=0, track_memory=True,
+                 load_mode='pickle', mmap_dir=None, transform=None):
+        self.files = dict(files)
+        self.transform = transform
+        self.models_path = models_path
+        self.max_models = max_models
+        self.track_memory = track_memory
+        self.load_mode = load_mode
+        self.mmap_dir = mmap_dir
+
+        self._models = OrderedDict()
+        self._missing = set()
+        self._stats = {key: self._empty_stats() for key in self.files}
+        self._lock = threading.RLock()
+        # Satu model hanya dimuat oleh satu thread pada satu waktu
+        self._load_lock = threading.Lock()
+        self._warmup_thread = None
+        self._file_hashes = {}
+        self._loaded_hashes = {}
+        self._reload_listeners = []
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "loads": 0,
+            "hits": 0,
+            "evictions": 0,
+            "load_seconds": None,
+            "resident_bytes": None,
+            "file_bytes": None,
+            "last_loaded_at": None,
+            "engine": None,
+            "error": None,
+        }
+
+    def init_app(self, app):
+        """
+        Ambil konfigurasi dari app.config: MODEL_PATH, MODEL_CACHE_SIZE, MODEL_TRACK_MEMORY,
+        MODEL_LOAD_MODE ('pickle' | 'mmap') dan MODEL_MMAP_DIR.
+        """
+        if self.models_path is None:
+            backend_path = os.path.dirname(app.root_path)
+            self.models_path = app.config.get('MODEL_PATH') or os.path.join(backend_path, 'ml_models')
+        self.max_models = int(app.config.get('MODEL_CACHE_SIZE', self.max_models) or 0)
+        self.track_memory = bool(app.config.get('MODEL_TRACK_MEMORY', self.track_memory))
+        self.load_mode = app.config.get('MODEL_LOAD_MODE', self.load_mode) or 'pickle'
+        if self.load_mode not in ('pickle', 'mmap'):
+            raise ValueError(f"MODEL_LOAD_MODE tidak dikenal: {self.load_mode}")
+        self.mmap_dir = (app.config.get('MODEL_MMAP_DIR') or self.mmap_dir
+                         or os.path.join(tempfile.gettempdir(), 'shipos-model-mmap'))
+        app.extensions['model_registry'] = self
+
+    def path_for(self, key):
+        return os.path.join(self.models_path, self.files[key])
+
+    def file_hash(self, key):
+        """SHA-256 file model (di-memo per mtime/ukuran). None jika file tidak ada."""
+        path = self.path_for(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        cached = self._file_hashes.get(key)
+        if cached and cached[0] == (st.st_mtime_ns, st.st_size):
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = _sha256(f)
+        self._file_hashes[key] = ((st.st_mtime_ns, st.st_size), digest)
+        return digest
+
+    def on_reload(self, callback):
+        """Daftarkan callback(keys) yang dipanggil setiap kali model di-reload."""
+        self._reload_listeners.append(callback)
+
+    def _mmap_path(self, key, digest):
+        """
+        Dump pickle ke format joblib tanpa kompresi (syarat mmap), dinamai menurut isi file
+        sumbernya ({key}-{sha256[:16]}.joblib) sehingga file pengganti dengan mtime lebih tua
+        (cp -p, tar, rsync, git checkout) tidak pernah memakai dump lama. Ditulis ke file
+        sementara lalu os.replace supaya worker lain tidak pernah membaca file setengah jadi.
+        Mengembalikan (path dump, digest isi yang di-dump).
+        """
+        target = os.path.join(self.mmap_dir, f"{key}-{digest[:16]}.joblib")
+        if os.path.exists(target):
+            return target, digest
+
+        os.makedirs(self.mmap_dir, exist_ok=True)
+        with open(self.path_for(key), 'rb') as f:
+            # File bisa sudah diganti lagi sejak file_hash(): pakai hash isi yang benar-benar dimuat
+            loaded_digest = _sha256(f)
+            f.seek(0)
+            model = joblib.load(f)
+        target = os.path.join(self.mmap_dir, f"{key}-{loaded_digest[:16]}.joblib")
+        fd, tmp_path = tempfile.mkstemp(dir=self.mmap_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._remove_stale_dumps(key, keep=target)
+        return target, loaded_digest
+
+    def _remove_stale_dumps(self, key, keep):
+        """Hapus dump versi lama model ini (worker yang masih me-mmap-nya tidak terganggu)."""
+        pattern = re.compile(rf"{re.escape(key)}(-[0-9a-f]{{16}})?\.joblib")
+        for name in os.listdir(self.mmap_dir):
+            path = os.path.join(self.mmap_dir, name)
+            if pattern.fullmatch(name) and path != keep:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _load(self, key):
+        full_path = self.path_for(key)
+        stats = self._stats[key]
+
+        started = time.perf_counter()
+        if self.load_mode == 'mmap':
+            digest = self.file_hash(key)
+            if digest is None:
+                raise FileNotFoundError(full_path)
+            path, digest = self._mmap_path(key, digest)
+            model = joblib.load(path, mmap_mode='r')
+        else:
+            # Hash dan load dari file handle yang sama: file yang diganti di tengah jalan
+            # tidak membuat hash dan isi model berbeda versi
+            with open(full_path, 'rb') as f:
+                digest = _sha256(f)
+                f.seek(0)
+                model = joblib.load(f)
+        if self.transform is not None:
+            model = self.transform(model)
+        elapsed = time.perf_counter() - started
+        resident = estimate_nbytes(model) if self.track_memory else None
+
+        stats["loads"] += 1
+        stats["load_seconds"] = round(elapsed, 4)
+        stats["resident_bytes"] = resident
+        stats["file_bytes"] = os.path.getsize(full_path)
+        stats["last_loaded_at"] = time.time()
+        stats["error"] = None
+        stats["engine"] = type(model).__name__
+        print(f"  [OK] Model '{key}' dimuat dalam {elapsed:.3f}s.")
+        return model, digest
+
+    def get(self, key, default=None):
+        """Ambil model; dimuat dari disk bila belum ada di memori. None jika file tidak ada."""
+        return self.get_versioned(key, default)[0]
+
+    def get_versioned(self, key, default=None):
+        """
+        (model, SHA-256 file yang dimuat menjadi model itu). Hash tetap sama sampai model
+        di-reload/di-evict, walaupun file di disk sudah diganti. (default, None) jika tidak ada.
+        """
+        if key not in self.files:
+            return default, None
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._stats[key]["hits"] += 1
+                return model, self._loaded_hashes[key]
+            if key in self._missing:
+                return default, None
+
+        with self._load_lock:
+            # Cek ulang: thread lain mungkin sudah memuat model ini selagi kita menunggu
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    return model, self._loaded_hashes[key]
+            try:
+                model, digest = self._load(key)
+            except FileNotFoundError:
+                with self._lock:
+                    self._missing.add(key)
+                    self._stats[key]["error"] = "file tidak ditemukan"
+                print(f"  [ERROR] Model '{key}' tidak ditemukan di {self.path_for(key)}")
+                return default, None
+
+            with self._lock:
+                self._models[key] = model
+                self._loaded_hashes[key] = digest
+                self._evict_if_needed()
+        return model, digest
+
+    def version(self, key):
+        """
+        Hash versi yang dipakai get() saat ini, tanpa memuat model: hash saat load bila model
+        ada di memori, selain itu hash file di disk (yang akan dimuat). None jika tidak ada.
+        """
+        if key not in self.files:
+            return None
+        with self._lock:
+            digest = self._loaded_hashes.get(key)
+        return digest if digest is not None else self.file_hash(key)
+
+    def _evict_if_needed(self):
+        while self.max_models and len(self._models) > self.max_models:
+            evicted_key, _ = self._models.popitem(last=False)
+            self._loaded_hashes.pop(evicted_key, None)
+            self._stats[evicted_key]["evictions"] += 1
+            self._stats[evicted_key]["resident_bytes"] = None
+
+    def is_loaded(self, key):
+        with self._lock:
+            return key in self._models
+
+    def loaded_keys(self):
+        with self._lock:
+            return list(self._models)
+
+    def evict(self, key):
+        with self._lock:
+            if self._models.pop(key, None) is not None:
+                self._loaded_hashes.pop(key, None)
+                self._stats[key]["evictions"] += 1
+                self._stats[key]["resident_bytes"] = None
+
+    def reload(self, key=None):
+        """Buang model dari memori (dan status 'tidak ditemukan') supaya dimuat ulang saat diminta."""
+        keys = [key] if key else list(self.files)
+        with self._lock:
+            for k in keys:
+                self._models.pop(k, None)
+                self._loaded_hashes.pop(k, None)
+                self._missing.discard(k)
+                self._file_hashes.pop(k, None)
+        for callback in self._reload_listeners:
+            callback(keys)
+
+    def warm(self, keys=None):
+        """Muat model sekarang juga. Dengan batas LRU, hanya `max_models` terakhir yang tetap tinggal."""
+        for key in keys or self.files:
+            self.get(key)
+
+    def start_background_warmup(self, keys=None):
+        if self._warmup_thread and self._warmup_thread.is_alive():
+            return self._warmup_thread
+        self._warmup_thread = threading.Thread(
+            target=self.warm, args=(keys,), name="model-warmup", daemon=True
+        )
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def preload(self):
+        """
+        Muat semua model di proses master sebelum fork (gunicorn preload_app).
+        gc.freeze() memindahkan objek yang sudah ada ke generasi permanen supaya GC di
+        worker tidak menulis ke header objek model dan halaman memorinya tetap dibagi
+        (copy-on-write) antar worker. Node pohon sklearn ada di buffer C yang tidak
+        pernah ditulis setelah load, jadi ikut terbagi.
+        """
+        self.warm()
+        gc.collect()
+        gc.freeze()
+
+    def is_warm(self):
+        """True jika semua model yang file-nya ada sudah di memori (atau batas LRU sudah penuh)."""
+        with self._lock:
+            available = [k for k in self.files if k not in self._missing]
+            loaded = sum(1 for k in available if k in self._models)
+            target = min(len(available), self.max_models) if self.max_models else len(available)
+            return loaded >= target
+
+    def stats(self):
+        with self._lock:
+            return {
+                "load_mode": self.load_mode,
+                "max_models": self.max_models,
+                "resident_models": len(self._models),
+                "models": {
+                    key: {**self._stats[key], "loaded": key in self._models, "missing": key in self._missing}
+                    for key in self.files
+                },
+            }
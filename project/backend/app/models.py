@@ -1,4 +1,5 @@
-from . import db, bcrypt
+from . import db
+from .passwords import password_hasher
 from datetime import datetime
 
 class User(db.Model):
@@ -11,10 +12,17 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """
+        Verifikasi di executor bcrypt (bisa PasswordHasherBusy). Hash dengan cost factor lama
+        langsung diganti hash baru; pemanggil yang commit.
+        """
+        ok, new_hash = password_hasher.verify(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return ok
 
 class Vessel(db.Model):
     __tablename__ = 'vessels'
@@ -48,6 +56,17 @@ class Voyage(db.Model):
     voyage_yr = db.Column(db.Integer, nullable=False)
     date_berth = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    # sha1 baris CSV sumber saat terakhir diimpor (importer.py); NULL untuk voyage dari API
+    source_hash = db.Column(db.String(40))
+
+    # Paginasi cursor GET /container_movements/ diurutkan pada (created_at, id);
+    # index pencarian bertipe (lihat search.py). Index ekspresi/trigram khusus PostgreSQL
+    # ada di migrasi e7f2b8c4d913.
+    __table_args__ = (
+        db.Index('ix_voyages_created_at_id', 'created_at', 'id'),
+        db.Index('ix_voyages_voyage_yr', 'voyage_yr'),
+        db.Index('ix_voyages_date_berth', 'date_berth'),
+    )
 
     container_movement = db.relationship(
         'ContainerMovement',
@@ -112,6 +131,11 @@ class ContainerMovement(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
+    __table_args__ = (
+        db.Index('ix_container_movements_created_at', 'created_at'),
+        db.Index('ix_container_movements_updated_at', 'updated_at'),
+    )
+
     percentage_cm = db.relationship(
         'PercentageContainerMovement',
         backref='container_movement',
@@ -120,6 +144,14 @@ class ContainerMovement(db.Model):
         cascade="all, delete-orphan"
     )
 
+    prediction = db.relationship(
+        'ContainerMovementPrediction',
+        backref='container_movement',
+        uselist=False,
+        lazy=True,
+        cascade="all, delete-orphan"
+    )
+
     def __repr__(self):
         return f'<ContainerMovement for Voyage ID: {self.voyage_id}>'
 
@@ -168,12 +200,59 @@ class PercentageContainerMovement(db.Model):
     percentage_realisasi_20dc = db.Column(db.Float, default=0)
     percentage_realisasi_40hc = db.Column(db.Float, default=0)
 
+    # 'stale' saat data mentah CM berubah dan job belum menghitung ulang, lalu 'fresh'
+    status = db.Column(db.String(20), nullable=False, default='fresh', server_default='fresh')
+
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     def __repr__(self):
         return f'<PercentageContainerMovement for CM ID: {self.cm_id}>'
 
+class ContainerMovementPrediction(db.Model):
+    """Prediksi tahap berikutnya yang disimpan per ContainerMovement (lihat stored_predictions.py)."""
+    __tablename__ = 'container_movement_predictions'
+    id = db.Column(db.Integer, primary_key=True)
+    cm_id = db.Column(db.Integer, db.ForeignKey('container_movements.id'), nullable=False, unique=True)
+
+    pengajuan_empty_20dc = db.Column(db.Integer)
+    pengajuan_empty_40hc = db.Column(db.Integer)
+    pengajuan_full_20dc = db.Column(db.Integer)
+    pengajuan_full_40hc = db.Column(db.Integer)
+
+    acc_pengajuan_empty_20dc = db.Column(db.Integer)
+    acc_pengajuan_empty_40hc = db.Column(db.Integer)
+    acc_pengajuan_full_20dc = db.Column(db.Integer)
+    acc_pengajuan_full_40hc = db.Column(db.Integer)
+
+    realisasi_mxd_20dc = db.Column(db.Integer)
+    realisasi_mxd_40hc = db.Column(db.Integer)
+    realisasi_fxd_20dc = db.Column(db.Integer)
+    realisasi_fxd_40hc = db.Column(db.Integer)
+
+    shipside_yes_mxd_20dc = db.Column(db.Integer)
+    shipside_yes_mxd_40hc = db.Column(db.Integer)
+    shipside_yes_fxd_20dc = db.Column(db.Integer)
+    shipside_yes_fxd_40hc = db.Column(db.Integer)
+    shipside_no_mxd_20dc = db.Column(db.Integer)
+    shipside_no_mxd_40hc = db.Column(db.Integer)
+    shipside_no_fxd_20dc = db.Column(db.Integer)
+    shipside_no_fxd_40hc = db.Column(db.Integer)
+
+    # 'pengajuan' | 'acc' | 'realisasi' | 'none': tahap yang diprediksi
+    stage = db.Column(db.String(20))
+    # 'stale' (menunggu refresh) | 'fresh' | 'error'
+    status = db.Column(db.String(20), nullable=False, default='stale')
+    input_hash = db.Column(db.String(64))
+    error = db.Column(db.Text)
+    computed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f'<ContainerMovementPrediction for CM ID: {self.cm_id} ({self.status})>'
+
+
 class CostRate(db.Model):
     __tablename__ = 'cost_rates'
     id = db.Column(db.Integer, primary_key=True)
@@ -213,8 +292,96 @@ class VoyageCostEstimation(db.Model):
     estimation_cost2 = db.Column(db.Numeric(14, 2), nullable=True)
     final_cost = db.Column(db.Numeric(14, 2), nullable=True)
     computed_at = db.Column(db.DateTime, default=datetime.now)
+    # 'stale' | 'fresh', sama seperti PercentageContainerMovement.status
+    status = db.Column(db.String(20), nullable=False, default='fresh', server_default='fresh')
 
     voyage = db.relationship('Voyage', backref=db.backref('cost_estimations', lazy=True, cascade='all, delete-orphan'))
 
     def __repr__(self):
-        return f'<VoyageCostEstimation voyage={self.voyage_id} final={self.final_cost}>'
\ No newline at end of file
+        return f'<VoyageCostEstimation voyage={self.voyage_id} final={self.final_cost}>'
+
+
+class BackgroundJob(db.Model):
+    """Antrian job background yang tahan restart (lihat jobs.py)."""
+    __tablename__ = 'background_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    key = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)
+    # 'queued' | 'running' | 'done' | 'failed'
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_background_jobs_status_id', 'status', 'id'),
+        db.Index('ix_background_jobs_kind_key', 'kind', 'key'),
+    )
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.kind} {self.key} ({self.status})>'
+
+
+class PortMovementTotal(db.Model):
+    """
+    Rekap hitungan container per port (period='all') dan per port x bulan date_berth
+    (period='YYYY-MM'). Diperbarui dengan delta di transaksi yang sama dengan handler tulis,
+    dibangun ulang dengan `flask rebuild-port-totals` (lihat port_totals.py).
+    """
+    __tablename__ = 'port_movement_totals'
+    id = db.Column(db.Integer, primary_key=True)
+    port_id = db.Column(db.Integer, db.ForeignKey('ports.id'), nullable=False)
+    period = db.Column(db.String(7), nullable=False)
+    voyages = db.Column(db.Integer, nullable=False, default=0)
+    movements = db.Column(db.Integer, nullable=False, default=0)
+    bongkaran_20dc = db.Column(db.BigInteger, nullable=False, default=0)
+    bongkaran_40hc = db.Column(db.BigInteger, nullable=False, default=0)
+    pengajuan_20dc = db.Column(db.BigInteger, nullable=False, default=0)
+    pengajuan_40hc = db.Column(db.BigInteger, nullable=False, default=0)
+    acc_20dc = db.Column(db.BigInteger, nullable=False, default=0)
+    acc_40hc = db.Column(db.BigInteger, nullable=False, default=0)
+    tlss_20dc = db.Column(db.BigInteger, nullable=False, default=0)
+    tlss_40hc = db.Column(db.BigInteger, nullable=False, default=0)
+    teus_pengajuan = db.Column(db.BigInteger, nullable=False, default=0)
+    teus_realisasi = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    port = db.relationship('Port', backref=db.backref('movement_totals', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.UniqueConstraint('port_id', 'period', name='uq_port_movement_totals_port_period'),
+    )
+
+    def __repr__(self):
+        return f'<PortMovementTotal port={self.port_id} {self.period}>'
+
+
+class TableVersion(db.Model):
+    """
+    Versi per tabel untuk ETag response cache: dinaikkan saat commit yang mengubah
+    tabel tersebut, dibaca semua worker (lihat http_cache.py).
+    """
+    __tablename__ = 'table_versions'
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f'<TableVersion {self.name}={self.version}>'
+
+
+class RevokedToken(db.Model):
+    """
+    JWT yang sudah di-logout (jti), disimpan sampai token aslinya kedaluwarsa dan dibaca
+    semua worker (lihat token_blocklist.py).
+    """
+    __tablename__ = 'revoked_tokens'
+    jti = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti} until {self.expires_at}>'
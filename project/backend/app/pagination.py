@@ -0,0 +1,92 @@
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values):
+    """Nilai kolom urutan baris terakhir -> string cursor (base64 url-safe JSON)."""
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    String cursor -> tuple nilai sesuai tipe `columns` (DateTime di-parse dari ISO).
+    ValueError jika cursor tidak valid.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Cursor tidak valid")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Cursor tidak valid")
+
+    parsed = []
+    for column, value in zip(columns, values):
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and column.type.python_type is int:
+            value = int(value)
+        parsed.append(value)
+    return tuple(parsed)
+
+
+def keyset_page(query, order, cursor, limit):
+    """
+    Satu halaman keyset, urutan menurun pada kolom `order` = ((kolom, label di baris), ...),
+    mis. ((Voyage.created_at, 'voyage_created_at'), (Voyage.id, 'voyage_id')).
+    Tanpa OFFSET dan tanpa COUNT: baris diambil dengan WHERE (kolom...) < (cursor...)
+    sehingga biaya tiap halaman sama berapa pun kedalamannya.
+    Mengembalikan (rows, next_cursor) dengan next_cursor None di halaman terakhir.
+    """
+    columns = [column for column, _ in order]
+    if cursor:
+        query = query.filter(tuple_(*columns) < decode_cursor(cursor, columns))
+    rows = query.order_by(None).order_by(*[c.desc() for c in columns]).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]._mapping
+    return rows, encode_cursor([last[key] for _, key in order])
+
+
+class CountCache:
+    """
+    Cache hasil COUNT(*) per kunci filter dengan TTL, untuk total perkiraan di paginasi
+    cursor (boleh tertinggal maksimal `ttl` detik). Jumlah kunci dibatasi `max_entries`.
+    """
+
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item and item[0] > now:
+                self._items.move_to_end(key)
+                return item[1]
+        value = compute()
+        with self._lock:
+            self._items[key] = (now + (self.ttl if ttl is None else ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,92 @@
+# Hash/verifikasi password bcrypt di thread pool terbatas per proses, dengan admission
+# control: bila antrean penuh, login langsung ditolak (503) alih-alih menumpuk di semua thread.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Antrean hash password penuh; klien sebaiknya mencoba lagi (Retry-After)."""
+
+
+def hash_rounds(pw_hash):
+    """Cost factor dari hash bcrypt ($2b$12$...), atau None bila formatnya tidak dikenali."""
+    try:
+        return int(pw_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    bcrypt melepas GIL selama hashing, jadi thread pool cukup (tanpa proses terpisah).
+    Maksimal `workers` hash berjalan bersamaan per proses worker dan `max_queue` menunggu;
+    request ke-(workers + max_queue + 1) langsung mendapat PasswordHasherBusy.
+    """
+
+    def __init__(self, workers=1, max_queue=8, rounds=12):
+        self.configure(workers, max_queue, rounds)
+
+    def configure(self, workers=1, max_queue=8, rounds=12):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Dibuat ulang setelah fork (gunicorn preload): thread pool tidak ikut ter-fork
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Terlalu banyak login bersamaan, coba lagi sebentar lagi")
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _hash(self, password, rounds):
+        return bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+
+    def _verify(self, pw_hash, password, rounds):
+        if not bcrypt.check_password_hash(pw_hash, password):
+            return False, None
+        # Cost factor berubah (BCRYPT_LOG_ROUNDS): hash ulang sekarang, selagi password asli ada
+        if hash_rounds(pw_hash) != rounds:
+            return True, self._hash(password, rounds)
+        return True, None
+
+    def hash(self, password):
+        return self._run(self._hash, password, self.rounds)
+
+    def verify(self, pw_hash, password):
+        """(cocok, hash baru atau None); hash baru diisi bila cost hash lama berbeda."""
+        return self._run(self._verify, pw_hash, password, self.rounds)
+
+    def stats(self):
+        return {"workers": self.workers, "max_queue": self.max_queue, "rounds": self.rounds,
+                "rejected": self.rejected}
+
+
+password_hasher = PasswordHasher()
+
+
+def init_password_hasher(app):
+    password_hasher.configure(
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_queue=app.config['PASSWORD_HASH_MAX_QUEUE'],
+        rounds=app.config['BCRYPT_LOG_ROUNDS'],
+    )
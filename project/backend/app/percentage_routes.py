@@ -1,9 +1,14 @@
-from flask import Blueprint, jsonify
+import re
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func
-from .models import db, ContainerMovement, Voyage, Port
+from .models import db, Port, PortMovementTotal
+from .port_totals import PERIOD_ALL
+from .http_cache import cached_response
+from .db_routing import read_replica_blueprint
 
 percentage_bp = Blueprint("percentage_bp", __name__)
+# Seluruhnya rekap read-only: GET dibaca dari replica bila dikonfigurasi
+read_replica_blueprint(percentage_bp)
 
 def _f(x): return float(x or 0)
 
@@ -57,59 +62,58 @@ def _payload_from_row(row):
         },
     }
 
-# base query (PORT -> Voyage -> CM; LEFT JOIN CM) 
-def _agg_query():
-    c = ContainerMovement
+# Rekap per port dari port_movement_totals (O(jumlah port), lihat port_totals.py);
+# hanya port yang punya voyage, sama seperti join PORT -> Voyage -> CM sebelumnya
+def _agg_query(period=PERIOD_ALL):
+    t = PortMovementTotal
     return (
         db.session.query(
             Port.id.label("port_id"),
             Port.name.label("port_name"),
-            # Total Bongkaran per size
-            func.sum(
-                func.coalesce(c.bongkaran_empty_20dc, 0) + func.coalesce(c.bongkaran_full_20dc, 0)
-            ).label("tb20"),
-            func.sum(
-                func.coalesce(c.bongkaran_empty_40hc, 0) + func.coalesce(c.bongkaran_full_40hc, 0)
-            ).label("tb40"),
-            # Total Pengajuan per size
-            func.sum(
-                func.coalesce(c.pengajuan_empty_20dc, 0) + func.coalesce(c.pengajuan_full_20dc, 0)
-            ).label("tp20"),
-            func.sum(
-                func.coalesce(c.pengajuan_empty_40hc, 0) + func.coalesce(c.pengajuan_full_40hc, 0)
-            ).label("tp40"),
-            # Total ACC per size
-            func.sum(
-                func.coalesce(c.acc_pengajuan_empty_20dc, 0) + func.coalesce(c.acc_pengajuan_full_20dc, 0)
-            ).label("ta20"),
-            func.sum(
-                func.coalesce(c.acc_pengajuan_empty_40hc, 0) + func.coalesce(c.acc_pengajuan_full_40hc, 0)
-            ).label("ta40"),
-            # Total TL+SS (di CM sudah disimpan sbg total_realisasi_*)
-            func.sum(func.coalesce(c.total_realisasi_20dc, 0)).label("tl20"),
-            func.sum(func.coalesce(c.total_realisasi_40hc, 0)).label("tl40"),
+            t.bongkaran_20dc.label("tb20"),
+            t.bongkaran_40hc.label("tb40"),
+            t.pengajuan_20dc.label("tp20"),
+            t.pengajuan_40hc.label("tp40"),
+            t.acc_20dc.label("ta20"),
+            t.acc_40hc.label("ta40"),
+            t.tlss_20dc.label("tl20"),
+            t.tlss_40hc.label("tl40"),
         )
-        .select_from(Port)
-        .join(Voyage, Voyage.port_id == Port.id)    # INNER ke voyage
-        .outerjoin(c, c.voyage_id == Voyage.id) # LEFT ke CM (agar port dgn CM belum lengkap tetap muncul)
-        .group_by(Port.id, Port.name)
+        .select_from(t)
+        .join(Port, Port.id == t.port_id)
+        .filter(t.period == period, t.voyages > 0)
         .order_by(Port.name.asc())
     )
 
+def _period_arg():
+    # ?period=YYYY-MM untuk rekap bulan date_berth tertentu; default semua data
+    period = request.args.get("period") or PERIOD_ALL
+    if period != PERIOD_ALL and not re.fullmatch(r"\d{4}-\d{2}", period):
+        return None
+    return period
+
 @percentage_bp.get("/ping")
 def ping():
     return jsonify({"ok": True, "service": "percentages"})
 
 @percentage_bp.get("/summary-by-port")
 @jwt_required()
+@cached_response('port_movement_totals', 'ports')
 def summary_by_port():
-    rows = _agg_query().all()
+    period = _period_arg()
+    if period is None:
+        return jsonify({"error": "Format period harus YYYY-MM"}), 400
+    rows = _agg_query(period).all()
     return jsonify([_payload_from_row(r) for r in rows]), 200
 
 @percentage_bp.get("/by-port/<int:port_id>")
 @jwt_required()
+@cached_response('port_movement_totals', 'ports')
 def by_port(port_id: int):
-    row = _agg_query().filter(Port.id == port_id).first()
+    period = _period_arg()
+    if period is None:
+        return jsonify({"error": "Format period harus YYYY-MM"}), 400
+    row = _agg_query(period).filter(Port.id == port_id).first()
     if row:
         return jsonify(_payload_from_row(row)), 200
     # fallback: port ada tapi belum ada voyage/CM -> kembalikan nol supaya FE tidak error
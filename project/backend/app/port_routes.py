@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
+from .http_cache import cached_response
+from .db_routing import read_replica
 from .models import CostRate, db, Port 
+from .read_models import PORT_LIST
 
 port_bp = Blueprint('port_bp', __name__)
 
@@ -39,13 +42,10 @@ def create_port():
 
 @port_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
+@cached_response('ports')
 def get_all_ports():
-    ports = Port.query.order_by(Port.name).all()
-    ports_list = [
-        {"id": port.id, "name": port.name, "code": port.code} 
-        for port in ports
-    ]
-    return jsonify(ports_list), 200
+    return jsonify(PORT_LIST.all()), 200
 
 @port_bp.route('/<int:port_id>', methods=['GET'])
 @jwt_required()
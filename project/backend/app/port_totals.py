@@ -0,0 +1,230 @@
+import time
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, literal
+
+from . import db
+from .models import ContainerMovement, PortMovementTotal, Voyage
+
+PERIOD_ALL = 'all'
+
+# Kolom rekap yang berasal dari ContainerMovement (di luar hitungan voyages)
+MOVEMENT_COLUMNS = (
+    'movements',
+    'bongkaran_20dc', 'bongkaran_40hc',
+    'pengajuan_20dc', 'pengajuan_40hc',
+    'acc_20dc', 'acc_40hc',
+    'tlss_20dc', 'tlss_40hc',
+    'teus_pengajuan', 'teus_realisasi',
+)
+TOTAL_COLUMNS = ('voyages',) + MOVEMENT_COLUMNS
+
+
+def period_for(date_berth):
+    # date_berth bisa masih string ISO dari request (belum dibaca ulang dari DB)
+    if isinstance(date_berth, str):
+        try:
+            date_berth = datetime.fromisoformat(date_berth)
+        except ValueError:
+            return None
+    return date_berth.strftime('%Y-%m') if date_berth else None
+
+
+def movement_totals(cm):
+    """Kontribusi satu ContainerMovement ke rekap port (semua 0 jika cm None)."""
+    if cm is None:
+        return dict.fromkeys(MOVEMENT_COLUMNS, 0)
+
+    def v(name):
+        return getattr(cm, name) or 0
+
+    return {
+        'movements': 1,
+        'bongkaran_20dc': v('bongkaran_empty_20dc') + v('bongkaran_full_20dc'),
+        'bongkaran_40hc': v('bongkaran_empty_40hc') + v('bongkaran_full_40hc'),
+        'pengajuan_20dc': v('pengajuan_empty_20dc') + v('pengajuan_full_20dc'),
+        'pengajuan_40hc': v('pengajuan_empty_40hc') + v('pengajuan_full_40hc'),
+        'acc_20dc': v('acc_pengajuan_empty_20dc') + v('acc_pengajuan_full_20dc'),
+        'acc_40hc': v('acc_pengajuan_empty_40hc') + v('acc_pengajuan_full_40hc'),
+        # TL+SS sudah disimpan di CM sebagai total_realisasi_*
+        'tlss_20dc': v('total_realisasi_20dc'),
+        'tlss_40hc': v('total_realisasi_40hc'),
+        'teus_pengajuan': v('teus_pengajuan'),
+        'teus_realisasi': v('teus_realisasi'),
+    }
+
+
+def _dialect_insert():
+    """insert() dengan ON CONFLICT untuk dialect aktif, atau None (fallback UPDATE lalu INSERT)."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+    return dialect_insert
+
+
+def _upsert_delta(port_id, period, delta):
+    """
+    Tambahkan `delta` ke baris rekap (port_id, period) dalam satu statement
+    (INSERT ... ON CONFLICT DO UPDATE col = col + excluded.col), aman untuk penulis paralel.
+    """
+    table = PortMovementTotal.__table__
+    now = datetime.now()
+    values = {'port_id': port_id, 'period': period, **dict.fromkeys(TOTAL_COLUMNS, 0), **delta, 'updated_at': now}
+    dialect_insert = _dialect_insert()
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['port_id', 'period'],
+            set_={**{col: table.c[col] + stmt.excluded[col] for col in delta}, 'updated_at': now},
+        )
+        db.session.execute(stmt)
+        return
+
+    updated = db.session.execute(
+        table.update()
+        .where(table.c.port_id == port_id, table.c.period == period)
+        .values({**{col: table.c[col] + value for col, value in delta.items()}, 'updated_at': now})
+    ).rowcount
+    if not updated:
+        db.session.execute(insert(table).values(**values))
+
+
+def apply_delta(port_id, date_berth, delta):
+    """Terapkan delta ke rekap port (period 'all') dan bulan date_berth-nya."""
+    delta = {col: value for col, value in delta.items() if value}
+    if not delta or port_id is None:
+        return
+    _upsert_delta(port_id, PERIOD_ALL, delta)
+    period = period_for(date_berth)
+    if period:
+        _upsert_delta(port_id, period, delta)
+
+
+def apply_deltas(deltas):
+    """
+    Versi massal apply_delta untuk impor: [(port_id, date_berth, delta)] dijumlahkan per
+    (port, period) di memori lalu di-upsert dengan satu executemany, urut menurut kunci
+    supaya transaksi paralel mengunci baris dalam urutan yang sama.
+    """
+    merged = {}
+    for port_id, date_berth, delta in deltas:
+        if port_id is None:
+            continue
+        for period in (PERIOD_ALL, period_for(date_berth)):
+            if not period:
+                continue
+            totals = merged.setdefault((port_id, period), dict.fromkeys(TOTAL_COLUMNS, 0))
+            for col, value in delta.items():
+                totals[col] += value
+
+    now = datetime.now()
+    rows = [
+        {'port_id': port_id, 'period': period, **totals, 'updated_at': now}
+        for (port_id, period), totals in sorted(merged.items())
+        if any(totals.values())
+    ]
+    if not rows:
+        return
+    dialect_insert = _dialect_insert()
+    if dialect_insert is None:
+        for row in rows:
+            _upsert_delta(row['port_id'], row['period'], {col: row[col] for col in TOTAL_COLUMNS if row[col]})
+        return
+    table = PortMovementTotal.__table__
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['port_id', 'period'],
+        set_={**{col: table.c[col] + stmt.excluded[col] for col in TOTAL_COLUMNS}, 'updated_at': stmt.excluded.updated_at},
+    )
+    db.session.execute(stmt, rows)
+
+
+def record_movement_change(cm, before):
+    """
+    Dipanggil handler tulis sebelum commit: `before` = movement_totals() sebelum perubahan
+    (None untuk ContainerMovement baru). Hanya selisihnya yang ditambahkan ke rekap.
+    """
+    after = movement_totals(cm)
+    before = before or movement_totals(None)
+    delta = {col: after[col] - before[col] for col in MOVEMENT_COLUMNS}
+    voyage = db.session.query(Voyage.port_id, Voyage.date_berth).filter(Voyage.id == cm.voyage_id).first()
+    if voyage:
+        apply_delta(voyage.port_id, voyage.date_berth, delta)
+
+
+def record_voyage_added(voyage):
+    apply_delta(voyage.port_id, voyage.date_berth, {'voyages': 1})
+
+
+def _month_expr(column):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
+
+
+def movement_sums():
+    """Ekspresi SUM per kolom rekap ContainerMovement (dipakai juga oleh analytics_routes)."""
+    c = ContainerMovement
+    coalesce = func.coalesce
+    return {
+        'movements': func.count(c.id),
+        'bongkaran_20dc': func.sum(coalesce(c.bongkaran_empty_20dc, 0) + coalesce(c.bongkaran_full_20dc, 0)),
+        'bongkaran_40hc': func.sum(coalesce(c.bongkaran_empty_40hc, 0) + coalesce(c.bongkaran_full_40hc, 0)),
+        'pengajuan_20dc': func.sum(coalesce(c.pengajuan_empty_20dc, 0) + coalesce(c.pengajuan_full_20dc, 0)),
+        'pengajuan_40hc': func.sum(coalesce(c.pengajuan_empty_40hc, 0) + coalesce(c.pengajuan_full_40hc, 0)),
+        'acc_20dc': func.sum(coalesce(c.acc_pengajuan_empty_20dc, 0) + coalesce(c.acc_pengajuan_full_20dc, 0)),
+        'acc_40hc': func.sum(coalesce(c.acc_pengajuan_empty_40hc, 0) + coalesce(c.acc_pengajuan_full_40hc, 0)),
+        'tlss_20dc': func.sum(coalesce(c.total_realisasi_20dc, 0)),
+        'tlss_40hc': func.sum(coalesce(c.total_realisasi_40hc, 0)),
+        'teus_pengajuan': func.sum(coalesce(c.teus_pengajuan, 0)),
+        'teus_realisasi': func.sum(coalesce(c.teus_realisasi, 0)),
+    }
+
+
+def _aggregate_select(monthly):
+    c = ContainerMovement
+    # Konstanta tidak boleh ada di GROUP BY (PostgreSQL), jadi period 'all' tidak di-group
+    period_expr = _month_expr(Voyage.date_berth) if monthly else literal(PERIOD_ALL)
+    group_by = (Voyage.port_id, period_expr) if monthly else (Voyage.port_id,)
+    coalesce = func.coalesce
+    columns = {'voyages': func.count(Voyage.id), **movement_sums()}
+    return (
+        db.select(
+            Voyage.port_id,
+            period_expr.label('period'),
+            *[coalesce(expr, 0).label(name) for name, expr in columns.items()],
+        )
+        .select_from(Voyage)
+        .outerjoin(c, c.voyage_id == Voyage.id)
+        .group_by(*group_by)
+    )
+
+
+def rebuild_port_totals():
+    """
+    Bangun ulang seluruh tabel rekap dari container_movements x voyages (backfill / koreksi):
+    hapus isi lalu INSERT ... SELECT per port dan per port x bulan, dalam satu transaksi.
+    """
+    started = time.perf_counter()
+    table = PortMovementTotal.__table__
+    target = ['port_id', 'period', *TOTAL_COLUMNS]
+    db.session.execute(table.delete())
+    db.session.execute(insert(table).from_select(target, _aggregate_select(monthly=False)))
+    db.session.execute(insert(table).from_select(target, _aggregate_select(monthly=True)))
+    db.session.commit()
+    rows = db.session.query(func.count(PortMovementTotal.id)).scalar()
+    return {"rows": rows, "seconds": round(time.perf_counter() - started, 4)}
+
+
+@click.command('rebuild-port-totals')
+@with_appcontext
+def rebuild_port_totals_command():
+    """Bangun ulang rekap port_movement_totals dari data ContainerMovement."""
+    result = rebuild_port_totals()
+    click.echo(f"Rekap port dibangun ulang: {result['rows']} baris dalam {result['seconds']}s")
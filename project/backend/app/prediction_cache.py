@@ -0,0 +1,196 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class InProcessBackend:
+    """Cache LRU di memori proses dengan TTL per entry (default)."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping, ttl):
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+            while self.max_entries and len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            # Entry generasi lama tidak akan pernah dibaca lagi; buang sekarang
+            prefix = f"{namespace}:"
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._data)
+
+
+class RedisBackend:
+    """
+    Cache bersama antar worker/proses lewat server Redis (atau server lain yang
+    kompatibel protokol Redis). Butuh paket `redis` (pip install redis).
+    Batas ukuran diatur di sisi server (maxmemory + allkeys-lru), TTL lewat SET EX.
+    """
+
+    def __init__(self, url, prefix='shipos:predcache'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("PREDICTION_CACHE_BACKEND=redis membutuhkan paket 'redis' (pip install redis).") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        values = self.client.mget([f"{self.prefix}:{k}" for k in keys])
+        return {k: json.loads(v) for k, v in zip(keys, values) if v is not None}
+
+    def set_many(self, mapping, ttl):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(f"{self.prefix}:{key}", json.dumps(value), ex=max(int(ttl), 1))
+        pipe.execute()
+
+    def generation(self, namespace):
+        return int(self.client.get(f"{self.prefix}:gen:{namespace}") or 0)
+
+    def bump_generation(self, namespace):
+        self.client.incr(f"{self.prefix}:gen:{namespace}")
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+    def size(self):
+        return None
+
+
+class PredictionCache:
+    """
+    Memoization hasil prediksi, key = (model key, hash file model, vektor fitur kanonik).
+
+    - Nilai numerik dinormalisasi ke float (18, "18" dan 18.0 dianggap sama, sama seperti
+      sklearn yang meng-cast kolom numerik ke float), kolom kategorikal dibandingkan apa adanya.
+    - `invalidate(model_key)` menaikkan generasi namespace model, sehingga semua entry lama
+      otomatis tidak terpakai (juga di worker lain bila backend-nya bersama).
+    """
+
+    def __init__(self, backend=None, ttl=3600, categorical=()):
+        self.backend = backend
+        self.ttl = ttl
+        self.categorical = set(categorical)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def configure(self, backend, ttl=None):
+        self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+        self.reset_stats()
+
+    def _canonical(self, features):
+        items = []
+        for name in sorted(features):
+            value = features[name]
+            if name not in self.categorical and value is not None and not isinstance(value, bool):
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    pass
+            items.append((name, value))
+        return json.dumps(items, separators=(',', ':'), default=str)
+
+    def keys_for(self, model_key, file_hash, records):
+        namespace = model_key
+        generation = self.backend.generation(namespace)
+        prefix = f"{namespace}:{generation}:{file_hash}:"
+        return [
+            prefix + hashlib.sha1(self._canonical(features).encode('utf-8')).hexdigest()
+            for features in records
+        ]
+
+    def get_many(self, keys):
+        found = self.backend.get_many(keys)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, mapping):
+        if mapping:
+            self.backend.set_many(mapping, self.ttl)
+
+    def invalidate(self, model_keys):
+        if not self.enabled:
+            return
+        for key in model_keys:
+            self.backend.bump_generation(key)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "backend": type(self.backend).__name__ if self.backend else None,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "entries": self.backend.size() if self.backend else 0,
+            }
+
+
+def create_backend(name, max_entries=10000, url=None):
+    if name in (None, '', 'none', 'off'):
+        return None
+    if name == 'memory':
+        return InProcessBackend(max_entries=max_entries)
+    if name == 'redis':
+        return RedisBackend(url or 'redis://localhost:6379/0')
+    raise ValueError(f"PREDICTION_CACHE_BACKEND tidak dikenal: {name}")
@@ -1,12 +1,14 @@
 import os
 import joblib
+import numpy as np
 import pandas as pd
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from .model_registry import ModelRegistry
+from .prediction_cache import PredictionCache, create_backend
+from .tree_inference import compile_model
 
 ml_bp = Blueprint('ml_api', __name__)
-loaded_models = {}
-# Variabel 'flag' untuk memastikan model hanya di-load satu kali
-models_loaded_flag = False
 
 model_files = {
     "bongkaran_pengajuan_empty_20": "Bongkaran to Pengajuan/bongkaran_pengajuan_empty_20.pkl",
@@ -23,58 +25,425 @@ model_files = {
     "acc_realisasi_full_40": "ACC to Realisasi and Shipside/acc_realisasi_shipside_full_40.pkl",
 }
 
-def load_all_models(app):
-    backend_path = os.path.dirname(app.root_path)
-    models_path = os.path.join(backend_path, 'ml_models')
+# Model dimuat saat pertama kali dipakai (lihat init_models)
+model_registry = ModelRegistry(model_files)
+
+# Nama target untuk tiap model, urutannya sama dengan kolom output model.predict
+model_targets = {
+    "bongkaran_pengajuan_empty_20": ["PENGAJUAN KE PLANNER_EMPTY_20 DC"],
+    "bongkaran_pengajuan_empty_40": ["PENGAJUAN KE PLANNER_EMPTY_40 HC"],
+    "bongkaran_pengajuan_full_20": ["PENGAJUAN KE PLANNER_FULL_20 DC"],
+    "bongkaran_pengajuan_full_40": ["PENGAJUAN KE PLANNER_FULL_40 HC"],
+    "pengajuan_acc_empty_20": ["ACC PENGAJUAN_EMPTY_20 DC"],
+    "pengajuan_acc_empty_40": ["ACC PENGAJUAN_EMPTY_40 HC"],
+    "pengajuan_acc_full_20": ["ACC PENGAJUAN_FULL_20 DC"],
+    "pengajuan_acc_full_40": ["ACC PENGAJUAN_FULL_40 HC"],
+    "acc_realisasi_empty_20": ["REALISASI_ALL_DEPO_MXD_20_DC", "SHIPSIDE_YES_MXD_20_DC", "SHIPSIDE_NO_MXD_20_DC"],
+    "acc_realisasi_empty_40": ["REALISASI_ALL_DEPO_MXD_40_HC", "SHIPSIDE_YES_MXD_40_HC", "SHIPSIDE_NO_MXD_40_HC"],
+    "acc_realisasi_full_20": ["REALISASI_ALL_DEPO_FXD_20_DC", "SHIPSIDE_YES_FXD_20_DC", "SHIPSIDE_NO_FXD_20_DC"],
+    "acc_realisasi_full_40": ["REALISASI_ALL_DEPO_FXD_40_HC", "SHIPSIDE_YES_FXD_40_HC", "SHIPSIDE_NO_FXD_40_HC"],
+}
+
+# Fitur kategorikal (one-hot) yang dipakai semua model; kolom lain numerik
+CATEGORICAL_FEATURES = ('VESSEL ID (DMY)', 'BERTH LOCATION')
+
+# Cabang pipeline: size key -> (suffix kolom dataset, suffix field ContainerMovement, kode realisasi)
+PIPELINE_BRANCHES = {
+    "empty_20": ("EMPTY_20 DC", "empty_20dc", "mxd_20dc"),
+    "empty_40": ("EMPTY_40 HC", "empty_40hc", "mxd_40hc"),
+    "full_20": ("FULL_20 DC", "full_20dc", "fxd_20dc"),
+    "full_40": ("FULL_40 HC", "full_40hc", "fxd_40hc"),
+}
+BASE_FEATURES = ('VESSEL ID (DMY)', 'BERTH LOCATION', 'Voyage No.', 'Voyage Yr')
+
+# Cache hasil prediksi per (model, hash file model, fitur); dikonfigurasi di init_models
+prediction_cache = PredictionCache(categorical=CATEGORICAL_FEATURES)
+model_registry.on_reload(prediction_cache.invalidate)
+
+# Batas jumlah item per request /predict/batch
+MAX_BATCH_ITEMS = int(os.environ.get('PREDICT_BATCH_MAX_ITEMS', 5000))
 
-    print(f"Mencari model di path: {models_path}")
-    
+def init_models(app):
+    """
+    Pasang registry model ke app. Secara default model dimuat lazy saat request pertama.
+    MODEL_LAZY_LOAD=0 memuat semua model sekarang (perilaku lama),
+    MODEL_WARMUP=1 memuat semua model di thread latar belakang setelah startup,
+    MODEL_PRELOAD=1 memuat semua model sebelum worker di-fork (lihat gunicorn.conf.py).
+    MODEL_INFERENCE_ENGINE=compiled mengubah tiap RandomForest menjadi array pohon datar
+    saat load (lihat tree_inference.py); default 'sklearn'.
+    PREDICTION_CACHE_BACKEND ('memory' | 'redis' | 'none') memilih cache hasil prediksi,
+    dengan PREDICTION_CACHE_TTL (detik), PREDICTION_CACHE_SIZE dan PREDICTION_CACHE_URL.
+    """
+    engine = app.config.get('MODEL_INFERENCE_ENGINE', 'sklearn')
+    if engine not in ('sklearn', 'compiled'):
+        raise ValueError(f"MODEL_INFERENCE_ENGINE tidak dikenal: {engine}")
+    model_registry.transform = compile_model if engine == 'compiled' else None
+    model_registry.init_app(app)
+    print(f"Mencari model di path: {model_registry.models_path} (mode: {model_registry.load_mode}, engine: {engine})")
+
+    prediction_cache.configure(
+        create_backend(
+            app.config.get('PREDICTION_CACHE_BACKEND', 'memory'),
+            max_entries=int(app.config.get('PREDICTION_CACHE_SIZE', 10000)),
+            url=app.config.get('PREDICTION_CACHE_URL'),
+        ),
+        ttl=int(app.config.get('PREDICTION_CACHE_TTL', 3600)),
+    )
+
+    if app.config.get('MODEL_PRELOAD', False):
+        model_registry.preload()
+    elif not app.config.get('MODEL_LAZY_LOAD', True):
+        load_all_models(app)
+    elif app.config.get('MODEL_WARMUP', False):
+        model_registry.start_background_warmup()
+
+def load_all_models(app):
     with app.app_context(): # Pastikan kita berada dalam konteks aplikasi
-        for key, file_path in model_files.items():
-            full_path = os.path.join(models_path, file_path)
-            try:
-                loaded_models[key] = joblib.load(full_path)
-                print(f"  [OK] Model '{key}' berhasil dimuat.")
-            except FileNotFoundError:
-                loaded_models[key] = None
-                print(f"  [ERROR] Model '{key}' tidak ditemukan di {full_path}")
+        model_registry.warm()
 
-def handle_prediction(model_key, expected_target_name):
-    model = loaded_models.get(model_key)
-    if model is None:
-        return jsonify({"error": f"Model '{model_key}' tidak dapat dimuat atau tidak ditemukan."}), 500
+def _single_prediction(model_key, target_names):
     data = request.get_json()
     if not data:
         return jsonify({"error": "Input JSON tidak valid."}), 400
     try:
-        input_df = pd.DataFrame(data, index=[0])
-        prediction = model.predict(input_df)
-        result = {"model_used": model_key, "prediction": { expected_target_name: round(prediction[0]) }}
-        return jsonify(result)
+        predictions, invalid = predict_records(model_key, [data])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    if invalid:
+        return jsonify({"error": invalid[0]}), 500
+    values = list(predictions[0].values())
+    return jsonify({"model_used": model_key, "prediction": dict(zip(target_names, values))})
+
+def handle_prediction(model_key, expected_target_name):
+    return _single_prediction(model_key, [expected_target_name])
 
 def handle_multi_output_prediction(model_key, target_names):
-    model = loaded_models.get(model_key)
+    return _single_prediction(model_key, target_names)
+
+def _coerce_numeric(input_df):
+    """
+    Ubah kolom numerik ke float secara in-place.
+    Mengembalikan mask baris yang berisi nilai non-numerik (mis. 'LU') supaya
+    baris itu bisa ditolak sendiri tanpa menggagalkan seluruh batch.
+    """
+    invalid = np.zeros(len(input_df), dtype=bool)
+    for col in input_df.columns:
+        if col in CATEGORICAL_FEATURES:
+            continue
+        coerced = pd.to_numeric(input_df[col], errors='coerce')
+        invalid |= (coerced.isna() & input_df[col].notna()).to_numpy()
+        input_df[col] = coerced
+    return invalid
+
+def _predict_uncached(model, model_key, records):
+    input_df = pd.DataFrame.from_records(records)
+    invalid_mask = _coerce_numeric(input_df)
+    invalid = {int(i): "Fitur numerik berisi nilai non-numerik." for i in np.flatnonzero(invalid_mask)}
+    predictions = [None] * len(records)
+
+    valid_pos = np.flatnonzero(~invalid_mask)
+    if len(valid_pos) == 0:
+        return predictions, invalid
+
+    prediction = np.asarray(model.predict(input_df.iloc[valid_pos]))
+    if prediction.ndim == 1:
+        prediction = prediction.reshape(-1, 1)
+    # np.round = round() bawaan Python (half to even), jadi hasil sama dengan endpoint tunggal
+    values = np.round(prediction).astype(int).tolist()
+
+    targets = model_targets[model_key]
+    for pos, row in zip(valid_pos.tolist(), values):
+        predictions[pos] = dict(zip(targets, row))
+    return predictions, invalid
+
+def predict_records(model_key, records):
+    """
+    Jalankan satu kali model.predict untuk banyak record fitur sekaligus.
+    Mengembalikan (predictions, invalid): predictions berisi dict {target: nilai}
+    atau None dengan urutan sama seperti records, invalid berisi {posisi: pesan error}.
+    Record yang sudah ada di prediction_cache tidak dihitung ulang.
+    """
+    if not prediction_cache.enabled:
+        model = model_registry.get(model_key)
+        if model is None:
+            raise LookupError(f"Model '{model_key}' tidak dapat dimuat atau tidak ditemukan.")
+        if not records:
+            return [], {}
+        return _predict_uncached(model, model_key, records)
+
+    # Key cache memakai hash file saat model di memori dimuat, bukan file di disk sekarang:
+    # file yang sudah diganti tapi belum di-reload tidak boleh menyimpan hasil model lama
+    # di bawah versi baru (dan sebaliknya)
+    model, file_hash = model_registry.get_versioned(model_key)
     if model is None:
-        return jsonify({"error": f"Model '{model_key}' tidak dapat dimuat atau tidak ditemukan."}), 500
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "Input JSON tidak valid."}), 400
+        raise LookupError(f"Model '{model_key}' tidak dapat dimuat atau tidak ditemukan.")
+    if not records:
+        return [], {}
+
+    keys = prediction_cache.keys_for(model_key, file_hash, records)
+    cached = prediction_cache.get_many(keys)
+    predictions = [cached.get(k) for k in keys]
+    miss_pos = [i for i, value in enumerate(predictions) if value is None]
+    if not miss_pos:
+        return predictions, {}
+
+    computed, miss_invalid = _predict_uncached(model, model_key, [records[i] for i in miss_pos])
+
+    invalid = {}
+    fresh = {}
+    for j, pos in enumerate(miss_pos):
+        if j in miss_invalid:
+            invalid[pos] = miss_invalid[j]
+            continue
+        predictions[pos] = computed[j]
+        fresh[keys[pos]] = computed[j]
+    prediction_cache.set_many(fresh)
+    return predictions, invalid
+
+@ml_bp.route('/models', methods=['GET'])
+def models_status():
+    """Status registry: model mana yang di memori, waktu load dan perkiraan ukuran memori."""
+    return jsonify(model_registry.stats()), 200
+
+@ml_bp.route('/cache', methods=['GET'])
+def cache_status():
+    """Statistik cache hasil prediksi (hit/miss, jumlah entry)."""
+    return jsonify(prediction_cache.stats()), 200
+
+@ml_bp.route('/models/reload', methods=['POST'])
+@jwt_required()
+def reload_models():
+    """
+    Muat ulang model dari disk (mis. setelah file .pkl diganti) dan kosongkan cache
+    prediksinya. Body opsional: {"model": "<model key>"}; tanpa body semua model.
+    Hanya berlaku di worker yang menangani request ini: di bawah gunicorn worker lain tetap
+    memakai model lama. Untuk semua worker jalankan master baru (kill -USR2, lihat
+    gunicorn.conf.py); kill -HUP saja tidak cukup karena model ikut dimuat master (preload).
+    """
+    data = request.get_json(silent=True) or {}
+    model_key = data.get('model')
+    if model_key and model_key not in model_files:
+        return jsonify({"error": f"Model '{model_key}' tidak dikenal."}), 404
+    model_registry.reload(model_key)
+    return jsonify({
+        "msg": "Model dimuat ulang saat request berikutnya, hanya di worker ini; untuk semua worker jalankan master gunicorn baru (kill -USR2).",
+        "models": [model_key] if model_key else list(model_files),
+        "pid": os.getpid(),
+    }), 200
+
+@ml_bp.route('/batch', methods=['POST'])
+def predict_batch():
+    """
+    Prediksi banyak baris dalam satu request.
+
+    Body:
+    {
+      "model": "bongkaran_pengajuan_empty_20",   # opsional, default untuk item tanpa "model"
+      "items": [
+        {"id": 12, "model": "pengajuan_acc_full_40", "features": {...}},
+        ...
+      ]
+    }
+    Item dikelompokkan per model lalu tiap model dipanggil sekali (predict satu DataFrame).
+    Hasil dikembalikan ter-key berdasarkan "id" dari pemanggil.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        return jsonify({"error": "Input JSON tidak valid. Gunakan {\"items\": [...]}."}), 400
+
+    items = data['items']
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"Maksimal {MAX_BATCH_ITEMS} item per batch."}), 413
+
+    default_model = data.get('model')
+    results = {}
+    errors = {}
+    groups = {}
+    seen_ids = set()
+
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[str(idx)] = "Item harus berupa object."
+            continue
+        row_id = str(item.get('id', idx))
+        if row_id in seen_ids:
+            errors[row_id] = "id duplikat dalam batch."
+            continue
+        seen_ids.add(row_id)
+        model_key = item.get('model') or default_model
+        features = item.get('features')
+        if model_key not in model_files:
+            errors[row_id] = f"Model '{model_key}' tidak dikenal."
+            continue
+        if not isinstance(features, dict) or not features:
+            errors[row_id] = "features wajib berupa object yang tidak kosong."
+            continue
+        groups.setdefault(model_key, []).append((row_id, features))
+
+    for model_key, rows in groups.items():
+        try:
+            predictions, invalid = predict_records(model_key, [features for _, features in rows])
+        except Exception as e:
+            for row_id, _ in rows:
+                errors[row_id] = str(e)
+            continue
+        for pos, msg in invalid.items():
+            errors[rows[pos][0]] = msg
+        for (row_id, _), prediction in zip(rows, predictions):
+            if prediction is not None:
+                results[row_id] = {"model_used": model_key, "prediction": prediction}
+
+    return jsonify({
+        "results": results,
+        "errors": errors,
+        "count": len(results),
+    }), 200
+
+def _run_stage(model_key, rows, features_fn):
+    """
+    Jalankan satu tahap pipeline untuk semua voyage yang masih aktif di cabang ini.
+    rows: list index voyage; features_fn(i) -> dict fitur. Mengembalikan {i: prediction}.
+    """
+    if not rows:
+        return {}, {}
     try:
-        input_df = pd.DataFrame(data, index=[0])
-        prediction = model.predict(input_df)
-        result = {
-            "model_used": model_key,
-            "prediction": {
-                target_names[0]: round(prediction[0][0]),
-                target_names[1]: round(prediction[0][1]),
-                target_names[2]: round(prediction[0][2]),
-            }
-        }
-        return jsonify(result)
+        predictions, invalid = predict_records(model_key, [features_fn(i) for i in rows])
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return {}, {i: str(e) for i in rows}
+    result = {i: pred for i, pred in zip(rows, predictions) if pred is not None}
+    errors = {rows[pos]: msg for pos, msg in invalid.items()}
+    return result, errors
+
+def run_pipeline(voyages):
+    """
+    Rantai prediksi bongkaran -> pengajuan -> ACC -> realisasi/shipside untuk banyak voyage.
+    Tiap tahap di tiap cabang ukuran memanggil model.predict sekali untuk semua voyage.
+    Mengembalikan list dict {"predicted": {field ContainerMovement: nilai}, "errors": {...}}.
+    """
+    results = [{"predicted": {}, "errors": {}} for _ in voyages]
+
+    for size, (col_suffix, cm_suffix, real_suffix) in PIPELINE_BRANCHES.items():
+        bongkaran_col = f"TOTAL BONGKARAN_{col_suffix}"
+        pengajuan_col = f"PENGAJUAN KE PLANNER_{col_suffix}"
+        acc_col = f"ACC PENGAJUAN_{col_suffix}"
+
+        def base(i):
+            return {k: voyages[i].get(k) for k in BASE_FEATURES}
+
+        active = [i for i, v in enumerate(voyages) if v.get(bongkaran_col) is not None]
+
+        # Tahap 1: bongkaran -> pengajuan
+        pengajuan, errors = _run_stage(
+            f"bongkaran_pengajuan_{size}", active,
+            lambda i: {**base(i), bongkaran_col: voyages[i][bongkaran_col]},
+        )
+        for i, msg in errors.items():
+            results[i]["errors"][f"pengajuan_{cm_suffix}"] = msg
+        for i, pred in pengajuan.items():
+            results[i]["predicted"][f"pengajuan_{cm_suffix}"] = pred[pengajuan_col]
+
+        # Tahap 2: pengajuan -> ACC
+        active = list(pengajuan)
+        acc, errors = _run_stage(
+            f"pengajuan_acc_{size}", active,
+            lambda i: {
+                **base(i),
+                bongkaran_col: voyages[i][bongkaran_col],
+                pengajuan_col: pengajuan[i][pengajuan_col],
+            },
+        )
+        for i, msg in errors.items():
+            results[i]["errors"][f"acc_pengajuan_{cm_suffix}"] = msg
+        for i, pred in acc.items():
+            results[i]["predicted"][f"acc_pengajuan_{cm_suffix}"] = pred[acc_col]
+
+        # Tahap 3: ACC -> realisasi + shipside yes/no
+        active = list(acc)
+        realisasi, errors = _run_stage(
+            f"acc_realisasi_{size}", active,
+            lambda i: {
+                **base(i),
+                bongkaran_col: voyages[i][bongkaran_col],
+                pengajuan_col: pengajuan[i][pengajuan_col],
+                acc_col: acc[i][acc_col],
+            },
+        )
+        for i, msg in errors.items():
+            results[i]["errors"][f"realisasi_{real_suffix}"] = msg
+        real_target, ship_yes_target, ship_no_target = model_targets[f"acc_realisasi_{size}"]
+        for i, pred in realisasi.items():
+            real_val, ship_yes, ship_no = pred[real_target], pred[ship_yes_target], pred[ship_no_target]
+            results[i]["predicted"][f"realisasi_{real_suffix}"] = real_val
+            results[i]["predicted"][f"shipside_yes_{real_suffix}"] = ship_yes
+            results[i]["predicted"][f"shipside_no_{real_suffix}"] = ship_no
+
+    return results
+
+@ml_bp.route('/pipeline', methods=['POST'])
+def predict_pipeline():
+    """
+    Prediksi seluruh alur (pengajuan, ACC, realisasi/shipside) dari data bongkaran saja,
+    untuk satu voyage atau banyak voyage sekaligus, ditambah estimasi cost-nya.
+
+    Body: satu object voyage, atau {"voyages": [voyage, ...]}. Tiap voyage berisi
+    "id" (opsional), fitur dasar ('VESSEL ID (DMY)', 'BERTH LOCATION', 'Voyage No.', 'Voyage Yr'),
+    'TOTAL BONGKARAN_<EMPTY|FULL>_<20 DC|40 HC>' dan opsional "port_id" untuk tarif cost.
+    """
+    from .models import Port
+    from .cost_engine import RateMatrix, estimate
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get('voyages'), list):
+        voyages = data['voyages']
+        single = False
+    elif isinstance(data, dict) and data:
+        voyages = [data]
+        single = True
+    else:
+        return jsonify({"error": "Input JSON tidak valid."}), 400
+
+    if len(voyages) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"Maksimal {MAX_BATCH_ITEMS} voyage per request."}), 413
+    if not all(isinstance(v, dict) for v in voyages):
+        return jsonify({"error": "Setiap voyage harus berupa object."}), 400
+
+    results = run_pipeline(voyages)
+
+    # Tarif cost per port: satu query untuk port berdasarkan nama, satu untuk CostRate
+    port_names = {v.get('BERTH LOCATION') for v in voyages if not v.get('port_id') and v.get('BERTH LOCATION')}
+    port_ids_by_name = {}
+    if port_names:
+        port_ids_by_name = {p.name: p.id for p in Port.query.filter(Port.name.in_(port_names)).all()}
+    port_ids = [v.get('port_id') or port_ids_by_name.get(v.get('BERTH LOCATION')) for v in voyages]
+    rate_matrix = RateMatrix.load(port_ids)
+
+    # Hitungan bongkaran (input) + hasil prediksi, lalu cost semua voyage sekaligus
+    values_list = []
+    for voyage, result in zip(voyages, results):
+        values = {f"bongkaran_{cm_suffix}": voyage.get(f"TOTAL BONGKARAN_{col_suffix}")
+                  for col_suffix, cm_suffix, _ in PIPELINE_BRANCHES.values()}
+        values.update(result["predicted"])
+        values_list.append(values)
+    costs = estimate(values_list, port_ids, rate_matrix)
+
+    response = []
+    for idx, (voyage, result, port_id, (est1, est2, final)) in enumerate(zip(voyages, results, port_ids, costs)):
+        response.append({
+            "id": voyage.get('id', idx),
+            "port_id": port_id,
+            "predicted": result["predicted"],
+            "cost": {
+                "estimation_cost1": est1,
+                "estimation_cost2": est2,
+                "final_cost": final,
+                "has_rates": rate_matrix.has(port_id),
+            },
+            "errors": result["errors"],
+        })
+
+    if single:
+        return jsonify(response[0]), 200
+    return jsonify({"results": response, "count": len(response)}), 200
 
 @ml_bp.route('/bongkaran_to_pengajuan/empty_20', methods=['POST'])
 def pred_bongkaran_pengajuan_e20():
@@ -0,0 +1,199 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from . import db
+from .models import ContainerMovement, ContainerMovementPrediction, Port, Vessel, Voyage
+from .stored_predictions import PREDICTED_FIELDS
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+class Projection:
+    """
+    Proyeksi kolom deklaratif untuk endpoint daftar: satu SELECT berisi kolom yang
+    dibutuhkan saja (tuple, tanpa objek ORM), lalu baris diubah ke dict.
+
+    fields: urutan (nama field, ekspresi kolom) atau (nama, kolom, konverter).
+    joins: urutan (target, onclause, outer) setelah `select_from`.
+    post: fungsi opsional item -> item untuk field turunan.
+    """
+
+    def __init__(self, select_from, fields, joins=(), order_by=(), post=None):
+        self.select_from = select_from
+        self.fields = [field if len(field) == 3 else (*field, None) for field in fields]
+        self.joins = joins
+        self.order_by = order_by
+        self.post = post
+        self.keys = tuple(name for name, _, _ in self.fields)
+        self.converters = tuple((i, convert) for i, (_, _, convert) in enumerate(self.fields) if convert)
+
+    def columns(self):
+        return [column.label(name) for name, column, _ in self.fields]
+
+    def query(self):
+        query = db.session.query(*self.columns()).select_from(self.select_from)
+        for target, onclause, outer in self.joins:
+            query = query.outerjoin(target, onclause) if outer else query.join(target, onclause)
+        if self.order_by:
+            query = query.order_by(*self.order_by)
+        return query
+
+    def serialize_row(self, row):
+        if self.converters:
+            row = list(row)
+            for i, convert in self.converters:
+                row[i] = convert(row[i])
+        item = dict(zip(self.keys, row))
+        return self.post(item) if self.post else item
+
+    def serialize(self, rows):
+        return [self.serialize_row(row) for row in rows]
+
+    def all(self):
+        return self.serialize(self.query().all())
+
+
+VESSEL_LIST = Projection(
+    Vessel,
+    [('id', Vessel.id), ('name', Vessel.name)],
+    order_by=(Vessel.id,),
+)
+
+PORT_LIST = Projection(
+    Port,
+    [('id', Port.id), ('name', Port.name), ('code', Port.code)],
+    order_by=(Port.name,),
+)
+
+VOYAGE_LIST = Projection(
+    Voyage,
+    [
+        ('id', Voyage.id),
+        ('vessel_id', Voyage.vessel_id),
+        ('voyage_no', Voyage.voyage_no),
+        ('voyage_yr', Voyage.voyage_yr),
+        ('port_id', Voyage.port_id),
+        ('port_name', Port.name),
+        ('date_berth', Voyage.date_berth, iso),
+        ('created_at', Voyage.created_at, iso),
+    ],
+    joins=((Port, Voyage.port_id == Port.id, True),),
+    order_by=(Voyage.id,),
+)
+
+
+# Field ContainerMovement yang dikirim apa adanya di daftar GET /container_movements/
+CM_LIST_FIELDS = (
+    'bongkaran_empty_20dc', 'bongkaran_empty_40hc', 'bongkaran_full_20dc', 'bongkaran_full_40hc',
+    'pengajuan_empty_20dc', 'pengajuan_empty_40hc', 'pengajuan_full_20dc', 'pengajuan_full_40hc',
+    'acc_pengajuan_empty_20dc', 'acc_pengajuan_empty_40hc', 'acc_pengajuan_full_20dc', 'acc_pengajuan_full_40hc',
+    'total_pengajuan_20dc', 'total_pengajuan_40hc', 'teus_pengajuan',
+    'realisasi_mxd_20dc', 'realisasi_mxd_40hc', 'realisasi_fxd_20dc', 'realisasi_fxd_40hc',
+    'shipside_yes_mxd_20dc', 'shipside_yes_mxd_40hc', 'shipside_yes_fxd_20dc', 'shipside_yes_fxd_40hc',
+    'shipside_no_mxd_20dc', 'shipside_no_mxd_40hc', 'shipside_no_fxd_20dc', 'shipside_no_fxd_40hc',
+    'total_realisasi_20dc', 'total_realisasi_40hc', 'teus_realisasi',
+    'turun_cy_20dc', 'turun_cy_40hc', 'teus_turun_cy', 'percentage_vessel',
+)
+
+
+def _cm_list_post(item):
+    if item['id'] is None:
+        item['obstacles'] = ""
+    # Prediksi tersimpan (hanya field yang belum diisi), diperbarui setelah input berubah
+    predictions = {f: item.pop(f"predicted_{f}") for f in PREDICTED_FIELDS}
+    item['predictions'] = {
+        f: v for f, v in predictions.items() if v is not None
+    } if item['predictions_status'] is not None else None
+    return item
+
+
+def _cm_fields(date_converter=None):
+    """Field voyage + ContainerMovement untuk daftar/ekspor; kolom tanggal diberi `date_converter`."""
+    def date(name, column):
+        return (name, column, date_converter) if date_converter else (name, column)
+
+    return [
+        ('id', ContainerMovement.id),
+        ('voyage_id', Voyage.id),
+        ('vessel_name', Vessel.name),
+        ('voyage_number', Voyage.voyage_no),
+        ('voyage_year', Voyage.voyage_yr),
+        ('port_id', Voyage.port_id),
+        ('port_name', Port.name),
+        date('voyage_date_berth', Voyage.date_berth),
+        *[(f, getattr(ContainerMovement, f)) for f in CM_LIST_FIELDS],
+        ('obstacles', ContainerMovement.obstacles),
+        date('created_at', ContainerMovement.created_at),
+        date('updated_at', ContainerMovement.updated_at),
+        date('voyage_created_at', Voyage.created_at),
+    ]
+
+
+_CM_JOIN = (ContainerMovement, Voyage.id == ContainerMovement.voyage_id, True)
+_PORT_JOIN = (Port, Voyage.port_id == Port.id, False)
+_VESSEL_JOIN = (Vessel, Voyage.vessel_id == Vessel.id, True)
+
+# Daftar voyage + ContainerMovement + prediksi tersimpan (GET /container_movements/)
+CM_LIST = Projection(
+    Voyage,
+    [
+        *_cm_fields(iso),
+        ('predictions_status', ContainerMovementPrediction.status),
+        *[(f"predicted_{f}", getattr(ContainerMovementPrediction, f)) for f in PREDICTED_FIELDS],
+    ],
+    joins=(
+        _CM_JOIN,
+        (ContainerMovementPrediction, ContainerMovementPrediction.cm_id == ContainerMovement.id, True),
+        _PORT_JOIN,
+        _VESSEL_JOIN,
+    ),
+    order_by=(Voyage.created_at.desc(),),
+    post=_cm_list_post,
+)
+
+# Field yang sama tanpa prediksi, nilai mentah (datetime), urut id voyage
+# (GET /container_movements/export, lihat exports.py)
+CM_EXPORT = Projection(
+    Voyage,
+    _cm_fields(),
+    joins=(_CM_JOIN, _PORT_JOIN, _VESSEL_JOIN),
+    order_by=(Voyage.id,),
+)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Hitung statement SQL yang dieksekusi di dalam blok (butuh app context)."""
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """
+    AssertionError jika blok menjalankan lebih dari `limit` statement SQL, mis.
+    `with assert_max_queries(2): client.get('/voyages', headers=...)` untuk menangkap N+1.
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(counter.statements)
+        raise AssertionError(f"{counter.count} query dijalankan (maksimal {limit}):\n{statements}")
@@ -5,6 +5,10 @@ from .models import (
     Port,
     db
 )
+from .read_models import VESSEL_LIST, VOYAGE_LIST
+from .port_totals import record_voyage_added
+from .http_cache import cached_response
+from .db_routing import read_replica
 from flask import jsonify, request, Blueprint
 from flask_jwt_extended import jwt_required
 
@@ -16,10 +20,10 @@ def index():
 
 @main_bp.route('/vessels', methods=['GET'])
 @jwt_required()
+@read_replica
+@cached_response('vessels')
 def get_vessels():
-    vessels = Vessel.query.all()
-    vessels_list = [{"id": vessel.id, "name": vessel.name} for vessel in vessels]
-    return jsonify(vessels_list), 200
+    return jsonify(VESSEL_LIST.all()), 200
 
 @main_bp.route('/vessels', methods=['POST'])
 @jwt_required()
@@ -38,21 +42,10 @@ def create_vessel():
 
 @main_bp.route('/voyages', methods=['GET'])
 @jwt_required()
+@read_replica
+@cached_response('voyages', 'ports')
 def get_voyages():
-    voyages = Voyage.query.all()
-    voyages_list = []
-    for voyage in voyages:
-        voyages_list.append({
-            "id": voyage.id,
-            "vessel_id": voyage.vessel_id,
-            "voyage_no": voyage.voyage_no,
-            "voyage_yr": voyage.voyage_yr,
-            "port_id": voyage.port_id,
-            "port_name": voyage.port.name if voyage.port else None,
-            "date_berth": voyage.date_berth.isoformat(),
-            "created_at": voyage.created_at.isoformat()
-        })
-    return jsonify(voyages_list), 200
+    return jsonify(VOYAGE_LIST.all()), 200
 
 @main_bp.route('/voyages', methods=['POST'])
 @jwt_required()
@@ -94,6 +87,7 @@ def create_voyage():
         date_berth=date_berth
     )
     db.session.add(new_voyage)
+    record_voyage_added(new_voyage)
     db.session.commit()
 
     return jsonify({"msg": "Voyage berhasil dibuat", "voyage": {
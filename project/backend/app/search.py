@@ -0,0 +1,172 @@
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import String, and_, cast, false, func, literal_column, or_, select, union
+
+from . import db
+from .models import ContainerMovement, Port, Vessel, Voyage
+
+# Field pencarian di halaman monitoring (parameter ?field=)
+SEARCH_FIELDS = (
+    'vessel_name', 'voyage_number', 'voyage_year', 'port_name', 'voyage_date_berth',
+    'created_at', 'updated_at', 'voyage_created_at', 'obstacles',
+)
+
+_DATE_PREFIX = re.compile(r'^(\d{4})(?:-(\d{0,2})(?:-(\d{0,2}))?)?$')
+
+
+def _digit_range(part, low, high):
+    # Prefix 0-2 digit -> rentang [awal, akhir) di dalam [low, high): '' semua, '1' = 10..19, '05' = 5
+    if not part:
+        return low, high
+    if len(part) == 1:
+        return max(low, int(part) * 10), min(high, int(part) * 10 + 10)
+    return int(part), int(part) + 1
+
+
+def date_range(text):
+    """
+    Prefix tanggal ISO -> rentang [awal, akhir), sama dengan prefix teks lama:
+    '2024' = setahun, '2024-0' = Jan-Sep, '2024-05' = sebulan, '2024-05-1' = tgl 10-19,
+    '2024-05-17' = sehari, '202' = 2020-2029. None jika bukan (awal) tanggal yang valid.
+    """
+    if text.isdigit() and len(text) < 4:
+        scale = 10 ** (4 - len(text))
+        first, last = int(text) * scale, (int(text) + 1) * scale
+        return datetime(max(first, 1), 1, 1), datetime(last, 1, 1) if last <= 9999 else datetime.max
+    match = _DATE_PREFIX.match(text)
+    if not match:
+        return None
+    year = int(match.group(1))
+    month_part, day_part = match.group(2) or '', match.group(3) or ''
+    if day_part and len(month_part) != 2:
+        return None
+
+    first_month, last_month = _digit_range(month_part, 1, 13)
+    if first_month >= last_month or last_month > 13:
+        return None
+    try:
+        start = datetime(year, first_month, 1)
+        end = datetime(year + 1, 1, 1) if last_month == 13 else datetime(year, last_month, 1)
+        if day_part:
+            days_in_month = (end - start).days
+            first_day, last_day = _digit_range(day_part, 1, days_in_month + 1)
+            if first_day >= last_day or last_day > days_in_month + 1:
+                return None
+            start, end = start + timedelta(days=first_day - 1), start + timedelta(days=last_day - 1)
+    except ValueError:
+        return None
+    return start, end
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _text_prefix(column, text):
+    # lower(col) LIKE 'x%' -> index ekspresi lower(col) (text_pattern_ops / trigram)
+    return func.lower(column).like(_escape_like(text.lower()) + '%', escape='\\')
+
+
+def _date_predicate(column, text):
+    bounds = date_range(text)
+    if bounds is None:
+        return None
+    return and_(column >= bounds[0], column < bounds[1])
+
+
+def _year_predicate(column, text):
+    # Prefix angka tahun: '2024' = tahun itu, '202' = 2020..2029
+    if not text.isdigit() or not 1 <= len(text) <= 4:
+        return None
+    scale = 10 ** (4 - len(text))
+    start = int(text) * scale
+    return column == start if scale == 1 else and_(column >= start, column < start + scale)
+
+
+def _fulltext_predicate(column, text):
+    """
+    Semua kata harus ada sebagai awal kata di teks ('kap' cocok dengan 'kapal').
+    PostgreSQL: full-text (config 'simple') dengan prefix per kata, memakai index GIN
+    to_tsvector. Database lain: LIKE per kata (tanpa index).
+    """
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return None
+    if db.engine.dialect.name == 'postgresql':
+        query = ' & '.join(f"{word}:*" for word in words)
+        # Ekspresi harus sama persis dengan index ix_container_movements_obstacles_fts
+        document = func.to_tsvector(literal_column("'simple'"), func.coalesce(column, literal_column("''")))
+        return document.op('@@')(func.to_tsquery(literal_column("'simple'"), query))
+    lowered = func.lower(column)
+    return and_(*[
+        or_(lowered.like(_escape_like(word) + '%', escape='\\'),
+            lowered.like('% ' + _escape_like(word) + '%', escape='\\'))
+        for word in words
+    ])
+
+
+def _typed_predicates(text):
+    """field -> (tabel asal, predicate) untuk teks pencarian; field yang tidak cocok dilewati."""
+    predicates = {
+        'vessel_name': (Vessel, _text_prefix(Vessel.name, text)),
+        'voyage_number': (Voyage, _text_prefix(Voyage.voyage_no, text)),
+        'voyage_year': (Voyage, _year_predicate(Voyage.voyage_yr, text)),
+        'port_name': (Port, _text_prefix(Port.name, text)),
+        'voyage_date_berth': (Voyage, _date_predicate(Voyage.date_berth, text)),
+        'voyage_created_at': (Voyage, _date_predicate(Voyage.created_at, text)),
+        'created_at': (ContainerMovement, _date_predicate(ContainerMovement.created_at, text)),
+        'updated_at': (ContainerMovement, _date_predicate(ContainerMovement.updated_at, text)),
+        'obstacles': (ContainerMovement, _fulltext_predicate(ContainerMovement.obstacles, text)),
+    }
+    return {field: item for field, item in predicates.items() if item[1] is not None}
+
+
+def _voyage_ids(table, predicate):
+    if table is Voyage:
+        return select(Voyage.id).where(predicate)
+    if table is Vessel:
+        return select(Voyage.id).join(Vessel, Voyage.vessel_id == Vessel.id).where(predicate)
+    if table is Port:
+        return select(Voyage.id).join(Port, Voyage.port_id == Port.id).where(predicate)
+    return select(ContainerMovement.voyage_id).where(predicate)
+
+
+def typed_filter(text, field='all'):
+    """
+    Filter pencarian bertipe untuk daftar voyage/ContainerMovement:
+    nama & nomor voyage -> prefix lower(col), tahun -> angka, tanggal -> rentang,
+    obstacles -> full-text. Untuk field 'all' tiap predicate dijadikan subquery id voyage
+    lalu di-UNION, supaya tiap cabang bisa memakai index-nya sendiri (tanpa OR lintas join).
+    """
+    predicates = _typed_predicates(text)
+    if field != 'all' and field in SEARCH_FIELDS:
+        if field not in predicates:
+            return false()
+        return predicates[field][1]
+    if not predicates:
+        return false()
+    ids = union(*[_voyage_ids(table, predicate) for table, predicate in predicates.values()])
+    return Voyage.id.in_(select(ids.subquery().c[0]))
+
+
+def _ci_prefix(col, text):
+    return func.lower(cast(col, String)).like((text or '').lower() + '%')
+
+
+def prefix_filter(text, field='all'):
+    """Pencarian lama: lower(cast(col as text)) LIKE 'x%' pada semua kolom (tanpa index)."""
+    columns_map = {
+        'vessel_name': Vessel.name,
+        'voyage_number': Voyage.voyage_no,
+        'voyage_year': Voyage.voyage_yr,
+        'port_name': Port.name,
+        'voyage_date_berth': Voyage.date_berth,
+        'created_at': ContainerMovement.created_at,
+        'updated_at': ContainerMovement.updated_at,
+        'voyage_created_at': Voyage.created_at,
+        'obstacles': ContainerMovement.obstacles,
+    }
+    if field != 'all' and field in columns_map:
+        return _ci_prefix(columns_map[field], text)
+    return or_(*[_ci_prefix(columns_map[name], text) for name in SEARCH_FIELDS])
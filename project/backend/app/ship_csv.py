@@ -0,0 +1,55 @@
+# Layout kolom Ship_Operation_Data_Cleaned.csv: dibaca seeder, ditulis ulang oleh
+# GET /container_movements/export?layout=seeder supaya hasil ekspor bisa di-seed lagi.
+
+CSV_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# (header CSV, field di daftar/ekspor container movement)
+VOYAGE_CSV_COLUMNS = (
+    ('VESSEL ID (DMY)', 'vessel_name'),
+    ('Voyage No.', 'voyage_number'),
+    ('Voyage Yr', 'voyage_year'),
+    ('BERTH LOCATION', 'port_name'),
+    ('Date Berth', 'voyage_date_berth'),
+)
+
+# (header CSV, kolom ContainerMovement, tipe nilai) sesuai urutan kolom di file
+CM_CSV_COLUMNS = (
+    ('TOTAL BONGKARAN_EMPTY_20 DC', 'bongkaran_empty_20dc', 'int'),
+    ('TOTAL BONGKARAN_EMPTY_40 HC', 'bongkaran_empty_40hc', 'int'),
+    ('TOTAL BONGKARAN_FULL_20 DC', 'bongkaran_full_20dc', 'int'),
+    ('TOTAL BONGKARAN_FULL_40 HC', 'bongkaran_full_40hc', 'int'),
+    ('PENGAJUAN KE PLANNER_EMPTY_20 DC', 'pengajuan_empty_20dc', 'int'),
+    ('PENGAJUAN KE PLANNER_EMPTY_40 HC', 'pengajuan_empty_40hc', 'int'),
+    ('PENGAJUAN KE PLANNER_FULL_20 DC', 'pengajuan_full_20dc', 'int'),
+    ('PENGAJUAN KE PLANNER_FULL_40 HC', 'pengajuan_full_40hc', 'int'),
+    ('ACC PENGAJUAN_EMPTY_20 DC', 'acc_pengajuan_empty_20dc', 'int'),
+    ('ACC PENGAJUAN_EMPTY_40 HC', 'acc_pengajuan_empty_40hc', 'int'),
+    ('ACC PENGAJUAN_FULL_20 DC', 'acc_pengajuan_full_20dc', 'int'),
+    ('ACC PENGAJUAN_FULL_40 HC', 'acc_pengajuan_full_40hc', 'int'),
+    ('0_TOTAL_BOX_20 DC', 'total_pengajuan_20dc', 'int'),
+    ('0_40 HC', 'total_pengajuan_40hc', 'int'),
+    ('0_TEUS', 'teus_pengajuan', 'int'),
+    ('REALISASI ALL DEPO_ALL DEPO_MXD_20 DC', 'realisasi_mxd_20dc', 'int'),
+    ('REALISASI ALL DEPO_ALL DEPO_MXD_40 HC', 'realisasi_mxd_40hc', 'int'),
+    ('REALISASI ALL DEPO_ALL DEPO_FXD_20 DC', 'realisasi_fxd_20dc', 'int'),
+    ('REALISASI ALL DEPO_ALL DEPO_FXD_40 HC', 'realisasi_fxd_40hc', 'int'),
+    ('SHIPSIDE_YES_MXD_20 DC', 'shipside_yes_mxd_20dc', 'int'),
+    ('SHIPSIDE_YES_MXD_40 HC', 'shipside_yes_mxd_40hc', 'int'),
+    ('SHIPSIDE_YES_FXD_20 DC', 'shipside_yes_fxd_20dc', 'int'),
+    ('SHIPSIDE_YES_FXD_40 HC', 'shipside_yes_fxd_40hc', 'int'),
+    ('SHIPSIDE_NO_MXD_20 DC', 'shipside_no_mxd_20dc', 'int'),
+    ('SHIPSIDE_NO_MXD_40 HC', 'shipside_no_mxd_40hc', 'int'),
+    ('SHIPSIDE_NO_FXD_20 DC', 'shipside_no_fxd_20dc', 'int'),
+    ('SHIPSIDE_NO_FXD_40 HC', 'shipside_no_fxd_40hc', 'int'),
+    ('0_TOTAL_BOX_20 DC.1', 'total_realisasi_20dc', 'int'),
+    ('0_40 HC.1', 'total_realisasi_40hc', 'int'),
+    ('0_TEUS.1', 'teus_realisasi', 'int'),
+    ('TURUN CY_BOX_20 DC', 'turun_cy_20dc', 'int'),
+    ('TURUN CY_BOX_40 HC', 'turun_cy_40hc', 'int'),
+    ('TURUN CY_TEUS', 'teus_turun_cy', 'int'),
+    ('PERSENTASE/VESSEL\n(Total Realisasi TL, SS dibagi Total Pengajuan)', 'percentage_vessel', 'float'),
+    ('OBSTACLES', 'obstacles', 'text'),
+)
+
+# (header CSV, field) untuk seluruh kolom file, urut seperti di CSV
+CSV_COLUMNS = VOYAGE_CSV_COLUMNS + tuple((header, field) for header, field, _ in CM_CSV_COLUMNS)
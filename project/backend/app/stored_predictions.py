@@ -0,0 +1,194 @@
+import hashlib
+import json
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from . import db
+from .jobs import enqueue_job, job_handler
+from .models import ContainerMovement, ContainerMovementPrediction, Voyage, Vessel, Port
+from .prediction_routes import PIPELINE_BRANCHES, model_registry, model_targets, predict_records
+
+# Field ContainerMovement yang bisa diprediksi, sama dengan kolom ContainerMovementPrediction
+PREDICTED_FIELDS = tuple(
+    f"{prefix}_{cm_suffix}"
+    for prefix in ('pengajuan', 'acc_pengajuan')
+    for _, cm_suffix, _ in PIPELINE_BRANCHES.values()
+) + tuple(
+    f"{prefix}_{real_suffix}"
+    for prefix in ('realisasi', 'shipside_yes', 'shipside_no')
+    for _, _, real_suffix in PIPELINE_BRANCHES.values()
+)
+
+
+def _stage_for(cm):
+    """
+    Tahap yang diprediksi, sama dengan aturan di frontend (useMonitoringVoyages):
+    ada ACC -> realisasi, ada pengajuan -> ACC, ada bongkaran -> pengajuan.
+    """
+    def any_present(prefix):
+        return any(getattr(cm, f"{prefix}_{s}") is not None for _, s, _ in PIPELINE_BRANCHES.values())
+
+    if any_present('acc_pengajuan'):
+        return 'realisasi'
+    if any_present('pengajuan'):
+        return 'acc'
+    if any_present('bongkaran'):
+        return 'pengajuan'
+    return 'none'
+
+
+def _features(cm, vessel_name, port_name, voyage):
+    features = {
+        'BERTH LOCATION': port_name,
+        'VESSEL ID (DMY)': vessel_name,
+        'Voyage Yr': voyage.voyage_yr,
+        'Voyage No.': voyage.voyage_no,
+    }
+    for col_suffix, cm_suffix, _ in PIPELINE_BRANCHES.values():
+        features[f"TOTAL BONGKARAN_{col_suffix}"] = getattr(cm, f"bongkaran_{cm_suffix}") or 0
+        features[f"PENGAJUAN KE PLANNER_{col_suffix}"] = getattr(cm, f"pengajuan_{cm_suffix}") or 0
+        features[f"ACC PENGAJUAN_{col_suffix}"] = getattr(cm, f"acc_pengajuan_{cm_suffix}") or 0
+    return features
+
+
+def _plan(cm, stage):
+    """
+    Daftar (model_key, {target model: field ContainerMovement}) untuk field yang masih kosong.
+    """
+    plan = []
+    for size, (_, cm_suffix, real_suffix) in PIPELINE_BRANCHES.items():
+        if stage == 'pengajuan':
+            if getattr(cm, f"bongkaran_{cm_suffix}") is not None and getattr(cm, f"pengajuan_{cm_suffix}") is None:
+                key = f"bongkaran_pengajuan_{size}"
+                plan.append((key, {model_targets[key][0]: f"pengajuan_{cm_suffix}"}))
+        elif stage == 'acc':
+            if getattr(cm, f"pengajuan_{cm_suffix}") is not None and getattr(cm, f"acc_pengajuan_{cm_suffix}") is None:
+                key = f"pengajuan_acc_{size}"
+                plan.append((key, {model_targets[key][0]: f"acc_pengajuan_{cm_suffix}"}))
+        elif stage == 'realisasi':
+            if getattr(cm, f"acc_pengajuan_{cm_suffix}") is None:
+                continue
+            key = f"acc_realisasi_{size}"
+            fields = {
+                target: f"{prefix}_{real_suffix}"
+                for target, prefix in zip(model_targets[key], ('realisasi', 'shipside_yes', 'shipside_no'))
+                if getattr(cm, f"{prefix}_{real_suffix}") is None
+            }
+            if fields:
+                plan.append((key, fields))
+    return plan
+
+
+def _input_hash(stage, features, plan, versions):
+    """Hash input + versi model (`versions`: model_key -> hash); refresh dilewati bila tidak ada yang berubah."""
+    payload = {
+        "stage": stage,
+        "features": features,
+        "plan": [[key, sorted(fields.values()), versions[key]] for key, fields in plan],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def refresh_predictions(cm_ids=None, force=False):
+    """
+    Hitung ulang prediksi tersimpan untuk ContainerMovement tertentu (None = semua).
+    Record yang input dan modelnya tidak berubah sejak refresh terakhir dilewati kecuali force=True.
+    Tiap model dipanggil sekali untuk semua record yang membutuhkannya.
+    Mengembalikan {"refreshed": n, "skipped": n, "errors": n}.
+    """
+    query = db.session.query(ContainerMovement, Voyage, Vessel.name, Port.name)\
+        .join(Voyage, Voyage.id == ContainerMovement.voyage_id)\
+        .outerjoin(Vessel, Voyage.vessel_id == Vessel.id)\
+        .outerjoin(Port, Voyage.port_id == Port.id)
+    if cm_ids is not None:
+        if not cm_ids:
+            return {"refreshed": 0, "skipped": 0, "errors": 0}
+        query = query.filter(ContainerMovement.id.in_(list(cm_ids)))
+    rows = query.all()
+
+    existing = {
+        p.cm_id: p for p in ContainerMovementPrediction.query.filter(
+            ContainerMovementPrediction.cm_id.in_([cm.id for cm, _, _, _ in rows])
+        ).all()
+    } if rows else {}
+
+    # Versi tiap model sekali per refresh, tanpa memuat model: record yang dilewati tidak
+    # memicu load (dan eviction LRU) model sama sekali
+    versions = {key: model_registry.version(key) for key in model_targets}
+    batches = {}    # model_key -> list of (prediction row, features, fields)
+    touched = []
+    skipped = 0
+    for cm, voyage, vessel_name, port_name in rows:
+        stage = _stage_for(cm)
+        features = _features(cm, vessel_name, port_name, voyage)
+        plan = _plan(cm, stage)
+        input_hash = _input_hash(stage, features, plan, versions)
+
+        pred = existing.get(cm.id)
+        if pred is None:
+            pred = ContainerMovementPrediction(cm_id=cm.id)
+            db.session.add(pred)
+        elif not force and pred.status != 'error' and pred.input_hash == input_hash:
+            pred.status = 'fresh'
+            skipped += 1
+            continue
+
+        for field in PREDICTED_FIELDS:
+            setattr(pred, field, None)
+        pred.stage = stage
+        pred.input_hash = input_hash
+        pred.error = None
+        pred.status = 'fresh'
+        pred.computed_at = datetime.now()
+        touched.append(pred)
+        for model_key, fields in plan:
+            batches.setdefault(model_key, []).append((pred, features, fields))
+
+    errors = {}
+    for model_key, items in batches.items():
+        try:
+            predictions, invalid = predict_records(model_key, [features for _, features, _ in items])
+        except Exception as e:
+            predictions, invalid = [None] * len(items), {i: str(e) for i in range(len(items))}
+        for pos, (pred, _, fields) in enumerate(items):
+            if pos in invalid:
+                errors.setdefault(pred.cm_id, []).append(f"{model_key}: {invalid[pos]}")
+                continue
+            for target, field in fields.items():
+                setattr(pred, field, predictions[pos][target])
+
+    for pred in touched:
+        if pred.cm_id in errors:
+            pred.status = 'error'
+            pred.error = "; ".join(errors[pred.cm_id])
+    db.session.commit()
+    return {"refreshed": len(touched), "skipped": skipped, "errors": len(errors)}
+
+
+def enqueue_prediction_refresh(cm):
+    """
+    Tandai prediksi tersimpan milik `cm` sebagai 'stale' (ikut transaksi pemanggil) dan
+    antrekan job refresh (lihat jobs.py). PREDICTION_REFRESH_ENABLED=0 mematikannya.
+    """
+    if not current_app.config.get('PREDICTION_REFRESH_ENABLED', True):
+        return None
+    ContainerMovementPrediction.query.filter_by(cm_id=cm.id)\
+        .update({"status": "stale"}, synchronize_session=False)
+    return enqueue_job('prediction_refresh', f"cm:{cm.id}", {"cm_ids": [cm.id]})
+
+
+@job_handler('prediction_refresh')
+def _prediction_refresh_job(payload):
+    refresh_predictions(payload["cm_ids"])
+
+
+@click.command('refresh-predictions')
+@click.option('--all', 'refresh_all', is_flag=True, help='Hitung ulang semua record, bukan hanya yang stale/berubah.')
+@with_appcontext
+def refresh_predictions_command(refresh_all):
+    """Hitung prediksi tersimpan untuk semua ContainerMovement (backfill / sisa stale)."""
+    result = refresh_predictions(force=refresh_all)
+    click.echo(f"Prediksi diperbarui: {result['refreshed']}, dilewati: {result['skipped']}, error: {result['errors']}")
@@ -0,0 +1,242 @@
+# Blocklist JWT (logout) yang dibagi semua worker: store bersama (tabel revoked_tokens atau
+# Redis) + front cache per worker, entri kedaluwarsa bersama klaim `exp` token-nya.
+
+import heapq
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, select
+
+from . import db
+from .models import RevokedToken
+
+# Sinkronisasi inkremental membaca ulang entri sejak (sinkron terakhir - overlap), supaya
+# logout dari transaksi yang commit belakangan / jam worker yang sedikit berbeda tidak terlewat
+SYNC_OVERLAP_SECONDS = 30
+
+
+class DatabaseStore:
+    """Store di tabel revoked_tokens; selalu lewat engine primary, di luar session request."""
+
+    table = RevokedToken.__table__
+
+    def add(self, jti, exp):
+        values = {'jti': jti, 'expires_at': datetime.fromtimestamp(exp), 'revoked_at': datetime.now()}
+        with db.engine.begin() as connection:
+            dialect = connection.dialect.name
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            elif dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                dialect_insert = None
+            # jti yang sama bisa di-logout dua kali (request ganda ke worker berbeda)
+            if dialect_insert is not None:
+                connection.execute(dialect_insert(self.table).values(**values).on_conflict_do_nothing())
+            elif connection.execute(select(self.table.c.jti).where(self.table.c.jti == jti)).first() is None:
+                connection.execute(self.table.insert().values(**values))
+
+    def _rows(self, query):
+        with db.engine.connect() as connection:
+            return [(jti, expires_at.timestamp()) for jti, expires_at in connection.execute(query)]
+
+    def load_all(self, now, limit):
+        t = self.table
+        return self._rows(
+            select(t.c.jti, t.c.expires_at)
+            .where(t.c.expires_at > datetime.fromtimestamp(now))
+            .order_by(t.c.expires_at.desc())
+            .limit(limit)
+        )
+
+    def changes_since(self, since, now):
+        t = self.table
+        return self._rows(
+            select(t.c.jti, t.c.expires_at)
+            .where(t.c.revoked_at >= datetime.fromtimestamp(since), t.c.expires_at > datetime.fromtimestamp(now))
+        )
+
+    def contains(self, jti, now):
+        t = self.table
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(t.c.jti).where(t.c.jti == jti, t.c.expires_at > datetime.fromtimestamp(now))
+            ).first() is not None
+
+    def purge(self, now):
+        with db.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.expires_at <= datetime.fromtimestamp(now)))
+
+
+class RedisStore:
+    """
+    Store di Redis (atau server yang kompatibel protokol Redis); butuh paket `redis`.
+    Satu key per jti dengan EXPIREAT = exp untuk cek langsung, plus sorted set
+    (skor = waktu logout) untuk sinkronisasi inkremental, dipangkas setelah `retention` detik
+    (umur token terpanjang).
+    """
+
+    def __init__(self, url, retention, prefix='shipos:blocklist'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("TOKEN_BLOCKLIST_BACKEND=redis membutuhkan paket 'redis' (pip install redis).") from e
+        self.client = redis.Redis.from_url(url)
+        self.retention = retention
+        self.prefix = prefix
+        self.log_key = f"{prefix}:log"
+
+    def add(self, jti, exp):
+        now = time.time()
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(f"{self.prefix}:jti:{jti}", 1, exat=int(exp) + 1)
+        pipe.zadd(self.log_key, {f"{jti}|{int(exp)}": now})
+        pipe.execute()
+
+    def _rows(self, members, now):
+        rows = []
+        for member in members:
+            jti, _, exp = member.decode('utf-8').rpartition('|')
+            if int(exp) > now:
+                rows.append((jti, int(exp)))
+        return rows
+
+    def load_all(self, now, limit):
+        return self._rows(self.client.zrangebyscore(self.log_key, now - self.retention, '+inf'), now)[:limit]
+
+    def changes_since(self, since, now):
+        return self._rows(self.client.zrangebyscore(self.log_key, since, '+inf'), now)
+
+    def contains(self, jti, now):
+        return bool(self.client.exists(f"{self.prefix}:jti:{jti}"))
+
+    def purge(self, now):
+        self.client.zremrangebyscore(self.log_key, '-inf', now - self.retention)
+
+
+def create_store(name, url=None, retention=30 * 24 * 3600):
+    if name == 'database':
+        return DatabaseStore()
+    if name == 'redis':
+        return RedisStore(url or 'redis://localhost:6379/0', retention)
+    if name == 'memory':
+        # Hanya di proses ini (logout tidak berlaku di worker lain), untuk development
+        return None
+    raise ValueError(f"TOKEN_BLOCKLIST_BACKEND tidak dikenal: {name}")
+
+
+class TokenBlocklist:
+    """
+    Front cache per worker di depan store bersama.
+
+    - is_revoked(jti) = satu lookup dict; paling sering sekali tiap `sync_seconds` thread
+      pertama yang lewat menarik logout baru dari store (logout di worker lain berlaku
+      paling lambat `sync_seconds` kemudian, di worker yang sama langsung).
+    - Entri dibuang saat token-nya kedaluwarsa (heap per `exp`), jadi ukurannya mengikuti
+      jumlah logout dalam umur token, bukan sejak proses berjalan. Di atas `max_entries`
+      sisa entri tidak disimpan di memori dan lookup yang tidak ketemu dicek ke store.
+    """
+
+    def __init__(self, store=None, sync_seconds=2.0, max_entries=100000, purge_seconds=300):
+        self.configure(store, sync_seconds, max_entries, purge_seconds)
+
+    def configure(self, store, sync_seconds=2.0, max_entries=100000, purge_seconds=300):
+        self.store = store
+        self.sync_seconds = sync_seconds
+        self.max_entries = max_entries
+        self.purge_seconds = purge_seconds
+        self._revoked = {}
+        self._expiry = []
+        self._complete = True
+        self._since = None
+        self._next_sync = 0.0
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_sync:
+            self._sync()
+        if jti in self._revoked:
+            return True
+        return not self._complete and self.store is not None and self.store.contains(jti, time.time())
+
+    def revoke(self, jti, exp):
+        if self.store is not None:
+            self.store.add(jti, exp)
+        with self._lock:
+            self._remember(jti, exp)
+
+    def _remember(self, jti, exp):
+        if jti in self._revoked:
+            return
+        if len(self._revoked) >= self.max_entries:
+            self._complete = False
+            return
+        self._revoked[jti] = exp
+        heapq.heappush(self._expiry, (exp, jti))
+
+    def _expire(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry)
+            del self._revoked[jti]
+        # Setelah cukup banyak entri kedaluwarsa, muat ulang penuh supaya kembali lengkap
+        if not self._complete and len(self._revoked) < self.max_entries * 0.9:
+            self._since = None
+
+    def _sync(self):
+        # Muatan awal ditunggu semua thread (jangan menerima token yang sudah logout);
+        # sinkron berikutnya cukup satu thread, yang lain memakai isi cache yang ada
+        if not self._lock.acquire(blocking=self._since is None):
+            return
+        try:
+            if time.monotonic() < self._next_sync:
+                return
+            now = time.time()
+            try:
+                self._pull(now)
+            except Exception as e:
+                print(f"[AUTH] Sinkronisasi blocklist token gagal: {e}")
+            self._expire(now)
+            self._next_sync = time.monotonic() + self.sync_seconds
+        finally:
+            self._lock.release()
+
+    def _pull(self, now):
+        if self.store is None:
+            self._since = now
+            return
+        if self._since is None:
+            rows = self.store.load_all(now, limit=self.max_entries + 1)
+            self._complete = True
+        else:
+            rows = self.store.changes_since(self._since - SYNC_OVERLAP_SECONDS, now)
+        for jti, exp in rows:
+            self._remember(jti, exp)
+        self._since = now
+        if time.monotonic() >= self._next_purge:
+            self.store.purge(now)
+            self._next_purge = time.monotonic() + self.purge_seconds
+
+    def stats(self):
+        return {
+            "backend": type(self.store).__name__ if self.store else None,
+            "entries": len(self._revoked),
+            "complete": self._complete,
+        }
+
+
+blocklist = TokenBlocklist()
+
+
+def init_token_blocklist(app):
+    store = create_store(
+        app.config['TOKEN_BLOCKLIST_BACKEND'],
+        url=app.config['TOKEN_BLOCKLIST_URL'],
+        retention=int(app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds()),
+    )
+    blocklist.configure(
+        store,
+        sync_seconds=app.config['TOKEN_BLOCKLIST_SYNC_SECONDS'],
+        max_entries=app.config['TOKEN_BLOCKLIST_MAX_ENTRIES'],
+    )
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+
+class UnsupportedModel(Exception):
+    """Estimator tidak berbentuk Pipeline(ColumnTransformer -> RandomForest) yang bisa dikompilasi."""
+
+
+class CompiledForest:
+    """
+    Semua pohon RandomForestRegressor digabung menjadi satu set array numpy datar
+    (feature, threshold, children, value) lalu ditelusuri secara vektor untuk
+    semua (pohon, baris) sekaligus.
+
+    Hasilnya identik dengan forest.predict: input di-cast ke float32 seperti sklearn,
+    threshold dibandingkan sebagai float64, dan prediksi per pohon dijumlahkan
+    berurutan sebelum dibagi jumlah pohon.
+    """
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        if not trees:
+            raise UnsupportedModel("Forest tidak punya estimator.")
+
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+        total = int(offsets[-1])
+        self.n_trees = len(trees)
+        self.n_outputs = int(forest.n_outputs_)
+        self.max_depth = max(int(t.max_depth) for t in trees)
+        self.roots = offsets[:-1].astype(np.int64)
+
+        self.feature = np.zeros(total, dtype=np.int64)
+        self.threshold = np.zeros(total, dtype=np.float64)
+        self.children = np.zeros(2 * total, dtype=np.int64)
+        self.value = np.zeros((total, self.n_outputs), dtype=np.float64)
+
+        for tree, start, end in zip(trees, offsets[:-1], offsets[1:]):
+            idx = np.arange(start, end)
+            left = tree.children_left
+            right = tree.children_right
+            is_leaf = left == -1
+            # Daun menunjuk ke dirinya sendiri supaya iterasi sampai max_depth tetap aman
+            self.children[2 * start:2 * end:2] = np.where(is_leaf, idx, left + start)
+            self.children[2 * start + 1:2 * end:2] = np.where(is_leaf, idx, right + start)
+            self.feature[start:end] = np.where(is_leaf, 0, tree.feature)
+            self.threshold[start:end] = tree.threshold
+            self.value[start:end] = tree.value[:, :, 0]
+
+    def predict(self, X):
+        """X: array float64 (n_rows, n_features). Mengembalikan (n_rows, n_outputs)."""
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float32), dtype=np.float64)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.int64) * n_features)[None, :]
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            # children[2 * node] = kiri, children[2 * node + 1] = kanan
+            go_right = ~(flat_X[row_offset + self.feature[node]] <= self.threshold[node])
+            node = self.children[2 * node + go_right]
+
+        leaf_values = self.value[node]
+        out = np.zeros((n_rows, self.n_outputs), dtype=np.float64)
+        for t in range(self.n_trees):
+            out += leaf_values[t]
+        out /= self.n_trees
+        return out
+
+
+class CompiledPipeline:
+    """
+    Pengganti Pipeline(preprocessing=ColumnTransformer, model=RandomForestRegressor) untuk inference.
+
+    Preprocessing (SimpleImputer median untuk kolom numerik, SimpleImputer most_frequent +
+    OneHotEncoder(handle_unknown='ignore') untuk kolom kategorikal) diterapkan langsung pada
+    array numpy. Input yang tidak bisa dijamin identik (nilai kategorikal bukan string,
+    nilai numerik tidak bisa di-cast) diteruskan ke estimator aslinya.
+    """
+
+    def __init__(self, pipeline):
+        steps = getattr(pipeline, 'named_steps', None)
+        if not steps or 'preprocessing' not in steps or 'model' not in steps:
+            raise UnsupportedModel("Bukan Pipeline preprocessing -> model.")
+        forest = steps['model']
+        if not hasattr(forest, 'estimators_') or type(forest).__name__ != 'RandomForestRegressor':
+            raise UnsupportedModel("Model bukan RandomForestRegressor.")
+
+        self.estimator = pipeline
+        self.feature_names_in_ = pipeline.feature_names_in_
+        self.forest = CompiledForest(forest)
+        self.numeric_columns = []
+        self.numeric_fill = None
+        self.numeric_offset = 0
+        self.categorical_columns = []
+        self.categorical_fill = []
+        self.categorical_index = []
+
+        preprocessing = steps['preprocessing']
+        if getattr(preprocessing, 'remainder', 'drop') != 'drop':
+            raise UnsupportedModel("ColumnTransformer remainder selain 'drop' tidak didukung.")
+
+        n_features = 0
+        for name, transformer, columns in preprocessing.transformers_:
+            if transformer == 'drop' or name == 'remainder':
+                continue
+            columns = list(columns)
+            if type(transformer).__name__ == 'SimpleImputer' and transformer.strategy in ('median', 'mean', 'constant'):
+                if self.numeric_columns:
+                    raise UnsupportedModel("Lebih dari satu blok numerik.")
+                self.numeric_columns = columns
+                self.numeric_offset = n_features
+                self.numeric_fill = transformer.statistics_.astype(np.float64)
+                n_features += len(columns)
+            elif type(transformer).__name__ == 'Pipeline':
+                imputer = transformer.named_steps.get('imputer')
+                onehot = transformer.named_steps.get('onehot')
+                if imputer is None or onehot is None or onehot.drop is not None \
+                        or onehot.handle_unknown != 'ignore' \
+                        or getattr(onehot, 'infrequent_categories_', None) is not None:
+                    raise UnsupportedModel("Blok kategorikal tidak didukung.")
+                if self.categorical_columns:
+                    raise UnsupportedModel("Lebih dari satu blok kategorikal.")
+                self.categorical_columns = columns
+                self.categorical_fill = list(imputer.statistics_)
+                for categories in onehot.categories_:
+                    self.categorical_index.append({c: n_features + i for i, c in enumerate(categories)})
+                    n_features += len(categories)
+            else:
+                raise UnsupportedModel(f"Transformer '{name}' tidak didukung.")
+
+        if n_features != forest.n_features_in_:
+            raise UnsupportedModel("Jumlah fitur hasil preprocessing tidak cocok dengan model.")
+        self.n_features = n_features
+
+    def _transform(self, input_df):
+        n_rows = len(input_df)
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+
+        if self.numeric_columns:
+            num = input_df[self.numeric_columns].to_numpy()
+            num = num.astype(np.float64)
+            missing = np.isnan(num)
+            if missing.any():
+                num = np.where(missing, self.numeric_fill, num)
+            X[:, self.numeric_offset:self.numeric_offset + len(self.numeric_columns)] = num
+
+        for j, column in enumerate(self.categorical_columns):
+            values = input_df[column].to_numpy(dtype=object)
+            index = self.categorical_index[j]
+            fill = self.categorical_fill[j]
+            for i, value in enumerate(values):
+                if isinstance(value, float) and value != value:
+                    value = fill
+                elif not isinstance(value, str):
+                    raise TypeError("nilai kategorikal bukan string")
+                col = index.get(value)
+                if col is not None:
+                    X[i, col] = 1.0
+        return X
+
+    def predict(self, X):
+        """Menerima DataFrame (atau list dict) dengan kolom feature_names_in_, sama seperti Pipeline.predict."""
+        input_df = X if isinstance(X, pd.DataFrame) else pd.DataFrame.from_records(X)
+        try:
+            features = self._transform(input_df)
+        except (TypeError, ValueError, KeyError):
+            # Biarkan sklearn yang memproses (dan melempar error yang sama seperti sebelumnya)
+            return self.estimator.predict(input_df)
+
+        prediction = self.forest.predict(features)
+        if self.forest.n_outputs == 1:
+            return prediction[:, 0]
+        return prediction
+
+
+def compile_model(model):
+    """Kompilasi estimator bila bisa; jika tidak, kembalikan estimator apa adanya."""
+    try:
+        return CompiledPipeline(model)
+    except UnsupportedModel as e:
+        print(f"  [WARN] Model tidak dikompilasi: {e}")
+        return model
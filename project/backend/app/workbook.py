@@ -0,0 +1,248 @@
+# Ingest workbook operasional ("Ship Operation Data 2024-25.xlsx") langsung ke importer,
+# tanpa konversi manual ke CSV: header 4 baris diratakan dan data dibersihkan dengan aturan
+# yang sama seperti EDA-Model/cleaning.ipynb, dibaca streaming per potongan baris.
+
+import re
+import time
+import zipfile
+from collections import Counter
+from datetime import date, datetime
+
+import pandas as pd
+
+from .importer import MAX_REPORTED_ERRORS, ImportFileError, import_frame, parse_frame, sync_frame
+from .ship_csv import CSV_DATE_FORMAT
+
+# Baris header bertingkat di atas data (judul grup / TOTAL / EMPTY-FULL / 20 DC-40 HC)
+HEADER_ROWS = 4
+
+PORT_HEADER = 'BERTH LOCATION'
+DATE_HEADER = 'Date Berth'
+
+# Tanggal yang diketik sebagai teks di workbook, mis. "08/05/2024 18.00"
+WORKBOOK_DATE_FORMAT = '%d/%m/%Y %H.%M'
+
+# Sel error formula Excel; pd.read_excel (dan jadi CSV hasil notebook) membacanya sebagai kosong
+EXCEL_ERRORS = frozenset(('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'))
+
+
+def require_openpyxl():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Impor Excel membutuhkan paket 'openpyxl' (pip install openpyxl).") from e
+
+
+def is_workbook(filename):
+    return bool(filename) and filename.lower().endswith(('.xlsx', '.xlsm'))
+
+
+def flatten_headers(rows):
+    """
+    Header bertingkat -> satu nama per kolom, sama dengan pd.read_excel(header=[0, 1, 2, 3])
+    lalu penggabungan di cleaning.ipynb: sel gabungan diisi ke kanan selama masih di bawah
+    grup induk yang sama, bagian kosong dibuang, sisanya digabung dengan '_'.
+    Nama kembar diberi akhiran .1, .2, ... seperti saat CSV hasil notebook dibaca pandas.
+    """
+    width = max((len(row) for row in rows), default=0)
+    rows = [list(row) + [None] * (width - len(row)) for row in rows]
+
+    # Forward-fill per baris header seperti pandas (_fill_mi_header)
+    control = [True] * width
+    for row in rows:
+        last = row[0] if width else None
+        for i in range(1, width):
+            if not control[i]:
+                last = row[i]
+            if row[i] is None or row[i] == '':
+                row[i] = last
+            else:
+                control[i] = False
+                last = row[i]
+
+    names = []
+    counts = Counter()
+    for parts in zip(*rows):
+        name = '_'.join(str(part) for part in parts if part is not None and part != '').strip()
+        if counts[name]:
+            unique = f"{name}.{counts[name]}"
+            while unique in counts:
+                counts[name] += 1
+                unique = f"{name}.{counts[name]}"
+            counts[name] += 1
+            name = unique
+        counts[name] += 1
+        names.append(name)
+    return names
+
+
+def clean_port(value):
+    """CELEBES107 / 'MSA 210' / 'adp ' -> CELEBES / MSA / ADP (aturan cleaning.ipynb)."""
+    if value is None:
+        return ''
+    return re.sub(r'\d+', '', str(value).upper().strip()).strip()
+
+
+def clean_date(value):
+    """
+    Sel Date Berth -> teks CSV_DATE_FORMAT, atau '' bila kosong/tidak dikenali (baris
+    dilaporkan importer). Sel tanggal Excel dipakai apa adanya; teks dicoba dengan format
+    'dd/mm/yyyy HH.MM' lalu parser pandas dengan dayfirst.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    elif value is None or str(value).strip() == '':
+        return ''
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.strptime(text, WORKBOOK_DATE_FORMAT)
+        except ValueError:
+            parsed = pd.to_datetime(text, dayfirst=True, errors='coerce')
+            if pd.isna(parsed):
+                return ''
+    # Tahun salah ketik (0204, 3034) tetap diteruskan; importer menolaknya karena di luar
+    # rentang tanggal pandas, sama seperti baris yang dibuang notebook
+    return parsed.strftime(CSV_DATE_FORMAT)
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime(CSV_DATE_FORMAT)
+    return str(value)
+
+
+def clean_rows(columns, rows):
+    """Potongan baris mentah workbook -> DataFrame teks (layout CSV) siap untuk importer."""
+    # Transpose langsung (bukan DataFrame.from_records) supaya kolom angka yang berisi sel
+    # kosong tidak berubah jadi float/NaN sebelum dijadikan teks
+    cleaned = {}
+    for name, values in zip(columns, zip(*rows)):
+        values = [None if value in EXCEL_ERRORS else value for value in values]
+        if name == PORT_HEADER:
+            cleaned[name] = [clean_port(value) for value in values]
+        elif name == DATE_HEADER:
+            cleaned[name] = [clean_date(value) for value in values]
+        else:
+            cleaned[name] = [_cell_text(value) for value in values]
+    return pd.DataFrame(cleaned)
+
+
+def workbook_chunks(source, chunk_rows):
+    """
+    Baca sheet pertama secara streaming (openpyxl read_only) dan hasilkan
+    (nomor baris Excel pertama, nama kolom, baris mentah) per `chunk_rows` baris, jadi
+    memori tetap sebesar satu potongan berapa pun ukuran workbook. Baris kosong di akhir
+    sheet diabaikan; baris kosong di tengah ikut diteruskan (dilaporkan importer).
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(source, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ImportFileError("File bukan workbook Excel (.xlsx) yang valid") from e
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        columns = flatten_headers([next(rows, ()) for _ in range(HEADER_ROWS)])
+        width = len(columns)
+        first_row = HEADER_ROWS + 1
+        chunk, blanks = [], []
+        for row in rows:
+            if all(value is None for value in row):
+                blanks.append((None,) * width)
+                continue
+            chunk.extend(blanks)
+            blanks.clear()
+            chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(chunk) >= chunk_rows:
+                yield first_row, columns, chunk
+                first_row += len(chunk)
+                chunk = []
+        if chunk:
+            yield first_row, columns, chunk
+    finally:
+        workbook.close()
+
+
+def _timed_chunks(source, chunk_rows, stages):
+    """workbook_chunks + clean_rows, dengan durasi baca (read) dan bersih (clean) dicatat."""
+    chunks = workbook_chunks(source, chunk_rows)
+    while True:
+        started = time.perf_counter()
+        item = next(chunks, None)
+        stages['read'] += time.perf_counter() - started
+        if item is None:
+            return
+        first_row, columns, rows = item
+        started = time.perf_counter()
+        frame = clean_rows(columns, rows)
+        stages['clean'] += time.perf_counter() - started
+        yield first_row, frame
+
+
+def _merge_report(total, report):
+    for key, value in report.items():
+        if key == 'errors':
+            room = MAX_REPORTED_ERRORS - len(total['errors'])
+            total['errors'].extend(value[:max(room, 0)])
+        elif key == 'warnings':
+            total['warnings'].update(value)
+        elif key == 'stages':
+            for stage, seconds in value.items():
+                total['stages'][stage] += seconds
+        elif isinstance(value, int) and not isinstance(value, bool):
+            total[key] = total.get(key, 0) + value
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def import_workbook(source, sync=False, strict=False, batch_size=1000, chunk_rows=10000,
+                    enqueue_derived=True):
+    """
+    Impor workbook operasional (path atau file object .xlsx) lewat importer bulk, satu
+    transaksi per potongan `chunk_rows` baris. sync=True memakai sync_frame (upsert).
+    strict=True memvalidasi seluruh workbook dulu dan tidak menulis apa pun bila ada error.
+    Laporan sama seperti import_frame/sync_frame, dengan `stages` ditambah read dan clean.
+    """
+    require_openpyxl()
+    started = time.perf_counter()
+    stages = Counter()
+    total = {"errors": [], "warnings": Counter(), "stages": stages}
+
+    if strict:
+        for first_row, frame in _timed_chunks(source, chunk_rows, stages):
+            _, errors, _ = parse_frame(frame, first_row=first_row)
+            _merge_report(total, {"rows": len(frame), "errors": errors, "error_count": len(errors)})
+        if total.get("error_count"):
+            total.update({"imported": 0, "skipped": total["rows"], "aborted": True})
+            return _finish(total, started)
+        total = {"errors": [], "warnings": Counter(), "stages": stages}
+        _rewind(source)
+
+    key_counts = Counter() if sync else None
+    for first_row, frame in _timed_chunks(source, chunk_rows, stages):
+        options = {'batch_size': batch_size, 'enqueue_derived': enqueue_derived, 'first_row': first_row}
+        report = sync_frame(frame, key_counts=key_counts, **options) if sync else import_frame(frame, **options)
+        _merge_report(total, report)
+
+    if "rows" not in total:
+        raise ImportFileError("Workbook tidak berisi baris data")
+    return _finish(total, started)
+
+
+def _finish(total, started):
+    seconds = time.perf_counter() - started
+    total["warnings"] = dict(total["warnings"])
+    total["stages"] = {stage: round(value, 4) for stage, value in total["stages"].items()}
+    total.setdefault("imported", 0)
+    total["seconds"] = round(seconds, 4)
+    total["rows_per_sec"] = round(total["rows"] / seconds, 1) if seconds > 0 else None
+    return total
@@ -0,0 +1,104 @@
+"""
+Benchmark throughput login (bcrypt) lewat POST /auth/login.
+
+Jalankan dari folder backend:
+    python benchmarks/bench_login.py [--rounds 12] [--threads 8] [--logins 64]
+
+Memakai database SQLite in-memory dan test client Flask dengan `--threads` klien
+bersamaan. Melaporkan login/detik total dan per core (core yang boleh dipakai proses ini),
+latency p50/p99, jumlah yang ditolak admission control (503), serta verifikasi bcrypt
+mentah di satu thread sebagai batas atas per core.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=None, help='PASSWORD_HASH_WORKERS (default: jumlah core)')
+    parser.add_argument('--max-queue', type=int, default=None, help='PASSWORD_HASH_MAX_QUEUE (default: --threads)')
+    args = parser.parse_args()
+
+    cores = available_cores()
+    os.environ.update({
+        'DATABASE_URL': 'sqlite://',
+        'BCRYPT_LOG_ROUNDS': str(args.rounds),
+        'PASSWORD_HASH_WORKERS': str(args.workers or cores),
+        'PASSWORD_HASH_MAX_QUEUE': str(args.threads if args.max_queue is None else args.max_queue),
+        'MODEL_PRELOAD': '0',
+    })
+    from app import create_app, db  # noqa: E402
+    from app.passwords import password_hasher  # noqa: E402
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/auth/register', json={'username': 'bench', 'password': 'bench-pass', 'email': 'bench@x'})
+
+    with app.app_context():
+        from app.models import User
+        pw_hash = User.query.filter_by(email='bench@x').first().password_hash
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        password_hasher._verify(pw_hash, 'bench-pass', args.rounds)
+        samples.append(time.perf_counter() - started)
+    raw = float(np.median(samples))
+
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    remaining = iter(range(args.logins))
+
+    def run():
+        local = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            status = local.post('/auth/login', json={'email': 'bench@x', 'password': 'bench-pass'}).status_code
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+
+    threads = [threading.Thread(target=run) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = statuses.count(200)
+    rejected = statuses.count(503)
+    used = min(cores, password_hasher.workers)
+    ms = np.array(latencies) * 1000.0
+    print(f"cores={cores} rounds={args.rounds} hash_workers={password_hasher.workers} "
+          f"max_queue={password_hasher.max_queue} client_threads={args.threads}")
+    print(f"bcrypt verify (1 thread): {raw * 1000:.1f} ms -> {1 / raw:.2f} login/s per core (batas atas)")
+    print(f"login: {ok} ok, {rejected} ditolak (503), {len(statuses) - ok - rejected} lainnya dalam {elapsed:.2f}s")
+    print(f"throughput: {ok / elapsed:.2f} login/s total, {ok / elapsed / used:.2f} login/s per core")
+    print(f"latency: p50 {np.percentile(ms, 50):.0f} ms, p99 {np.percentile(ms, 99):.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark inference sklearn vs engine terkompilasi (app/tree_inference.py).
+
+Jalankan dari folder backend:
+    python benchmarks/bench_tree_inference.py [--repeat 200]
+
+Untuk tiap model yang ada di ml_models/, mengukur latency p50/p99 untuk 1 baris
+dan batch 1.000 baris, lalu memastikan hasil kedua engine identik.
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.prediction_routes import model_files, CATEGORICAL_FEATURES  # noqa: E402
+from app.tree_inference import CompiledPipeline  # noqa: E402
+
+DATA_FILE = os.path.join(os.path.dirname(BACKEND_DIR), 'data', 'Ship_Operation_Data_Cleaned.csv')
+
+
+def load_rows():
+    df = pd.read_csv(DATA_FILE)
+    for col in df.columns:
+        if col not in CATEGORICAL_FEATURES:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def percentiles(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples = np.array(samples) * 1000.0
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = load_rows()
+    print(f"{'model':32} {'rows':>5} {'sklearn p50':>12} {'p99':>8} {'compiled p50':>13} {'p99':>8} {'speedup':>8} identical")
+
+    for key, rel_path in model_files.items():
+        path = os.path.join(BACKEND_DIR, 'ml_models', rel_path)
+        if not os.path.exists(path):
+            continue
+        model = joblib.load(path)
+        compiled = CompiledPipeline(model)
+        features = rows[list(model.feature_names_in_)]
+
+        batch = features.sample(n=args.batch, replace=True, random_state=0).reset_index(drop=True)
+        assert np.array_equal(model.predict(batch), compiled.predict(batch)), key
+
+        for label, frame in (('1', features.iloc[[0]]), (str(args.batch), batch)):
+            repeat = args.repeat if label == '1' else max(args.repeat // 10, 10)
+            sk50, sk99 = percentiles(lambda: model.predict(frame), repeat)
+            cp50, cp99 = percentiles(lambda: compiled.predict(frame), repeat)
+            print(f"{key:32} {label:>5} {sk50:10.3f}ms {sk99:6.3f}ms {cp50:11.3f}ms {cp99:6.3f}ms {sk50 / cp50:7.1f}x yes")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,7 +12,8 @@ echo " Database is ready! Running migrations..."
 # Jalankan migrasi setiap kali container start (aman)
 flask db upgrade || true
 
-# Jalankan clean-db & seed hanya sekali (kalau belum pernah)
+# Jalankan clean-db & seed hanya sekali (kalau belum pernah). Data CSV baru untuk database
+# yang sudah berisi dimasukkan manual oleh operator: `flask seed --sync` lalu `flask run-jobs`
 if [ ! -f /app/.initialized ]; then
   echo " First-time setup: cleaning & seeding database..."
   flask clean-db || true
@@ -22,5 +23,7 @@ else
   echo " Database already initialized — skipping clean & seed."
 fi
 
-echo "[START] Starting Flask app..."
-exec python run.py
\ No newline at end of file
+# Default (CMD Dockerfile): gunicorn pre-fork dengan gunicorn.conf.py.
+# Untuk development: `docker compose run backend python run.py`
+echo "[START] Starting: $*"
+exec "$@"
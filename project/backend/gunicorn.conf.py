@@ -0,0 +1,79 @@
+# Konfigurasi gunicorn untuk produksi: `gunicorn -c gunicorn.conf.py` (app: run:app)
+import glob
+import multiprocessing
+import os
+
+wsgi_app = 'run:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Worker pre-fork x thread: satu model.predict / query agregat yang lambat hanya memakai
+# satu thread, request lain tetap dilayani thread/worker lain.
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# gthread yang menyelesaikan koneksi yang sudah di-accept sebelum keluar (gunicorn_worker.py)
+worker_class = 'gunicorn_worker.DrainingThreadWorker'
+
+# Request terlama yang masih wajar (impor/ekspor besar); worker yang macet lebih lama di-restart
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# Saat reload/stop, worker lama berhenti menerima koneksi baru dan diberi waktu ini untuk
+# menyelesaikan request yang sedang berjalan
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Worker diganti berkala (dengan jitter supaya tidak bersamaan) untuk membatasi fragmentasi memori
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# Heartbeat worker di tmpfs (di Docker /tmp bisa overlayfs yang lambat)
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+# X-Forwarded-For/-Proto hanya dipercaya dari alamat ini (default gunicorn: 127.0.0.1). Port
+# 5000 terbuka langsung, jadi '*' membuat klien mana pun bisa memalsukan remote_addr/scheme.
+# Di belakang reverse proxy isi alamat IP proxy itu (dipisah koma; gunicorn 23 tidak menerima
+# subnet), mis. FORWARDED_ALLOW_IPS=172.18.0.10 untuk container proxy di docker compose.
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# App (dan model ML) dimuat sekali di proses master lalu di-fork ke worker,
+# sehingga memori model dibagi antar worker lewat copy-on-write.
+preload_app = True
+os.environ.setdefault('MODEL_PRELOAD', '1')
+
+# Metrik Prometheus multi-proses: tiap worker menulis file mmap di sini, /metrics menjumlahkan
+# semuanya. Harus diset sebelum app (prometheus_client) dimuat.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    '/dev/shm/shipos-metrics' if os.path.isdir('/dev/shm') else '/tmp/shipos-metrics',
+)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+# Reload tanpa memutus request:
+# - `kill -HUP <master>`: worker baru dijalankan dari app yang sudah dimuat master, worker
+#   lama menyelesaikan request yang sedang berjalan (graceful_timeout) lalu berhenti.
+# - Kode/model baru (preload_app): `kill -USR2 <master>` menjalankan master baru di samping
+#   yang lama, setelah /readyz master baru 200 kirim `kill -QUIT <master lama>`.
+
+
+def on_starting(server):
+    # Sekali per master (bukan saat HUP): buang nilai metrik dari proses sebelumnya
+    for path in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    # Gauge 'live' worker yang berhenti tidak ikut dijumlahkan lagi; counter/histogram-nya tetap
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Koneksi pool (primary dan replica) yang (mungkin) dibuka master saat preload tidak
+    # boleh dipakai bersama antar proses; buang tanpa menutup socket milik proses lain.
+    from app import db
+
+    flask_app = server.app.wsgi()
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
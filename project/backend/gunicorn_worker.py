@@ -0,0 +1,43 @@
+import time
+
+from gunicorn.workers.gthread import ThreadWorker
+
+
+class DrainingThreadWorker(ThreadWorker):
+    """
+    Worker gthread yang tidak memutus koneksi saat reload/stop graceful (SIGTERM).
+
+    ThreadWorker bawaan keluar dari event loop begitu menerima SIGTERM; koneksi yang sudah
+    di-accept tetapi request-nya belum dibaca ikut tertutup dan client mendapat
+    "connection reset". Di sini SIGTERM hanya menghentikan accept: loop tetap berjalan
+    sampai koneksi tersebut diserahkan ke thread pool (maksimal graceful_timeout), lalu
+    ThreadWorker.run menunggu request yang sedang diproses seperti biasa.
+    """
+
+    def init_process(self):
+        self.draining_since = None
+        super().init_process()
+
+    def handle_exit(self, sig, frame):
+        if self.draining_since is None:
+            self.draining_since = time.monotonic()
+
+    def murder_keepalived(self):
+        # Dipanggil tiap putaran event loop, jadi dipakai juga untuk memeriksa proses drain
+        super().murder_keepalived()
+        if self.draining_since is not None:
+            self._drain()
+
+    def _drain(self):
+        with self._lock:
+            for sock in self.sockets:
+                try:
+                    self.poller.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+            idle = {conn.sock for conn in self._keep}
+            # Koneksi keep-alive yang menganggur boleh ditutup; yang baru di-accept belum
+            expired = time.monotonic() - self.draining_since > self.cfg.graceful_timeout
+            waiting = [key for key in self.poller.get_map().values() if key.fileobj not in idle]
+        if not waiting or expired:
+            self.alive = False
@@ -0,0 +1,81 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app, db  # noqa: E402
+from app.models import ContainerMovement, Port, Vessel, Voyage  # noqa: E402
+
+# Database SQLite in-memory per app; layanan luar (Redis, model, metrik) tidak dipakai
+TEST_ENV = {
+    'DATABASE_URL': 'sqlite://',
+    # Tanpa ETag: tiap request benar-benar membaca data dari database
+    'HTTP_CACHE_ENABLED': '0',
+    # Blocklist JWT di memori: sinkronisasi ke tabel revoked_tokens tidak ikut terhitung
+    'TOKEN_BLOCKLIST_BACKEND': 'memory',
+    'METRICS_ENABLED': '0',
+    'MODEL_PRELOAD': '0',
+    'JOB_MODE': 'sync',
+    'BCRYPT_LOG_ROUNDS': '4',
+}
+
+CSV_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'data', 'Ship_Operation_Data_Cleaned.csv')
+
+
+def make_app(**overrides):
+    """create_app() dengan TEST_ENV (+ override) dan semua tabel sudah dibuat."""
+    env = {**TEST_ENV, **overrides}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        app = create_app()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def app():
+    app = make_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    from flask_jwt_extended import create_access_token
+
+    return {'Authorization': f"Bearer {create_access_token(identity='test@example.com')}"}
+
+
+def add_voyage(port='ADP', vessel='V01', voyage_no='1', voyage_yr=2024, date_berth=datetime(2024, 1, 1), **counts):
+    """Voyage + ContainerMovement dengan hitungan `counts` (port/vessel dibuat bila belum ada); tidak commit."""
+    port_row = Port.query.filter_by(name=port).first() or Port(name=port, code=port)
+    vessel_row = Vessel.query.filter_by(name=vessel).first() or Vessel(name=vessel)
+    db.session.add_all([port_row, vessel_row])
+    db.session.flush()
+    voyage = Voyage(vessel_id=vessel_row.id, port_id=port_row.id, voyage_no=voyage_no,
+                    voyage_yr=voyage_yr, date_berth=date_berth)
+    db.session.add(voyage)
+    db.session.flush()
+    cm = ContainerMovement(voyage_id=voyage.id, **counts)
+    db.session.add(cm)
+    db.session.flush()
+    return cm
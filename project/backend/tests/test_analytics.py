@@ -0,0 +1,107 @@
+"""GET /analytics/voyages dibandingkan dengan agregasi Python langsung atas data uji."""
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import Port, Vessel, VoyageCostEstimation
+from conftest import add_voyage
+
+# (port, vessel, date_berth, bongkaran_empty_20dc, pengajuan_empty_20dc, final_cost)
+VOYAGES = [
+    ('ADP', 'V01', datetime(2024, 1, 5), 10, 5, 100.5),
+    ('ADP', 'V01', datetime(2024, 1, 31, 23, 0), 6, 6, None),
+    ('ADP', 'V02', datetime(2024, 3, 2), 4, None, 20.25),
+    ('BJM', 'V01', datetime(2024, 4, 1), 8, 2, 7.0),
+    ('BJM', 'V02', datetime(2024, 12, 31), 0, 0, None),
+    ('BJM', 'V02', datetime(2025, 2, 14), 12, 12, 300.0),
+]
+
+PERIOD = {
+    'month': lambda d: d.strftime('%Y-%m'),
+    'quarter': lambda d: f"{d.year}-Q{(d.month + 2) // 3}",
+    'year': lambda d: str(d.year),
+}
+
+
+@pytest.fixture
+def voyages(app):
+    for i, (port, vessel, date_berth, bongkaran, pengajuan, final_cost) in enumerate(VOYAGES):
+        cm = add_voyage(port=port, vessel=vessel, voyage_no=str(i), date_berth=date_berth,
+                        bongkaran_empty_20dc=bongkaran, pengajuan_empty_20dc=pengajuan)
+        if final_cost is not None:
+            db.session.add(VoyageCostEstimation(voyage_id=cm.voyage_id, final_cost=final_cost))
+    db.session.commit()
+
+
+def _expected(bucket, group_by, rows=VOYAGES):
+    totals = defaultdict(lambda: {'voyages': 0, 'bongkaran_20dc': 0, 'pengajuan_20dc': 0, 'final_cost': 0.0})
+    for port, vessel, date_berth, bongkaran, pengajuan, final_cost in rows:
+        key = (PERIOD[bucket](date_berth), *[{'port': port, 'vessel': vessel}[g] for g in group_by])
+        totals[key]['voyages'] += 1
+        totals[key]['bongkaran_20dc'] += bongkaran or 0
+        totals[key]['pengajuan_20dc'] += pengajuan or 0
+        totals[key]['final_cost'] += final_cost or 0
+    return dict(sorted(totals.items()))
+
+
+def _get(client, headers, query):
+    response = client.get(f'/analytics/voyages?{query}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _by_key(body, group_by):
+    data = body['data']
+    names = ['period', *[f"{g}_name" for g in group_by]]
+    return {
+        tuple(data[name][i] for name in names): {
+            metric: data[metric][i] for metric in ('voyages', 'bongkaran_20dc', 'pengajuan_20dc', 'final_cost')
+        }
+        for i in range(body['rows'])
+    }
+
+
+@pytest.mark.parametrize('bucket', ['month', 'quarter', 'year'])
+@pytest.mark.parametrize('group_by', [('port', 'vessel'), ('port',), ('vessel',), ()])
+def test_buckets_and_groups_match_python_aggregation(client, headers, voyages, bucket, group_by):
+    body = _get(client, headers, f"bucket={bucket}&group_by={','.join(group_by)}")
+    assert body['columns'][:1 + 2 * len(group_by)] == [
+        'period', *[f"{g}_{suffix}" for g in group_by for suffix in ('id', 'name')]]
+    assert _by_key(body, group_by) == _expected(bucket, group_by)
+
+
+def test_filters_and_funnel_percentages(client, headers, voyages):
+    bjm = Port.query.filter_by(name='BJM').one()
+    v02 = Vessel.query.filter_by(name='V02').one()
+    body = _get(client, headers, f"bucket=year&group_by=&from=2024-01-31&to=2024-12-31&port_id={bjm.id}")
+    assert _by_key(body, ()) == _expected('year', (), VOYAGES[3:5])
+
+    # 'to' tanpa jam mencakup seluruh hari itu
+    body = _get(client, headers, "bucket=month&group_by=&to=2024-01-31")
+    assert body['data']['voyages'] == [2]
+    assert body['data']['pct_pengajuan'] == [round(11 / 16 * 100, 2)]
+
+    body = _get(client, headers, f"bucket=year&group_by=port&vessel_id={v02.id}")
+    assert _by_key(body, ('port',)) == _expected('year', ('port',), [r for r in VOYAGES if r[1] == 'V02'])
+
+
+def test_rollup_subtotals_down_to_grand_total(client, headers, voyages):
+    body = _get(client, headers, "bucket=year&group_by=port&rollup=1")
+    rollups = {tuple(level['keys']): level for level in body['rollups']}
+    assert set(rollups) == {('period',), ()}
+    assert rollups[('period',)]['data']['period'] == ['2024', '2025']
+    assert rollups[('period',)]['data']['voyages'] == [5, 1]
+    grand = rollups[()]['data']
+    assert grand['voyages'] == [len(VOYAGES)]
+    assert grand['final_cost'] == [pytest.approx(sum(r[5] or 0 for r in VOYAGES))]
+
+    empty = _get(client, headers, "bucket=year&group_by=port&rollup=1&from=2030-01-01")
+    assert empty['rows'] == 0 and empty['rollups'][-1]['data']['voyages'] == [0]
+
+
+@pytest.mark.parametrize('query', ['bucket=week', 'group_by=port,port', 'group_by=berth', 'from=kemarin'])
+def test_invalid_parameters(client, headers, query):
+    response = client.get(f'/analytics/voyages?{query}', headers=headers)
+    assert response.status_code == 400 and 'error' in response.get_json()
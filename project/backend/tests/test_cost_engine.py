@@ -0,0 +1,152 @@
+"""Engine cost numpy dibandingkan dengan rumus per-voyage lama (loop per kategori)."""
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app import db
+from app.cost_engine import (
+    CATEGORIES, COUNT_COLUMNS, RATE_COLUMNS, RateMatrix, estimate, recompute_costs, save_voyage_cost,
+)
+from app.models import CostRate, Voyage, VoyageCostEstimation
+from conftest import add_voyage
+
+
+def _reference(values, rates):
+    """Rumus lama compute_voyage_cost (container_routes sebelum engine numpy)."""
+    def v(name):
+        try:
+            return int(values.get(name) or 0)
+        except Exception:
+            return 0
+
+    def rate(prefix, suffix):
+        return float(getattr(rates, f"{prefix}_{suffix}", 0) or 0) if rates else 0.0
+
+    def present(prefix, suffixes):
+        return any(values.get(f"{prefix}_{s}") is not None for s in suffixes)
+
+    cm_suffixes = [cm for cm, _, _ in CATEGORIES]
+    real_suffixes = [real for _, real, _ in CATEGORIES]
+    has_pengajuan = present('pengajuan', cm_suffixes)
+    has_acc = present('acc_pengajuan', cm_suffixes)
+    has_real = any(present(prefix, real_suffixes) for prefix in ('realisasi', 'shipside_yes', 'shipside_no'))
+
+    est1 = est2 = final = 0.0
+    for cm, real, suffix in CATEGORIES:
+        b, p, acc = (max(0, v(f"{prefix}_{cm}")) for prefix in ('bongkaran', 'pengajuan', 'acc_pengajuan'))
+        real_only, ship_yes, ship_no = (max(0, v(f"{prefix}_{real}")) for prefix in ('realisasi', 'shipside_yes', 'shipside_no'))
+        not_submitted = max(0, b - p)
+        not_tl = max(0, b - acc)
+        turun_cy = max(0, acc - (real_only + ship_yes + ship_no))
+        tl, tdk_tl = rate('tl', suffix), rate('tdk_tl', suffix)
+        est1 += p * tl + not_submitted * tdk_tl
+        est2 += acc * tl + not_tl * tdk_tl
+        final += (not_tl * tdk_tl + real_only * tl + ship_yes * rate('shipside_yes', suffix)
+                  + ship_no * rate('shipside_no', suffix) + turun_cy * rate('turun_cy', suffix))
+    return (est1 if has_pengajuan else None, est2 if has_acc else None, final if has_real else None)
+
+
+RATES = {col: float(10 + 7 * i) for i, col in enumerate(RATE_COLUMNS)}
+
+
+def _matrix(rates):
+    return RateMatrix([1], np.array([[rates[col] for col in RATE_COLUMNS]], dtype=np.float64))
+
+
+def _estimate_one(values, rates=RATES):
+    return estimate([values], [1], _matrix(rates))[0]
+
+
+def test_matches_reference_on_random_inputs():
+    rng = random.Random(7)
+    choices = [None, None, 0, 1, 5, 40, 120, -3]
+    rows = [{col: rng.choice(choices) for col in COUNT_COLUMNS} for _ in range(500)]
+    got = estimate(rows, [1] * len(rows), _matrix(RATES))
+    rates = SimpleNamespace(**RATES)
+    for values, result in zip(rows, got):
+        assert result == pytest.approx(_reference(values, rates), nan_ok=False)
+
+
+def test_null_stage_is_none_but_zero_counts_are_computed():
+    # Tahap tanpa satu pun field terisi = belum ada (None), bukan 0
+    assert _estimate_one({'bongkaran_empty_20dc': 10}) == (None, None, None)
+    # 0 berarti sudah diinput: Estimasi 1 = seluruh bongkaran dengan tarif Tidak TL
+    est1, est2, final = _estimate_one({'bongkaran_empty_20dc': 10, 'pengajuan_empty_20dc': 0})
+    assert est1 == 10 * RATES['tdk_tl_20mt']
+    assert est2 is None and final is None
+    # Satu field realisasi/shipside cukup untuk Final; field lain yang None dianggap 0
+    assert _estimate_one({'shipside_no_fxd_40hc': 0})[2] == 0
+
+
+def test_negative_counts_are_clamped_to_zero():
+    negative = {'bongkaran_empty_20dc': -5, 'pengajuan_empty_20dc': -2, 'acc_pengajuan_empty_20dc': -1,
+                'realisasi_mxd_20dc': -4}
+    zero = {key: 0 for key in negative}
+    assert _estimate_one(negative) == _estimate_one(zero) == (0, 0, 0)
+    # bongkaran < pengajuan: sisa "tidak diajukan" tidak pernah negatif
+    est1, _, _ = _estimate_one({'bongkaran_empty_20dc': 3, 'pengajuan_empty_20dc': 5})
+    assert est1 == 5 * RATES['tl_20mt']
+
+
+def test_non_numeric_values_count_as_zero():
+    assert _estimate_one({'pengajuan_empty_20dc': 'LU'}) == _estimate_one({'pengajuan_empty_20dc': 0})
+
+
+COUNTS = {
+    'bongkaran_empty_20dc': 30, 'pengajuan_empty_20dc': 20, 'acc_pengajuan_empty_20dc': 15,
+    'realisasi_mxd_20dc': 8, 'shipside_yes_mxd_20dc': 2, 'shipside_no_mxd_20dc': 1,
+    'bongkaran_full_40hc': 12, 'pengajuan_full_40hc': 6,
+}
+
+
+def _port_id(cm):
+    return db.session.get(Voyage, cm.voyage_id).port_id
+
+
+def _stored(voyage_id):
+    db.session.expire_all()
+    vce = VoyageCostEstimation.query.filter_by(voyage_id=voyage_id).one()
+    return vce.estimation_cost1, vce.estimation_cost2, vce.final_cost
+
+
+def test_port_without_cost_rate_uses_zero_rates(app):
+    cm = add_voyage(**COUNTS)
+    save_voyage_cost(cm)
+    db.session.commit()
+    assert _stored(cm.voyage_id) == (0, 0, 0)
+    assert recompute_costs([_port_id(cm)])["voyages"] == 1
+    assert _stored(cm.voyage_id) == (0, 0, 0)
+
+
+def test_lowest_cost_rate_id_wins_for_a_port(app):
+    cm = add_voyage(**COUNTS)
+    port_id = _port_id(cm)
+    first = CostRate(port_id=port_id, **RATES)
+    db.session.add(first)
+    db.session.flush()
+    db.session.add(CostRate(port_id=port_id, **{col: 999999.0 for col in RATE_COLUMNS}))
+    db.session.flush()
+
+    expected = _reference(COUNTS, first)
+    save_voyage_cost(cm)
+    db.session.commit()
+    assert _stored(cm.voyage_id) == pytest.approx(expected)
+    # Jalur bulk (job/CLI) memakai tarif dan rumus yang sama
+    db.session.query(VoyageCostEstimation).update({'final_cost': None})
+    db.session.commit()
+    recompute_costs([port_id])
+    assert _stored(cm.voyage_id) == pytest.approx(expected)
+
+
+def test_recompute_updates_all_ports_with_their_own_rates(app):
+    cms = [add_voyage(port=name, voyage_no=name, **COUNTS) for name in ('ADP', 'BJM')]
+    db.session.add(CostRate(port_id=_port_id(cms[0]), **RATES))
+    db.session.commit()
+
+    result = recompute_costs()
+    assert (result["voyages"], result["inserted"]) == (2, 2)
+    assert _stored(cms[0].voyage_id) == pytest.approx(_reference(COUNTS, SimpleNamespace(**RATES)))
+    assert _stored(cms[1].voyage_id) == (0, 0, 0)
+    assert recompute_costs()["updated"] == 2
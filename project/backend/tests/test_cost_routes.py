@@ -0,0 +1,48 @@
+"""Perubahan CostRate lewat API menghitung ulang estimasi cost voyage di port-nya."""
+from app import db
+from app.models import Voyage, VoyageCostEstimation
+from conftest import add_voyage
+
+COUNTS = {'bongkaran_empty_20dc': 10, 'pengajuan_empty_20dc': 4}
+
+
+def _estimation(voyage_id):
+    db.session.expire_all()
+    return VoyageCostEstimation.query.filter_by(voyage_id=voyage_id).one()
+
+
+def test_rate_create_update_delete_recompute_estimations(client, headers):
+    cm = add_voyage(**COUNTS)
+    port_id = db.session.get(Voyage, cm.voyage_id).port_id
+    db.session.commit()
+
+    response = client.post('/cost/cost-rates?recompute=sync', headers=headers,
+                           json={'port_id': port_id, 'tl_20mt': 100, 'tdk_tl_20mt': 10})
+    assert response.status_code == 201
+    vce = _estimation(cm.voyage_id)
+    assert (vce.estimation_cost1, vce.status) == (4 * 100 + 6 * 10, 'fresh')
+
+    rate_id = response.get_json()['id']
+    assert client.put(f'/cost/cost-rates/{rate_id}?recompute=sync', headers=headers,
+                      json={'tl_20mt': 200}).status_code == 200
+    assert _estimation(cm.voyage_id).estimation_cost1 == 4 * 200 + 6 * 10
+
+    response = client.delete(f'/cost/cost-rates/{rate_id}?recompute=sync', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['recompute']['voyages'] == 1
+    # Port tanpa CostRate dihitung dengan tarif 0
+    vce = _estimation(cm.voyage_id)
+    assert (vce.estimation_cost1, vce.status) == (0, 'fresh')
+
+
+def test_rate_delete_queues_recompute_by_default(client, headers):
+    cm = add_voyage(**COUNTS)
+    port_id = db.session.get(Voyage, cm.voyage_id).port_id
+    db.session.commit()
+    rate_id = client.post('/cost/cost-rates?recompute=sync', headers=headers,
+                          json={'port_id': port_id, 'tl_20mt': 100}).get_json()['id']
+
+    response = client.delete(f'/cost/cost-rates/{rate_id}', headers=headers)
+    assert response.get_json()['recompute']['status'] == 'queued'
+    # JOB_MODE=sync (conftest): job sudah dijalankan sebelum response dikirim
+    assert _estimation(cm.voyage_id).estimation_cost1 == 0
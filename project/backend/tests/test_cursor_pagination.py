@@ -0,0 +1,77 @@
+"""Paginasi cursor GET /container_movements/: urutan sama dengan mode halaman, tanpa baris hilang/ganda."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.container_routes import _total_cache
+from app.models import Voyage
+from app.pagination import decode_cursor, encode_cursor
+from conftest import add_voyage
+
+
+@pytest.fixture
+def movements(app):
+    started = datetime(2024, 1, 1)
+    for i in range(11):
+        cm = add_voyage(voyage_no=f"V{i:03d}", bongkaran_empty_20dc=i)
+        # Beberapa voyage dibuat pada waktu yang sama: urutan ditentukan id
+        db.session.get(Voyage, cm.voyage_id).created_at = started + timedelta(hours=i // 3)
+    db.session.commit()
+
+
+def _cursor_pages(client, headers, per_page, **params):
+    rows, cursor, requests = [], '', 0
+    while cursor is not None:
+        query = '&'.join(f"{k}={v}" for k, v in {'cursor': cursor, 'per_page': per_page, **params}.items())
+        body = client.get(f'/container_movements/?{query}', headers=headers).get_json()
+        assert len(body['data']) <= per_page
+        rows += body['data']
+        cursor = body['next_cursor']
+        requests += 1
+    return rows, requests
+
+
+def test_cursor_pages_match_page_mode(client, headers, movements):
+    paged = client.get('/container_movements/?page=1&per_page=100', headers=headers).get_json()['data']
+    for per_page in (1, 3, 4, 11):
+        rows, requests = _cursor_pages(client, headers, per_page)
+        assert rows == paged
+        assert requests == -(-11 // per_page)
+    assert [row['voyage_number'] for row in paged][:4] == ['V010', 'V009', 'V008', 'V007']
+
+
+def test_cursor_mode_applies_search(client, headers, movements):
+    rows, _ = _cursor_pages(client, headers, 2, q='V00', field='voyage_number')
+    assert len(rows) == 10 and all(row['voyage_number'].startswith('V00') for row in rows)
+
+
+def test_invalid_cursor_is_rejected(client, headers, movements):
+    for cursor in ('bukan-cursor', encode_cursor([1])):
+        response = client.get(f'/container_movements/?cursor={cursor}', headers=headers)
+        assert response.status_code == 400
+
+
+def test_total_is_cached_per_filter(app, client, headers, movements):
+    def total(**params):
+        query = '&'.join(f"{k}={v}" for k, v in params.items())
+        body = client.get(f'/container_movements/?cursor=&include_total=1&{query}', headers=headers).get_json()
+        assert body['total_is_estimate']
+        return body['total']
+
+    _total_cache.clear()    # cache per proses, bukan per app
+    assert total() == 11 and total(q='V01', field='voyage_number') == 1
+    add_voyage(voyage_no='V011')
+    db.session.commit()
+    # Masih di dalam TTL: total lama; filter lain punya entri cache sendiri
+    assert total() == 11 and total(q='V01', field='voyage_number') == 1
+    assert total(q='V011', field='voyage_number') == 1
+    assert 'total' not in client.get('/container_movements/?cursor=', headers=headers).get_json()
+
+
+def test_cursor_round_trips_typed_values():
+    columns = (Voyage.created_at, Voyage.id)
+    values = (datetime(2024, 5, 17, 8, 30, 15, 120000), 42)
+    assert decode_cursor(encode_cursor(values), columns) == values
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(['2024-05-17']), columns)
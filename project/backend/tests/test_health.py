@@ -0,0 +1,163 @@
+"""Probe /healthz dan /readyz, konfigurasi gunicorn dan worker yang menguras koneksi saat berhenti."""
+import os
+import runpy
+import selectors
+import socket
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from app import db
+from app.prediction_routes import model_registry
+from conftest import BACKEND_DIR, make_app
+from gunicorn_worker import DrainingThreadWorker
+
+
+@pytest.fixture
+def warmups(monkeypatch):
+    calls = []
+    # Warmup sungguhan memuat model di thread latar; di sini cukup dicatat
+    monkeypatch.setattr(model_registry, 'start_background_warmup', lambda: calls.append(1))
+    return calls
+
+
+def _refuse():
+    raise RuntimeError('koneksi ditolak\ndetail')
+
+
+def test_healthz_does_not_touch_the_database(client, monkeypatch):
+    monkeypatch.setattr(db.engine, 'connect', _refuse)
+    response = client.get('/healthz')
+    assert response.status_code == 200 and response.get_json() == {"status": "ok"}
+
+
+def test_ready_when_database_and_models_are_ok(client, monkeypatch, warmups):
+    monkeypatch.setattr(model_registry, 'is_warm', lambda: True)
+    response = client.get('/readyz')
+    body = response.get_json()
+    assert response.status_code == 200 and body['status'] == 'ready'
+    assert body['checks']['database']['ok'] and 'pool' in body['checks']['database']
+    assert 'replica' not in body['checks'] and warmups == []
+
+
+def test_not_ready_until_models_are_warm(client, monkeypatch, warmups):
+    monkeypatch.setattr(model_registry, 'is_warm', lambda: False)
+    response = client.get('/readyz')
+    body = response.get_json()
+    assert response.status_code == 503 and body['status'] == 'not_ready'
+    assert body['checks']['database']['ok'] and not body['checks']['models']['ok']
+    assert warmups == [1]
+
+
+def test_not_ready_when_database_is_unreachable(client, monkeypatch, warmups):
+    monkeypatch.setattr(model_registry, 'is_warm', lambda: True)
+    monkeypatch.setattr(db.engine, 'connect', _refuse)
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['checks']['database'] == {"ok": False, "error": "koneksi ditolak"}
+
+
+def test_replica_is_reported_but_does_not_decide_readiness(tmp_path, monkeypatch, warmups):
+    monkeypatch.setattr(model_registry, 'is_warm', lambda: True)
+    app = make_app(DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}", DB_REPLICA_CHECK_SECONDS='3600')
+    with app.app_context():
+        client = app.test_client()
+        healthy = client.get('/readyz')
+        app.extensions['db_replica'].mark_down('replica mati')
+        down = client.get('/readyz')
+        db.session.remove()
+        db.drop_all()
+    assert healthy.status_code == 200 and healthy.get_json()['checks']['replica']['ok'] is True
+    assert down.status_code == 200
+    assert down.get_json()['checks']['replica'] | {'pool': None} == {
+        "ok": False, "lag_seconds": None, "error": "replica mati", "pool": None}
+
+
+def _load_gunicorn_conf(monkeypatch, tmp_path, **env):
+    # Konfigurasi mengisi os.environ; setenv dulu supaya dipulihkan setelah tes
+    monkeypatch.setenv('MODEL_PRELOAD', '0')
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path / 'metrics'))
+    monkeypatch.delenv('FORWARDED_ALLOW_IPS', raising=False)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return runpy.run_path(os.path.join(BACKEND_DIR, 'gunicorn.conf.py'))
+
+
+def test_gunicorn_conf_preloads_and_trusts_only_local_proxy(monkeypatch, tmp_path):
+    conf = _load_gunicorn_conf(monkeypatch, tmp_path)
+    assert conf['preload_app'] and conf['wsgi_app'] == 'run:app'
+    assert conf['worker_class'] == 'gunicorn_worker.DrainingThreadWorker'
+    assert conf['forwarded_allow_ips'] == '127.0.0.1'
+    assert os.path.isdir(tmp_path / 'metrics')
+
+    conf = _load_gunicorn_conf(monkeypatch, tmp_path, FORWARDED_ALLOW_IPS='172.18.0.10',
+                               GUNICORN_WORKERS='3', GUNICORN_THREADS='2')
+    assert (conf['forwarded_allow_ips'], conf['workers'], conf['threads']) == ('172.18.0.10', 3, 2)
+
+
+@pytest.fixture
+def draining_worker():
+    listener = socket.create_server(('127.0.0.1', 0))
+    worker = DrainingThreadWorker.__new__(DrainingThreadWorker)
+    worker.draining_since = None
+    worker.alive = True
+    worker.sockets = [listener]
+    worker.poller = selectors.DefaultSelector()
+    worker.poller.register(listener, selectors.EVENT_READ)
+    worker._lock = threading.RLock()
+    worker._keep = deque()
+    worker.cfg = SimpleNamespace(graceful_timeout=30)
+    yield worker, listener
+    worker.poller.close()
+    listener.close()
+
+
+def test_sigterm_keeps_serving_accepted_connections(draining_worker):
+    worker, listener = draining_worker
+    client = socket.create_connection(listener.getsockname())
+    accepted, _ = listener.accept()
+    worker.poller.register(accepted, selectors.EVENT_READ)
+
+    worker.handle_exit(15, None)
+    assert worker.alive and worker.draining_since is not None
+
+    # Listener tidak lagi di-poll, tetapi koneksi yang request-nya belum dibaca ditunggu
+    worker._drain()
+    assert worker.alive and listener not in {key.fileobj for key in worker.poller.get_map().values()}
+
+    # Koneksi diserahkan ke thread pool: worker boleh keluar
+    worker.poller.unregister(accepted)
+    worker._drain()
+    assert not worker.alive
+    client.close()
+    accepted.close()
+
+
+def test_drain_gives_up_after_graceful_timeout(draining_worker):
+    worker, listener = draining_worker
+    client = socket.create_connection(listener.getsockname())
+    accepted, _ = listener.accept()
+    worker.poller.register(accepted, selectors.EVENT_READ)
+
+    worker.handle_exit(15, None)
+    worker.draining_since -= worker.cfg.graceful_timeout + 1
+    worker._drain()
+    assert not worker.alive
+    client.close()
+    accepted.close()
+
+
+def test_idle_keepalive_connections_do_not_block_exit(draining_worker):
+    worker, listener = draining_worker
+    client = socket.create_connection(listener.getsockname())
+    accepted, _ = listener.accept()
+    worker.poller.register(accepted, selectors.EVENT_READ)
+    worker._keep.append(SimpleNamespace(sock=accepted))
+
+    worker.handle_exit(15, None)
+    worker._drain()
+    assert not worker.alive
+    client.close()
+    accepted.close()
@@ -0,0 +1,96 @@
+"""ETag/304 dan cache body untuk endpoint GET yang jarang berubah (http_cache.py)."""
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.http_cache import ResponseCache, current_versions
+from app.models import Port, Vessel
+from app.read_models import count_queries
+from conftest import make_app
+
+
+@pytest.fixture
+def app():
+    app = make_app(HTTP_CACHE_ENABLED='1')
+    with app.app_context():
+        db.session.add_all([Vessel(name='V01'), Port(name='ADP', code='ADP')])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _version(table):
+    db.session.expire_all()
+    return current_versions([table])[table][0]
+
+
+def test_etag_revalidation_returns_304_without_running_the_view(client, headers):
+    first = client.get('/vessels', headers=headers)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    with count_queries() as counter:
+        response = client.get('/vessels', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304 and response.data == b''
+    # Hanya query versi tabel
+    assert counter.count == 1
+
+    # Tanpa If-None-Match body diambil dari ResponseCache, view tidak dijalankan
+    with count_queries() as counter:
+        cached = client.get('/vessels', headers=headers)
+    assert cached.data == first.data and cached.headers['ETag'] == etag
+    assert counter.count == 1
+
+
+def test_commit_bumps_version_and_changes_etag(client, headers):
+    etag = client.get('/vessels', headers=headers).headers['ETag']
+    version = _version('vessels')
+
+    assert client.post('/vessels', headers=headers, json={'name': 'V02'}).status_code == 201
+    assert _version('vessels') == version + 1
+
+    response = client.get('/vessels', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'V02' in {vessel['name'] for vessel in response.get_json()}
+
+
+def test_rollback_does_not_bump_version(app):
+    version = _version('vessels')
+    db.session.add(Vessel(name='V02'))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert _version('vessels') == version
+
+
+def test_bulk_statements_bump_dependent_endpoints(client, headers):
+    # /voyages membaca tabel voyages dan ports: perubahan ports lewat UPDATE massal juga terlihat
+    etag = client.get('/voyages', headers=headers).headers['ETag']
+    db.session.execute(update(Port).values(code='ADP2'))
+    db.session.commit()
+    response = client.get('/voyages', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_etag_depends_on_query_string(client, headers):
+    assert client.get('/ports', headers=headers).headers['ETag'] != \
+        client.get('/ports?page=2', headers=headers).headers['ETag']
+
+
+def test_response_cache_bounds_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put('a', 'e1', b'1234', 'application/json')
+    cache.put('b', 'e1', b'1234', 'application/json')
+    assert cache.get('a', 'e1') is not None     # 'a' jadi paling baru dipakai
+    cache.put('c', 'e1', b'1234', 'application/json')
+    assert cache.get('b', 'e1') is None and cache.get('a', 'e1') and cache.get('c', 'e1')
+    # Total byte dibatasi; body yang lebih besar dari batas tidak disimpan sama sekali
+    cache.put('d', 'e1', b'123456789', 'application/json')
+    assert cache.size <= 10 and cache.get('d', 'e1') is not None
+    cache.put('e', 'e1', b'x' * 11, 'application/json')
+    assert cache.get('e', 'e1') is None
+    # ETag lain (versi tabel berubah) tidak pernah memakai body lama
+    assert cache.get('d', 'e2') is None
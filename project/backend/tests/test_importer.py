@@ -0,0 +1,169 @@
+"""Impor bulk (importer.import_frame) dibandingkan dengan seeder baris per baris yang lama."""
+import io
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import inspect
+
+from app import db
+from app.importer import import_frame, read_csv
+from app.models import ContainerMovement, PercentageContainerMovement, Port, Vessel, Voyage
+from app.ship_csv import CM_CSV_COLUMNS
+from conftest import CSV_PATH, make_app
+
+
+def _safe_int(value):
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _safe_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _safe_ratio(num, den):
+    return round(num / den, 4) if den and den > 0 else 0.0
+
+
+def _parse_date(text):
+    for fmt in ("%d/%m/%Y %H.%M", "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(text.strip(), fmt)
+        except ValueError:
+            continue
+    return pd.to_datetime(text, errors="coerce").to_pydatetime()
+
+
+def _seed_row_by_row(frame):
+    """Seeder lama (seeder.run_seed sebelum impor bulk), tanpa CostRate dummy."""
+    for row in frame.to_dict('records'):
+        vessel_name, port_name = row['VESSEL ID (DMY)'].strip(), row['BERTH LOCATION'].strip()
+        vessel = Vessel.query.filter_by(name=vessel_name).first() or Vessel(name=vessel_name)
+        port = Port.query.filter_by(name=port_name).first() or Port(name=port_name, code=None)
+        db.session.add_all([vessel, port])
+        db.session.flush()
+        voyage = Voyage(vessel_id=vessel.id, port_id=port.id, voyage_no=row['Voyage No.'],
+                        voyage_yr=_safe_int(row['Voyage Yr']), date_berth=_parse_date(row['Date Berth']))
+        db.session.add(voyage)
+        db.session.flush()
+        values = {
+            field: row[header] if kind == 'text' else (_safe_float if kind == 'float' else _safe_int)(row[header])
+            for header, field, kind in CM_CSV_COLUMNS
+        }
+        cm = ContainerMovement(voyage_id=voyage.id, **values)
+        db.session.add(cm)
+        db.session.flush()
+        totals = {
+            'total_bongkaran_20dc': cm.bongkaran_empty_20dc + cm.bongkaran_full_20dc,
+            'total_bongkaran_40hc': cm.bongkaran_empty_40hc + cm.bongkaran_full_40hc,
+            'total_pengajuan_20dc': cm.pengajuan_empty_20dc + cm.pengajuan_full_20dc,
+            'total_pengajuan_40hc': cm.pengajuan_empty_40hc + cm.pengajuan_full_40hc,
+            'total_acc_20dc': cm.acc_pengajuan_empty_20dc + cm.acc_pengajuan_full_20dc,
+            'total_acc_40hc': cm.acc_pengajuan_empty_40hc + cm.acc_pengajuan_full_40hc,
+            'total_tlss_20dc': cm.total_realisasi_20dc,
+            'total_tlss_40hc': cm.total_realisasi_40hc,
+        }
+        ratios = {}
+        for size in ('20dc', '40hc'):
+            bongkaran, pengajuan = totals[f'total_bongkaran_{size}'], totals[f'total_pengajuan_{size}']
+            ratios[f'percentage_pengajuan_{size}'] = _safe_ratio(pengajuan, bongkaran)
+            ratios[f'percentage_acc_{size}'] = _safe_ratio(totals[f'total_acc_{size}'], bongkaran)
+            ratios[f'percentage_tl_{size}'] = _safe_ratio(totals[f'total_tlss_{size}'], bongkaran)
+            ratios[f'percentage_realisasi_{size}'] = _safe_ratio(totals[f'total_tlss_{size}'], pengajuan)
+        db.session.add(PercentageContainerMovement(cm_id=cm.id, **totals, **ratios))
+    db.session.commit()
+
+
+def _rows(model, skip=('created_at', 'updated_at', 'computed_at', 'source_hash')):
+    db.session.expire_all()
+    columns = [c.key for c in inspect(model).columns if c.key not in skip]
+    return [{key: getattr(obj, key) for key in columns} for obj in model.query.order_by(model.id)]
+
+
+def _snapshot():
+    return {model.__name__: _rows(model)
+            for model in (Vessel, Port, Voyage, ContainerMovement, PercentageContainerMovement)}
+
+
+@pytest.fixture
+def app():
+    app = make_app(PREDICTION_REFRESH_ENABLED='0')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_bulk_import_matches_row_by_row_seeder(app):
+    frame = read_csv(CSV_PATH).head(150)
+    # Vessel/port yang sudah ada dipakai ulang, bukan diduplikasi
+    db.session.add(Vessel(name=frame['VESSEL ID (DMY)'].iloc[5].strip()))
+    db.session.commit()
+    report = import_frame(frame, batch_size=16, enqueue_derived=False)
+    assert (report['imported'], report['error_count']) == (150, 0)
+    imported = _snapshot()
+    assert report['vessels_created'] == len(imported['Vessel']) - 1
+
+    reference = make_app(PREDICTION_REFRESH_ENABLED='0')
+    with reference.app_context():
+        db.session.add(Vessel(name=frame['VESSEL ID (DMY)'].iloc[5].strip()))
+        db.session.commit()
+        _seed_row_by_row(frame)
+        expected = _snapshot()
+        db.session.remove()
+        db.drop_all()
+    assert imported == expected
+
+
+def _frame_with(overrides):
+    frame = read_csv(CSV_PATH).head(5).copy()
+    for (pos, header), value in overrides.items():
+        frame.loc[frame.index[pos], header] = value
+    return frame
+
+
+def test_invalid_rows_are_skipped_and_reported(app):
+    frame = _frame_with({
+        (1, 'VESSEL ID (DMY)'): '  ',
+        (3, 'Date Berth'): 'kemarin',
+        (4, 'TOTAL BONGKARAN_EMPTY_20 DC'): 'LU',
+    })
+    report = import_frame(frame, enqueue_derived=False)
+    assert (report['imported'], report['skipped']) == (3, 2)
+    # Nomor baris file (header = baris 1)
+    assert [(e['row'], e['column']) for e in report['errors']] == [(3, 'VESSEL ID (DMY)'), (5, 'Date Berth')]
+    assert report['warnings']['TOTAL BONGKARAN_EMPTY_20 DC'] == 1
+    last = ContainerMovement.query.order_by(ContainerMovement.id.desc()).first()
+    assert last.bongkaran_empty_20dc == 0
+
+
+def test_strict_mode_imports_nothing_on_error(app):
+    report = import_frame(_frame_with({(2, 'Date Berth'): ''}), strict=True, enqueue_derived=False)
+    assert report['aborted'] and report['imported'] == 0 and report['skipped'] == 5
+    assert Voyage.query.count() == 0 and Vessel.query.count() == 0
+
+
+def test_missing_columns_reject_the_file(client, headers):
+    frame = read_csv(CSV_PATH).head(2).drop(columns=['OBSTACLES'])
+    response = client.post('/container_movements/import', headers=headers, data={
+        'file': (io.BytesIO(frame.to_csv(index=False).encode('utf-8')), 'data.csv'),
+    })
+    assert response.status_code == 400 and 'OBSTACLES' in response.get_json()['msg']
+
+
+def test_upload_endpoint_reports_per_row_errors(client, headers):
+    frame = _frame_with({(0, 'BERTH LOCATION'): ''})
+    upload = {'file': (io.BytesIO(frame.to_csv(index=False).encode('utf-8')), 'data.csv')}
+    body = client.post('/container_movements/import?strict=1', headers=headers, data=upload).get_json()
+    assert body['aborted'] and Voyage.query.count() == 0
+
+    upload = {'file': (io.BytesIO(frame.to_csv(index=False).encode('utf-8')), 'data.csv')}
+    body = client.post('/container_movements/import', headers=headers, data=upload).get_json()
+    assert body['imported'] == 4 and body['errors'][0]['row'] == 2
+    assert Voyage.query.count() == 4
@@ -0,0 +1,60 @@
+"""Sync import (flask seed --sync / flask import --sync) terhadap data yang sudah ada."""
+import pytest
+
+from app import db
+from app.importer import import_frame, read_csv, sync_frame
+from app.models import ContainerMovement, Voyage
+from conftest import CSV_PATH
+
+
+@pytest.fixture
+def frame():
+    return read_csv(CSV_PATH).head(8)
+
+
+@pytest.fixture
+def seeded(app, frame):
+    import_frame(frame, enqueue_derived=False)
+    return ContainerMovement.query.order_by(ContainerMovement.id).first()
+
+
+def _edit(cm, value):
+    cm.pengajuan_empty_20dc = value
+    db.session.commit()
+
+
+def test_sync_without_changes_writes_nothing(seeded, frame):
+    report = sync_frame(frame, enqueue_derived=False)
+    assert (report["unchanged"], report["updated"], report["adopted"], report["imported"]) == (8, 0, 0, 0)
+
+
+def test_sync_adopts_voyages_without_hash_and_keeps_their_data(seeded, frame):
+    # Voyage dari sebelum migrasi source_hash, lalu diedit lewat API
+    db.session.execute(db.update(Voyage).values(source_hash=None))
+    _edit(seeded, 999)
+
+    report = sync_frame(frame, enqueue_derived=False)
+    assert (report["adopted"], report["updated"], report["unchanged"]) == (8, 0, 0)
+    db.session.expire_all()
+    assert db.session.get(ContainerMovement, seeded.id).pengajuan_empty_20dc == 999
+    assert Voyage.query.filter(Voyage.source_hash.is_(None)).count() == 0
+
+    # Setelah diadopsi, sync berikutnya menganggap baris yang sama tidak berubah
+    report = sync_frame(frame, enqueue_derived=False)
+    assert (report["unchanged"], report["adopted"]) == (8, 0)
+    db.session.expire_all()
+    assert db.session.get(ContainerMovement, seeded.id).pengajuan_empty_20dc == 999
+
+
+def test_sync_updates_rows_that_changed_in_the_file(seeded, frame):
+    original = seeded.pengajuan_empty_20dc
+    _edit(seeded, 999)
+    changed = frame.copy()
+    changed.loc[0, 'TOTAL BONGKARAN_EMPTY_20 DC'] = '777'
+
+    report = sync_frame(changed, enqueue_derived=False)
+    assert (report["updated"], report["unchanged"], report["adopted"]) == (1, 7, 0)
+    db.session.expire_all()
+    cm = db.session.get(ContainerMovement, seeded.id)
+    assert cm.bongkaran_empty_20dc == 777
+    assert cm.pengajuan_empty_20dc == original
@@ -0,0 +1,95 @@
+"""Antrean job background: claim, retry dengan batas percobaan, coalescing per key, job macet."""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app import jobs
+from app.jobs import drain_jobs, enqueue_job, run_job, run_jobs_command
+from app.models import BackgroundJob
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Handler 'test' yang gagal selama payload['fail'] > jumlah panggilan sebelumnya."""
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        if len(calls) <= payload.get('fail', 0):
+            raise RuntimeError(f"gagal ke-{len(calls)}")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, 'test', handler)
+    return calls
+
+
+def _job(key='k', **payload):
+    job = enqueue_job('test', key, payload)
+    db.session.commit()
+    return job.id
+
+
+def _status(job_id):
+    db.session.expire_all()
+    job = db.session.get(BackgroundJob, job_id)
+    return job.status, job.attempts
+
+
+def test_job_is_claimed_once(app, handled):
+    job_id = _job(n=1)
+    assert run_job(job_id)
+    assert not run_job(job_id)
+    assert _status(job_id) == ('done', 1) and handled == [{'n': 1}]
+
+
+def test_failed_job_is_requeued_until_max_attempts(app, handled):
+    app.config['JOB_MAX_ATTEMPTS'] = 3
+    job_id = _job(fail=5)
+    assert run_job(job_id) and _status(job_id) == ('queued', 1)
+    assert db.session.get(BackgroundJob, job_id).error == 'gagal ke-1'
+    run_job(job_id)
+    run_job(job_id)
+    assert _status(job_id) == ('failed', 3)
+    assert not run_job(job_id) and len(handled) == 3
+
+
+def test_sync_mode_retries_until_success(app, handled):
+    job_id = _job(fail=2)
+    jobs._run_until_settled(job_id)
+    assert _status(job_id) == ('done', 3)
+
+
+def test_failure_in_async_worker_schedules_a_backoff_retry(app, handled, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(jobs, '_executor_pid', os.getpid())
+    monkeypatch.setattr(jobs, '_schedule_retry', lambda app, job_id, attempts: scheduled.append((job_id, attempts)))
+    job_id = _job(fail=1)
+    run_job(job_id)
+    assert scheduled == [(job_id, 1)]
+
+
+def test_newer_job_for_the_same_key_covers_older_ones(app, handled):
+    older, other, newer = _job(key='cm:1', n=1), _job(key='cm:2', n=2), _job(key='cm:1', n=3)
+    run_job(newer)
+    assert _status(older)[0] == 'done' and _status(other)[0] == 'queued'
+    assert drain_jobs() == 1
+    assert handled == [{'n': 3}, {'n': 2}]
+
+
+def test_drain_requeues_stale_running_jobs(app, handled):
+    app.config['JOB_STALE_SECONDS'] = 300
+    stale, recent = _job(key='a', n=1), _job(key='b', n=2)
+    for job_id, started in ((stale, datetime.now() - timedelta(seconds=600)), (recent, datetime.now())):
+        db.session.get(BackgroundJob, job_id).status = 'running'
+        db.session.get(BackgroundJob, job_id).started_at = started
+    db.session.commit()
+    assert drain_jobs() == 1
+    assert _status(stale)[0] == 'done' and _status(recent)[0] == 'running'
+
+
+def test_run_jobs_command_drains_the_queue(app, handled):
+    _job(key='a', n=1)
+    _job(key='b', n=2)
+    result = app.test_cli_runner().invoke(run_jobs_command)
+    assert '2 job diproses.' in result.output and "test: {'done': 2}" in result.output
@@ -0,0 +1,143 @@
+"""GET /metrics: latency per endpoint/method/status, query SQL per request, agregasi antar worker."""
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.metrics import LATENCY_BUCKETS
+from conftest import BACKEND_DIR, TEST_ENV, add_voyage, make_app
+
+prometheus_client = pytest.importorskip('prometheus_client')
+from prometheus_client import REGISTRY  # noqa: E402
+from prometheus_client.parser import text_string_to_metric_families  # noqa: E402
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Registry proses ini, bukan file mmap multi-proses
+    monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+    app = make_app(METRICS_ENABLED='1')
+
+    def fails():
+        raise RuntimeError('gagal')
+
+    app.add_url_rule('/gagal', 'gagal', fails)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _latency_count(endpoint, method='GET', status='200'):
+    return _sample('http_request_duration_seconds_count', endpoint=endpoint, method=method, status=status)
+
+
+def test_latency_is_recorded_per_endpoint_method_and_status(client, headers):
+    before = {
+        'list': _latency_count('port_bp.get_all_ports'),
+        'created': _latency_count('port_bp.create_port', 'POST', '201'),
+        'missing': _latency_count('<unmatched>', status='404'),
+        'error': _latency_count('gagal', status='500'),
+    }
+    client.get('/ports', headers=headers)
+    client.get('/ports', headers=headers)
+    client.post('/ports', headers=headers, json={'name': 'ADP'})
+    client.get('/tidak-ada')
+    client.get('/gagal')
+
+    assert _latency_count('port_bp.get_all_ports') == before['list'] + 2
+    assert _latency_count('port_bp.create_port', 'POST', '201') == before['created'] + 1
+    assert _latency_count('<unmatched>', status='404') == before['missing'] + 1
+    assert _latency_count('gagal', status='500') == before['error'] + 1
+    assert _sample('http_requests_in_progress') == 0
+
+
+def test_queries_and_db_time_are_counted_per_request(client, headers):
+    for i in range(3):
+        add_voyage(voyage_no=str(i))
+    db.session.commit()
+    executed = []
+    labels = {'endpoint': 'main_bp.get_voyages', 'method': 'GET'}
+    count, total = _sample('http_request_db_queries_count', **labels), _sample('http_request_db_queries_sum', **labels)
+    db_time = _sample('http_request_db_seconds_sum', **labels)
+
+    def record(*args):
+        executed.append(1)
+
+    event.listen(db.engine, 'after_cursor_execute', record)
+    try:
+        assert client.get('/voyages', headers=headers).status_code == 200
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', record)
+
+    assert executed
+    assert _sample('http_request_db_queries_count', **labels) == count + 1
+    assert _sample('http_request_db_queries_sum', **labels) == total + len(executed)
+    assert _sample('http_request_db_seconds_sum', **labels) > db_time
+
+
+def _all_queries():
+    return sum(sample.value for metric in REGISTRY.collect() if metric.name == 'http_request_db_queries'
+               for sample in metric.samples if sample.name.endswith('_sum'))
+
+
+def test_queries_outside_requests_are_not_counted(app):
+    total = _all_queries()
+    add_voyage()
+    db.session.commit()
+    assert _all_queries() == total
+
+
+def test_metrics_endpoint_uses_the_prometheus_text_format(client, headers):
+    client.get('/ports', headers=headers)
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    families = {family.name: family for family in text_string_to_metric_families(response.get_data(as_text=True))}
+    assert families['http_request_duration_seconds'].type == 'histogram'
+    buckets = [sample.labels['le'] for sample in families['http_request_duration_seconds'].samples
+               if sample.name.endswith('_bucket') and sample.labels['endpoint'] == 'port_bp.get_all_ports']
+    assert buckets == [*(str(b) for b in LATENCY_BUCKETS), '+Inf']
+
+
+def test_metrics_can_be_disabled():
+    app = make_app(METRICS_ENABLED='0')
+    with app.app_context():
+        assert app.test_client().get('/metrics').status_code == 404
+        assert 'metrics' not in app.extensions
+        db.drop_all()
+
+
+WORKER = """
+from app import create_app
+client = create_app().test_client()
+for _ in range({requests}):
+    assert client.get('/healthz').status_code == 200
+print('--- metrics ---')
+print(client.get('/metrics').get_data(as_text=True))
+"""
+
+
+def test_workers_are_aggregated_through_the_multiprocess_dir(tmp_path):
+    env = {**os.environ, **TEST_ENV, 'METRICS_ENABLED': '1', 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+
+    def run_worker(requests):
+        result = subprocess.run([sys.executable, '-c', WORKER.format(requests=requests)], cwd=BACKEND_DIR,
+                                env=env, capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        # create_app juga mencetak log ke stdout
+        return result.stdout.split('--- metrics ---\n', 1)[1]
+
+    run_worker(2)
+    # Worker kedua (proses lain) melihat jumlah dari worker pertama juga
+    text = run_worker(3)
+    counts = [sample.value for family in text_string_to_metric_families(text) for sample in family.samples
+              if sample.name == 'http_request_duration_seconds_count'
+              and sample.labels == {'endpoint': 'health_bp.healthz', 'method': 'GET', 'status': '200'}]
+    assert counts == [5.0]
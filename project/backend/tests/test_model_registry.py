@@ -0,0 +1,110 @@
+"""ModelRegistry: versi model (hash file) yang dimuat dan dump mmap per isi file."""
+import os
+import threading
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.dummy import DummyRegressor
+
+from app.model_registry import ModelRegistry
+
+
+def _model(value):
+    return DummyRegressor(strategy='constant', constant=value).fit(np.zeros((1, 1)), [value])
+
+
+def _predict(model):
+    return float(model.predict(np.zeros((1, 1)))[0])
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    path = tmp_path / 'models'
+    path.mkdir()
+    joblib.dump(_model(1.0), path / 'm.pkl')
+    return path
+
+
+def _replace_with_older_mtime(models_dir, value):
+    # Seperti `cp -p`/tar/rsync/git checkout: isi baru, mtime lebih tua dari dump yang ada
+    old = os.stat(models_dir / 'm.pkl').st_mtime - 3600
+    joblib.dump(_model(value), models_dir / 'm.pkl')
+    os.utime(models_dir / 'm.pkl', (old, old))
+
+
+@pytest.mark.parametrize('load_mode', ['pickle', 'mmap'])
+def test_reload_picks_up_replaced_file_with_older_mtime(tmp_path, models_dir, load_mode):
+    registry = ModelRegistry({'m': 'm.pkl'}, models_path=str(models_dir), load_mode=load_mode,
+                             mmap_dir=str(tmp_path / 'mmap'), track_memory=False)
+    model, digest = registry.get_versioned('m')
+    assert _predict(model) == 1.0 and digest == registry.file_hash('m')
+
+    _replace_with_older_mtime(models_dir, 2.0)
+    # Tanpa reload model (dan versinya) di memori tetap yang lama
+    assert registry.get_versioned('m') == (model, digest)
+
+    registry.reload('m')
+    model, new_digest = registry.get_versioned('m')
+    assert _predict(model) == 2.0
+    assert new_digest != digest and new_digest == registry.file_hash('m')
+    if load_mode == 'mmap':
+        assert os.listdir(tmp_path / 'mmap') == [f"m-{new_digest[:16]}.joblib"]
+
+
+def test_mmap_dump_is_shared_between_registries(tmp_path, models_dir):
+    options = {'models_path': str(models_dir), 'load_mode': 'mmap', 'mmap_dir': str(tmp_path / 'mmap'),
+               'track_memory': False}
+    first, second = ModelRegistry({'m': 'm.pkl'}, **options), ModelRegistry({'m': 'm.pkl'}, **options)
+    assert first.get_versioned('m')[1] == second.get_versioned('m')[1]
+    assert len(os.listdir(tmp_path / 'mmap')) == 1
+
+
+@pytest.fixture
+def registry(models_dir):
+    for name, value in (('a', 1.0), ('b', 2.0), ('c', 3.0)):
+        joblib.dump(_model(value), models_dir / f'{name}.pkl')
+    files = {name: f'{name}.pkl' for name in ('a', 'b', 'c', 'missing')}
+    return ModelRegistry(files, models_path=str(models_dir), max_models=2)
+
+
+def test_lru_keeps_most_recently_used_models(registry):
+    registry.get('a')
+    registry.get('b')
+    registry.get('a')               # 'a' jadi paling baru dipakai
+    registry.get('c')
+    assert registry.loaded_keys() == ['a', 'c']
+    assert _predict(registry.get('b')) == 2.0
+    assert registry.loaded_keys() == ['c', 'b']
+
+    stats = registry.stats()
+    assert stats['resident_models'] == 2
+    assert {key: stats['models'][key]['loads'] for key in 'abc'} == {'a': 1, 'b': 2, 'c': 1}
+    assert stats['models']['a']['evictions'] == 1 and stats['models']['a']['resident_bytes'] is None
+    assert stats['models']['a']['hits'] == 1 and not stats['models']['a']['loaded']
+
+
+def test_missing_file_is_not_retried_until_reload(registry, models_dir):
+    assert registry.get('missing', 'default') == 'default'
+    assert registry.stats()['models']['missing']['missing']
+    joblib.dump(_model(4.0), models_dir / 'missing.pkl')
+    assert registry.get('missing') is None
+    registry.reload('missing')
+    assert _predict(registry.get('missing')) == 4.0
+    assert registry.get('tidak-terdaftar') is None
+
+
+def test_is_warm_respects_the_lru_limit(registry):
+    assert not registry.is_warm()
+    registry.warm()
+    # Empat model terdaftar, satu tidak ada file-nya, batas LRU 2
+    assert registry.is_warm() and len(registry.loaded_keys()) == 2
+
+
+def test_concurrent_first_requests_load_a_model_once(registry):
+    threads = [threading.Thread(target=registry.get, args=('a',)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.stats()['models']['a']['loads'] == 1
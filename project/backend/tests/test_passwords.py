@@ -0,0 +1,113 @@
+"""Verifikasi bcrypt di executor terbatas (admission control) dan upgrade cost factor saat login."""
+import threading
+
+import pytest
+
+from app import db
+from app.models import User
+from app.passwords import PasswordHasher, PasswordHasherBusy, hash_rounds, password_hasher
+
+
+@pytest.mark.parametrize('pw_hash, expected', [
+    ('$2b$12$' + 'a' * 53, 12), ('$2b$04$' + 'a' * 53, 4), ('plain', None), (None, None), ('$2b$xx$', None),
+])
+def test_hash_rounds(pw_hash, expected):
+    assert hash_rounds(pw_hash) == expected
+
+
+def test_verify_rehashes_only_when_the_cost_changes():
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=4)
+    pw_hash = hasher.hash('rahasia')
+    assert hash_rounds(pw_hash) == 4
+    assert hasher.verify(pw_hash, 'rahasia') == (True, None)
+    assert hasher.verify(pw_hash, 'salah') == (False, None)
+
+    hasher.configure(workers=1, max_queue=0, rounds=5)
+    ok, new_hash = hasher.verify(pw_hash, 'rahasia')
+    assert ok and hash_rounds(new_hash) == 5 and hasher.verify(new_hash, 'rahasia') == (True, None)
+    assert hasher.verify(pw_hash, 'salah') == (False, None)
+
+
+def test_hashing_runs_on_the_bcrypt_executor():
+    hasher = PasswordHasher(workers=2, max_queue=0, rounds=4)
+    assert hasher._run(lambda: threading.current_thread().name).startswith('bcrypt')
+
+
+def test_executor_is_recreated_after_fork(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=4)
+    before = hasher._get_executor()
+    assert hasher._get_executor() is before
+    monkeypatch.setattr('app.passwords.os.getpid', lambda: -1)
+    assert hasher._get_executor() is not before
+
+
+def test_admission_control_rejects_beyond_workers_plus_queue():
+    hasher = PasswordHasher(workers=1, max_queue=1, rounds=4)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    results = []
+
+    def slow():
+        started.release()
+        release.wait(10)
+        return 'selesai'
+
+    threads = [threading.Thread(target=lambda: results.append(hasher._run(slow))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    # Satu berjalan di executor, satu menunggu di antrean: slot penuh
+    assert started.acquire(timeout=10)
+    with pytest.raises(PasswordHasherBusy):
+        hasher._run(slow)
+    assert hasher.stats()['rejected'] == 1
+
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    assert results == ['selesai', 'selesai']
+    assert hasher._run(lambda: 'lagi') == 'lagi'
+
+
+def _register(client, password='rahasia'):
+    response = client.post('/auth/register', json={'username': 'budi', 'email': 'budi@example.com',
+                                                   'password': password})
+    assert response.status_code == 201
+
+
+def _login(client, password='rahasia'):
+    return client.post('/auth/login', json={'email': 'budi@example.com', 'password': password})
+
+
+def test_login_upgrades_the_hash_when_the_cost_changes(client, monkeypatch):
+    _register(client)
+    old_hash = User.query.one().password_hash
+    assert hash_rounds(old_hash) == password_hasher.rounds == 4
+
+    monkeypatch.setattr(password_hasher, 'rounds', 5)
+    assert _login(client, 'salah').status_code == 401
+    db.session.expire_all()
+    assert User.query.one().password_hash == old_hash
+
+    response = _login(client)
+    assert response.status_code == 200 and response.get_json()['access_token']
+    db.session.expire_all()
+    new_hash = User.query.one().password_hash
+    assert hash_rounds(new_hash) == 5
+
+    # Hash sudah sesuai cost saat ini: login berikutnya tidak menulis ulang
+    assert _login(client).status_code == 200
+    db.session.expire_all()
+    assert User.query.one().password_hash == new_hash
+
+
+def test_busy_hasher_returns_503_with_retry_after(client, monkeypatch):
+    _register(client)
+    monkeypatch.setattr(password_hasher, '_slots', threading.BoundedSemaphore(1))
+    password_hasher._slots.acquire()
+    rejected = password_hasher.rejected
+
+    response = _login(client)
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+    assert client.post('/auth/register', json={'username': 'ani', 'email': 'ani@example.com',
+                                               'password': 'x'}).status_code == 503
+    assert password_hasher.rejected == rejected + 2
@@ -0,0 +1,91 @@
+"""Rekap port_movement_totals yang diperbarui inkremental sama dengan hasil rebuild penuh."""
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.importer import import_frame, read_csv
+from app.models import Port, PortMovementTotal, Vessel, Voyage
+from app.port_totals import TOTAL_COLUMNS, rebuild_port_totals, record_voyage_added
+from conftest import CSV_PATH
+
+
+def _snapshot():
+    db.session.expire_all()
+    return {
+        (row.port_id, row.period): {col: getattr(row, col) for col in TOTAL_COLUMNS}
+        for row in PortMovementTotal.query
+        # Baris yang semua nilainya sudah kembali 0 tidak dibuat oleh rebuild
+        if any(getattr(row, col) for col in TOTAL_COLUMNS)
+    }
+
+
+@pytest.fixture
+def app(app):
+    app.config['PREDICTION_REFRESH_ENABLED'] = False
+    return app
+
+
+def _post(client, headers, path, body):
+    response = client.post(path, headers=headers, json=body)
+    assert response.status_code in (200, 201), response.get_json()
+    return response.get_json()
+
+
+def test_write_handlers_keep_totals_equal_to_rebuild(client, headers):
+    ports = [Port(name='ADP', code='ADP'), Port(name='BJM', code='BJM')]
+    vessel = Vessel(name='V01')
+    db.session.add_all([*ports, vessel])
+    db.session.commit()
+
+    cm_ids = []
+    for i, (port, date_berth) in enumerate([(ports[0], datetime(2024, 1, 5)), (ports[0], datetime(2024, 2, 10)),
+                                           (ports[1], datetime(2024, 2, 11))]):
+        # Sama dengan POST /voyages (yang mengirim date_berth string apa adanya, hanya
+        # diterima PostgreSQL)
+        voyage = Voyage(vessel_id=vessel.id, port_id=port.id, voyage_no=str(i), voyage_yr=2024, date_berth=date_berth)
+        db.session.add(voyage)
+        record_voyage_added(voyage)
+        db.session.commit()
+        cm = _post(client, headers, '/container_movements/bongkaran', {
+            'voyage_id': voyage.id, 'bongkaran_empty_20dc': 10 + i, 'bongkaran_full_40hc': 4,
+        })
+        cm_ids.append(cm['container_movement']['id'])
+
+    for value in (8, 6):    # diubah dua kali: delta harus relatif ke nilai sebelumnya
+        _post(client, headers, '/container_movements/pengajuan', {
+            'id': cm_ids[0], 'pengajuan_empty_20dc': value, 'pengajuan_full_40hc': 3,
+        })
+    _post(client, headers, '/container_movements/pengajuan', {'id': cm_ids[2], 'pengajuan_empty_20dc': 9})
+    _post(client, headers, '/container_movements/acc_pengajuan', {
+        'id': cm_ids[0], 'acc_pengajuan_empty_20dc': 5, 'acc_pengajuan_full_40hc': 2,
+    })
+    for value in (4, 1):
+        _post(client, headers, '/container_movements/realisasi_shipside', {
+            'id': cm_ids[0], 'realisasi_mxd_20dc': value, 'shipside_yes_fxd_40hc': 1,
+        })
+    totals = _snapshot()
+    assert totals[(ports[0].id, 'all')]['voyages'] == 2
+    assert totals[(ports[0].id, 'all')]['pengajuan_20dc'] == 6
+    assert totals[(ports[0].id, '2024-02')]['movements'] == 1
+    assert totals[(ports[1].id, 'all')]['pengajuan_20dc'] == 9
+
+    # Impor bulk ikut memperbarui rekap (port baru maupun port yang sudah ada)
+    import_frame(read_csv(CSV_PATH).head(20), enqueue_derived=False)
+    incremental = _snapshot()
+    rebuild_port_totals()
+    assert _snapshot() == incremental
+
+
+def test_summary_by_port_reads_the_rollup(client, headers):
+    port = Port(name='ADP', code='ADP')
+    db.session.add(port)
+    db.session.commit()
+    import_frame(read_csv(CSV_PATH).head(20), enqueue_derived=False)
+    rebuild_port_totals()
+
+    summary = {row['port_id']: row for row in client.get('/container_movements/summary-by-port', headers=headers).get_json()}
+    totals = {row.port_id: row for row in PortMovementTotal.query.filter_by(period='all')}
+    assert set(summary) == {pid for pid, row in totals.items() if row.movements > 0}
+    for port_id, row in summary.items():
+        assert row['total_realisasi'] == totals[port_id].teus_realisasi
@@ -0,0 +1,85 @@
+"""/predict/batch: satu model.predict per model, hasil sama dengan endpoint tunggal."""
+import pytest
+
+from app import db
+from app import prediction_routes
+from conftest import make_app
+
+BASE = {'VESSEL ID (DMY)': 'V01', 'BERTH LOCATION': 'ADP', 'Voyage No.': 1, 'Voyage Yr': 2024}
+
+
+@pytest.fixture
+def app():
+    # Tanpa cache hasil prediksi: setiap item benar-benar dihitung model
+    app = make_app(PREDICTION_CACHE_BACKEND='none')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def predict_calls(monkeypatch):
+    calls = []
+    original = prediction_routes._predict_uncached
+
+    def counting(model, model_key, records):
+        calls.append((model_key, len(records)))
+        return original(model, model_key, records)
+
+    monkeypatch.setattr(prediction_routes, '_predict_uncached', counting)
+    return calls
+
+
+def _e20(bongkaran):
+    return {**BASE, 'TOTAL BONGKARAN_EMPTY_20 DC': bongkaran}
+
+
+def _f40(bongkaran, pengajuan):
+    return {**BASE, 'TOTAL BONGKARAN_FULL_40 HC': bongkaran, 'PENGAJUAN KE PLANNER_FULL_40 HC': pengajuan}
+
+
+def test_batch_matches_single_endpoint_with_one_predict_per_model(client, predict_calls):
+    items = [{'id': f'e{n}', 'features': _e20(n)} for n in (0, 15, 40, 120)]
+    items += [{'id': f'f{n}', 'model': 'pengajuan_acc_full_40', 'features': _f40(n, n // 2)} for n in (10, 30)]
+    response = client.post('/predict/batch', json={'model': 'bongkaran_pengajuan_empty_20', 'items': items})
+    body = response.get_json()
+    assert response.status_code == 200 and body['errors'] == {} and body['count'] == len(items)
+    assert sorted(predict_calls) == [('bongkaran_pengajuan_empty_20', 4), ('pengajuan_acc_full_40', 2)]
+
+    single_paths = {
+        'bongkaran_pengajuan_empty_20': '/predict/bongkaran_to_pengajuan/empty_20',
+        'pengajuan_acc_full_40': '/predict/pengajuan_to_acc/full_40',
+    }
+    for item in items:
+        result = body['results'][item['id']]
+        single = client.post(single_paths[result['model_used']], json=item['features']).get_json()
+        assert result['prediction'] == single['prediction']
+
+
+def test_invalid_items_are_rejected_individually(client, predict_calls):
+    items = [
+        {'id': 'ok', 'features': _e20(40)},
+        {'id': 'ok', 'features': _e20(41)},
+        {'id': 'lu', 'features': {**_e20(40), 'Voyage No.': 'LU'}},
+        {'id': 'empty', 'features': {}},
+        {'id': 'unknown', 'model': 'tidak_ada', 'features': _e20(40)},
+        # File model cabang ini tidak ada: hanya item-item ini yang gagal
+        {'id': 'missing', 'model': 'pengajuan_acc_empty_20', 'features': _e20(40)},
+        'bukan object',
+    ]
+    body = client.post('/predict/batch', json={'model': 'bongkaran_pengajuan_empty_20', 'items': items}).get_json()
+    assert list(body['results']) == ['ok']
+    assert set(body['errors']) == {'ok', 'lu', 'empty', 'unknown', 'missing', '6'}
+    assert 'duplikat' in body['errors']['ok']
+    assert 'non-numerik' in body['errors']['lu']
+    # Baris non-numerik tidak ikut dikirim ke model
+    assert predict_calls == [('bongkaran_pengajuan_empty_20', 2)]
+
+
+def test_rejects_malformed_and_oversized_requests(client, monkeypatch):
+    assert client.post('/predict/batch', json=[{'features': _e20(1)}]).status_code == 400
+    assert client.post('/predict/batch', json={'items': 'x'}).status_code == 400
+    monkeypatch.setattr(prediction_routes, 'MAX_BATCH_ITEMS', 2)
+    items = [{'features': _e20(n)} for n in range(3)]
+    assert client.post('/predict/batch', json={'model': 'bongkaran_pengajuan_empty_20', 'items': items}).status_code == 413
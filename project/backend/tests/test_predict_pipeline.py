@@ -0,0 +1,92 @@
+"""/predict/pipeline: rantai tiga tahap model sama dengan memanggil endpoint tunggal berurutan."""
+from types import SimpleNamespace
+
+import pytest
+
+from app import db
+from app import prediction_routes
+from app.models import CostRate, Port
+from conftest import make_app
+from test_cost_engine import RATES, _reference
+
+BASE = {'VESSEL ID (DMY)': 'V01', 'BERTH LOCATION': 'ADP', 'Voyage No.': 1, 'Voyage Yr': 2024}
+BONGKARAN = 'TOTAL BONGKARAN_EMPTY_40 HC'
+PENGAJUAN = 'PENGAJUAN KE PLANNER_EMPTY_40 HC'
+ACC = 'ACC PENGAJUAN_EMPTY_40 HC'
+
+
+@pytest.fixture
+def app():
+    app = make_app(PREDICTION_CACHE_BACKEND='none')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _single(client, path, features):
+    response = client.post(f'/predict/{path}', json=features)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['prediction']
+
+
+def _chained(client, bongkaran):
+    features = {**BASE, BONGKARAN: bongkaran}
+    features[PENGAJUAN] = _single(client, 'bongkaran_to_pengajuan/empty_40', features)[PENGAJUAN]
+    features[ACC] = _single(client, 'pengajuan_to_acc/empty_40', features)[ACC]
+    realisasi = _single(client, 'acc_to_realisasi/empty_40', features)
+    return {
+        'pengajuan_empty_40hc': features[PENGAJUAN],
+        'acc_pengajuan_empty_40hc': features[ACC],
+        'realisasi_mxd_40hc': realisasi['REALISASI_ALL_DEPO_MXD_40_HC'],
+        'shipside_yes_mxd_40hc': realisasi['SHIPSIDE_YES_MXD_40_HC'],
+        'shipside_no_mxd_40hc': realisasi['SHIPSIDE_NO_MXD_40_HC'],
+    }
+
+
+def test_pipeline_matches_chained_single_predictions(client, monkeypatch):
+    port = Port(name='ADP', code='ADP')
+    db.session.add(port)
+    db.session.flush()
+    db.session.add(CostRate(port_id=port.id, **RATES))
+    db.session.commit()
+
+    calls = []
+    original = prediction_routes._predict_uncached
+
+    def counting(model, model_key, records):
+        calls.append((model_key, len(records)))
+        return original(model, model_key, records)
+
+    monkeypatch.setattr(prediction_routes, '_predict_uncached', counting)
+    voyages = [{'id': f'v{n}', **BASE, BONGKARAN: n} for n in (10, 40, 90)]
+    body = client.post('/predict/pipeline', json={'voyages': voyages}).get_json()
+    # Satu predict per tahap untuk semua voyage, cabang lain tidak dipanggil (tanpa bongkaran)
+    assert calls == [('bongkaran_pengajuan_empty_40', 3), ('pengajuan_acc_empty_40', 3), ('acc_realisasi_empty_40', 3)]
+    assert body['count'] == 3
+
+    monkeypatch.setattr(prediction_routes, '_predict_uncached', original)
+    for voyage, result in zip(voyages, body['results']):
+        predicted = _chained(client, voyage[BONGKARAN])
+        assert (result['id'], result['port_id'], result['errors']) == (voyage['id'], port.id, {})
+        assert result['predicted'] == predicted
+        # Tarif diambil dari port berdasarkan BERTH LOCATION
+        expected = _reference({'bongkaran_empty_40hc': voyage[BONGKARAN], **predicted}, SimpleNamespace(**RATES))
+        cost = result['cost']
+        assert cost['has_rates']
+        assert (cost['estimation_cost1'], cost['estimation_cost2'], cost['final_cost']) == pytest.approx(expected)
+
+
+def test_single_voyage_reports_errors_per_branch(client):
+    # Cabang empty_20 berhenti di ACC (file model tidak ada); port tanpa tarif = cost 0
+    result = client.post('/predict/pipeline', json={**BASE, 'TOTAL BONGKARAN_EMPTY_20 DC': 40}).get_json()
+    assert set(result['predicted']) == {'pengajuan_empty_20dc'}
+    assert set(result['errors']) == {'acc_pengajuan_empty_20dc'}
+    assert result['port_id'] is None and not result['cost']['has_rates']
+
+
+def test_rejects_malformed_and_oversized_requests(client, monkeypatch):
+    assert client.post('/predict/pipeline', json={}).status_code == 400
+    assert client.post('/predict/pipeline', json={'voyages': [1]}).status_code == 400
+    monkeypatch.setattr(prediction_routes, 'MAX_BATCH_ITEMS', 1)
+    assert client.post('/predict/pipeline', json={'voyages': [BASE, BASE]}).status_code == 413
@@ -0,0 +1,107 @@
+"""Cache hasil prediksi: key kanonik per fitur, versi model saat load, TTL dan invalidasi."""
+import time
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.dummy import DummyRegressor
+
+from app import prediction_routes
+from app.model_registry import ModelRegistry
+from app.prediction_cache import InProcessBackend, PredictionCache
+
+KEY = 'bongkaran_pengajuan_empty_20'
+TARGET = 'PENGAJUAN KE PLANNER_EMPTY_20 DC'
+FEATURES = {'VESSEL ID (DMY)': 'V01', 'BERTH LOCATION': 'ADP', 'Voyage No.': 1, 'TOTAL BONGKARAN_EMPTY_20 DC': 40}
+
+
+def _cache():
+    return PredictionCache(InProcessBackend(max_entries=100), categorical=prediction_routes.CATEGORICAL_FEATURES)
+
+
+def test_keys_normalize_numbers_but_not_categories():
+    cache = _cache()
+    same = [FEATURES, {**FEATURES, 'Voyage No.': '1'}, {**FEATURES, 'Voyage No.': 1.0},
+            dict(reversed(list(FEATURES.items())))]
+    assert len(set(cache.keys_for(KEY, 'h1', same))) == 1
+    different = [FEATURES, {**FEATURES, 'BERTH LOCATION': 'BJM'}, {**FEATURES, 'Voyage No.': 2}]
+    assert len(set(cache.keys_for(KEY, 'h1', different))) == 3
+    assert cache.keys_for(KEY, 'h1', [FEATURES]) != cache.keys_for(KEY, 'h2', [FEATURES])
+
+
+def test_invalidate_drops_entries_of_that_model_only():
+    cache = _cache()
+    [key] = cache.keys_for(KEY, 'h1', [FEATURES])
+    [other] = cache.keys_for('pengajuan_acc_full_40', 'h1', [FEATURES])
+    cache.set_many({key: {TARGET: 1}, other: {TARGET: 2}})
+    cache.invalidate([KEY])
+    assert cache.keys_for(KEY, 'h1', [FEATURES]) != [key]
+    assert cache.get_many([key, other]) == {other: {TARGET: 2}}
+
+
+def test_backend_expires_entries_and_evicts_least_recently_used():
+    backend = InProcessBackend(max_entries=2)
+    backend.set_many({'a': 1, 'b': 2}, ttl=60)
+    backend.get_many(['a'])
+    backend.set_many({'c': 3}, ttl=60)
+    assert backend.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+    backend.set_many({'d': 4}, ttl=-1)
+    assert backend.get_many(['d']) == {}
+
+
+def _dump(path, value):
+    model = DummyRegressor(strategy='constant', constant=value).fit(np.zeros((1, 1)), [value])
+    joblib.dump(model, path)
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    _dump(tmp_path / 'm.pkl', 10.0)
+    registry = ModelRegistry({KEY: 'm.pkl'}, models_path=str(tmp_path), track_memory=False)
+    cache = _cache()
+    registry.on_reload(cache.invalidate)
+    monkeypatch.setattr(prediction_routes, 'model_registry', registry)
+    monkeypatch.setattr(prediction_routes, 'prediction_cache', cache)
+    return registry
+
+
+@pytest.fixture
+def predict_calls(monkeypatch):
+    calls = []
+    original = prediction_routes._predict_uncached
+
+    def counting(model, model_key, records):
+        calls.append(len(records))
+        return original(model, model_key, records)
+
+    monkeypatch.setattr(prediction_routes, '_predict_uncached', counting)
+    return calls
+
+
+def test_cached_records_skip_the_model(registry, predict_calls):
+    records = [FEATURES, {**FEATURES, 'Voyage No.': 'LU'}]
+    predictions, invalid = prediction_routes.predict_records(KEY, records)
+    assert predictions == [{TARGET: 10}, None] and list(invalid) == [1]
+    # Hanya record yang belum ada di cache yang dihitung; baris tidak valid tidak disimpan
+    predictions, invalid = prediction_routes.predict_records(KEY, [{**FEATURES, 'Voyage No.': 1.0}, {**FEATURES, 'Voyage No.': 2}])
+    assert predictions == [{TARGET: 10}, {TARGET: 10}] and invalid == {}
+    assert predict_calls == [2, 1]
+    assert prediction_routes.prediction_cache.stats()['hits'] == 1
+
+
+def test_cache_is_keyed_on_the_loaded_model_version(registry, predict_calls, tmp_path):
+    prediction_routes.predict_records(KEY, [FEATURES])
+    loaded_hash = registry.version(KEY)
+
+    # File diganti tapi model belum di-reload: hasil tetap dari model di memori (cache lama valid)
+    time.sleep(0.01)    # mtime berbeda, supaya hash file di-memo ulang
+    _dump(tmp_path / 'm.pkl', 20.0)
+    assert registry.file_hash(KEY) != loaded_hash
+    assert prediction_routes.predict_records(KEY, [FEATURES])[0] == [{TARGET: 10}]
+    assert prediction_routes.predict_records(KEY, [{**FEATURES, 'Voyage No.': 3}])[0] == [{TARGET: 10}]
+    assert predict_calls == [1, 1]
+
+    registry.reload(KEY)
+    assert prediction_routes.predict_records(KEY, [FEATURES])[0] == [{TARGET: 20}]
+    assert prediction_routes.predict_records(KEY, [{**FEATURES, 'Voyage No.': 3}])[0] == [{TARGET: 20}]
+    assert predict_calls == [1, 1, 1, 1]
@@ -0,0 +1,74 @@
+"""
+Batas jumlah query SQL endpoint daftar (read model), supaya N+1 tidak kembali diam-diam.
+
+Jalankan dari folder backend:
+    python -m pytest tests
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import ContainerMovement, Port, Vessel, Voyage
+from app.read_models import assert_max_queries
+from conftest import make_app
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = make_app()
+    with app.app_context():
+        ports = [Port(name=f"Port {i}", code=f"P{i}") for i in range(3)]
+        vessels = [Vessel(name=f"Vessel {i}") for i in range(3)]
+        db.session.add_all(ports + vessels)
+        db.session.flush()
+        started = datetime(2024, 1, 1)
+        for i in range(6):
+            voyage = Voyage(
+                vessel_id=vessels[i % 3].id, port_id=ports[i % 3].id, voyage_no=f"V{i:03d}",
+                voyage_yr=2024, date_berth=started + timedelta(days=i), created_at=started + timedelta(hours=i),
+            )
+            db.session.add(voyage)
+            db.session.flush()
+            db.session.add(ContainerMovement(voyage_id=voyage.id, bongkaran_empty_20dc=i, bongkaran_full_40hc=2 * i))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='module')
+def headers(app):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity='test@example.com')}"}
+
+
+@pytest.mark.parametrize('path, limit', [
+    ('/voyages', 1),
+    ('/vessels', 1),
+    ('/ports', 1),
+    ('/container_movements/?page=1&per_page=4', 2),
+    ('/container_movements/?cursor=&per_page=4', 1),
+])
+def test_list_query_ceiling(app, client, headers, path, limit):
+    with app.app_context(), assert_max_queries(limit):
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+
+def test_container_movements_next_page_query_ceiling(app, client, headers):
+    first = client.get('/container_movements/?cursor=&per_page=4', headers=headers).get_json()
+    assert first['has_next'] and len(first['data']) == 4
+
+    with app.app_context(), assert_max_queries(1):
+        response = client.get(f"/container_movements/?cursor={first['next_cursor']}&per_page=4", headers=headers)
+    body = response.get_json()
+    assert response.status_code == 200
+    assert len(body['data']) == 2 and body['next_cursor'] is None
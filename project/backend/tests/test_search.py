@@ -0,0 +1,86 @@
+"""Pencarian bertipe (search.py) memberi hasil yang sama dengan pencarian prefix teks lama."""
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.read_models import CM_LIST
+from app.search import SEARCH_FIELDS, date_range, prefix_filter, typed_filter
+from conftest import add_voyage
+
+VOYAGES = [
+    ('Kapal Nusantara', 'ADP', '0101', 2023, datetime(2023, 1, 9, 7, 30), 'Menunggu kapal tunda'),
+    ('KM Bahari', 'BJM', '12A', 2024, datetime(2024, 5, 1), None),
+    ('kapuas', 'Banjar', 'B7', 2024, datetime(2024, 5, 17, 23, 59), 'Crane rusak'),
+    ('KM Bahari', 'ADP', '0102', 2025, datetime(2024, 12, 31), 'kapal_bocor 50%'),
+    ('Sinar 20', 'BJM', '2024', 2020, datetime(2020, 2, 29), None),
+]
+
+
+@pytest.fixture
+def voyages(app):
+    for vessel, port, voyage_no, year, date_berth, obstacles in VOYAGES:
+        add_voyage(port=port, vessel=vessel, voyage_no=voyage_no, voyage_yr=year, date_berth=date_berth,
+                   obstacles=obstacles)
+    db.session.commit()
+
+
+def _matches(predicate):
+    return sorted(row.voyage_number for row in CM_LIST.query().filter(predicate))
+
+
+@pytest.mark.parametrize('field', [f for f in SEARCH_FIELDS if f != 'obstacles'])
+@pytest.mark.parametrize('text', ['k', 'KM', 'kap', 'ba', '01', '12a', '2', '20', '202', '2024', '2024-0', '2024-05',
+                                  '2024-05-1', '2024-05-17', '2024-12-31', '2020-02-29', '2023-1', 'x'])
+def test_typed_search_matches_prefix_search(voyages, field, text):
+    assert _matches(typed_filter(text, field)) == _matches(prefix_filter(text, field))
+
+
+@pytest.mark.parametrize('text', ['kap', 'ba', '2024', '2024-05', '01', 'x'])
+def test_all_fields_union_matches_prefix_search(voyages, text):
+    # Tanpa obstacles: di sana pencarian bertipe memakai awal kata, bukan awal teks
+    expected = _matches(prefix_filter(text, 'all')) if text != 'kap' else ['0101', '0102', 'B7']
+    assert _matches(typed_filter(text, 'all')) == expected
+
+
+def test_obstacles_match_word_prefixes(voyages):
+    assert _matches(typed_filter('kap', 'obstacles')) == ['0101', '0102']
+    assert _matches(typed_filter('rus cra', 'obstacles')) == ['B7']
+    assert _matches(typed_filter('tunda menunggu', 'obstacles')) == ['0101']
+    assert _matches(typed_filter('?!', 'obstacles')) == []
+
+
+def test_like_wildcards_are_literal(voyages):
+    assert _matches(prefix_filter('k_', 'vessel_name')) == ['0101', '0102', '12A', 'B7']
+    assert _matches(typed_filter('k_', 'vessel_name')) == []
+    assert _matches(typed_filter('%', 'all')) == []
+    assert _matches(typed_filter('kapal_b', 'obstacles')) == ['0102']
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('2024', (datetime(2024, 1, 1), datetime(2025, 1, 1))),
+    ('2024-', (datetime(2024, 1, 1), datetime(2025, 1, 1))),
+    ('2024-0', (datetime(2024, 1, 1), datetime(2024, 10, 1))),
+    ('2024-1', (datetime(2024, 10, 1), datetime(2025, 1, 1))),
+    ('2024-05', (datetime(2024, 5, 1), datetime(2024, 6, 1))),
+    ('2024-02-2', (datetime(2024, 2, 20), datetime(2024, 3, 1))),
+    ('2024-05-3', (datetime(2024, 5, 30), datetime(2024, 6, 1))),
+    ('2024-05-17', (datetime(2024, 5, 17), datetime(2024, 5, 18))),
+    ('2024-13', None),
+    ('2023-02-29', None),
+    ('2024-5-1', None),
+    ('202', (datetime(2020, 1, 1), datetime(2030, 1, 1))),
+    ('9', (datetime(9000, 1, 1), datetime.max)),
+    ('kapal', None),
+])
+def test_date_range(text, expected):
+    assert date_range(text) == expected
+
+
+def test_search_mode_prefix_uses_the_old_filter(client, headers, voyages):
+    def numbers(query):
+        body = client.get(f'/container_movements/?per_page=100&{query}', headers=headers).get_json()
+        return sorted(row['voyage_number'] for row in body['data'])
+
+    assert numbers('q=kap&field=obstacles') == ['0101', '0102']
+    assert numbers('q=kap&field=obstacles&search_mode=prefix') == ['0102']
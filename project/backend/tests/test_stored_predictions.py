@@ -0,0 +1,48 @@
+"""Prediksi tersimpan per ContainerMovement (refresh_predictions)."""
+import pytest
+
+from app import db
+from app.models import ContainerMovementPrediction
+from app.prediction_routes import model_registry
+from app.stored_predictions import refresh_predictions
+from conftest import add_voyage
+
+
+def _loads():
+    return sum(stats["loads"] for stats in model_registry.stats()["models"].values())
+
+
+@pytest.fixture
+def movements(app):
+    cms = [
+        # Tahap berikutnya: pengajuan, ACC, realisasi (hanya cabang yang file modelnya ada)
+        add_voyage(voyage_no='1', bongkaran_empty_20dc=40, bongkaran_full_40hc=10),
+        add_voyage(voyage_no='2', bongkaran_empty_40hc=40, pengajuan_empty_40hc=30),
+        add_voyage(voyage_no='3', bongkaran_empty_20dc=40, pengajuan_empty_20dc=30, acc_pengajuan_empty_20dc=25),
+    ]
+    db.session.commit()
+    return cms
+
+
+def test_refresh_fills_next_stage_and_skips_unchanged_without_loading_models(movements, monkeypatch):
+    assert refresh_predictions() == {"refreshed": 3, "skipped": 0, "errors": 0}
+    by_cm = {p.cm_id: p for p in ContainerMovementPrediction.query}
+    assert [by_cm[cm.id].stage for cm in movements] == ['pengajuan', 'acc', 'realisasi']
+    assert by_cm[movements[0].id].pengajuan_empty_20dc is not None
+    assert by_cm[movements[0].id].pengajuan_full_40hc is not None
+    assert by_cm[movements[1].id].acc_pengajuan_empty_40hc is not None
+    assert by_cm[movements[2].id].realisasi_mxd_20dc is not None
+
+    # Batas LRU 1 model: record yang tidak berubah tidak boleh memuat/mengganti model
+    monkeypatch.setattr(model_registry, 'max_models', 1)
+    model_registry._evict_if_needed()
+    loads = _loads()
+    assert refresh_predictions() == {"refreshed": 0, "skipped": 3, "errors": 0}
+    assert _loads() == loads
+
+
+def test_refresh_recomputes_changed_input_only(movements):
+    refresh_predictions()
+    movements[1].pengajuan_empty_40hc = 35
+    db.session.commit()
+    assert refresh_predictions() == {"refreshed": 1, "skipped": 2, "errors": 0}
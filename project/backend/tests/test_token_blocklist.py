@@ -0,0 +1,71 @@
+"""Blocklist JWT: kedaluwarsa per exp, sinkron antar worker lewat store bersama, fallback ke store."""
+import time
+
+import pytest
+
+from app import db
+from app.models import RevokedToken
+from app.token_blocklist import DatabaseStore, TokenBlocklist
+from conftest import make_app
+
+
+@pytest.fixture
+def app():
+    app = make_app(TOKEN_BLOCKLIST_BACKEND='database')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _worker(**kwargs):
+    # sync_seconds=0: setiap is_revoked menarik perubahan dari store
+    return TokenBlocklist(DatabaseStore(), sync_seconds=0, **kwargs)
+
+
+def test_entries_expire_with_their_token():
+    blocklist = TokenBlocklist(None, sync_seconds=0)
+    now = time.time()
+    blocklist.revoke('old', now - 1)
+    blocklist.revoke('new', now + 3600)
+    assert not blocklist.is_revoked('old')
+    assert blocklist.is_revoked('new')
+    assert blocklist.stats()['entries'] == 1
+
+
+def test_logout_is_seen_by_other_workers(app):
+    first, second = _worker(), _worker()
+    assert not second.is_revoked('jti-1')
+    first.revoke('jti-1', time.time() + 3600)
+    first.revoke('jti-1', time.time() + 3600)   # logout ganda tidak error
+    assert second.is_revoked('jti-1')
+    # Worker yang baru start memuat semua entri yang belum kedaluwarsa
+    assert _worker().is_revoked('jti-1')
+
+
+def test_expired_rows_are_purged_from_the_store(app):
+    store = DatabaseStore()
+    store.add('expired', time.time() - 10)
+    store.add('active', time.time() + 3600)
+    _worker().is_revoked('x')
+    assert [row.jti for row in RevokedToken.query] == ['active']
+
+
+def test_incomplete_cache_falls_back_to_store(app):
+    first = _worker(max_entries=2)
+    exp = time.time() + 3600
+    for jti in ('a', 'b', 'c'):
+        first.revoke(jti, exp)
+    assert first.stats() == {'backend': 'DatabaseStore', 'entries': 2, 'complete': False}
+    assert first.is_revoked('c')
+    assert not first.is_revoked('unknown')
+
+    second = _worker(max_entries=2)
+    assert all(second.is_revoked(jti) for jti in ('a', 'b', 'c'))
+    assert not second.stats()['complete']
+
+
+def test_logout_endpoint_revokes_the_access_token(client, headers):
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+    response = client.get('/vessels', headers=headers)
+    assert response.status_code == 401
@@ -0,0 +1,101 @@
+"""Engine 'compiled' (tree_inference.py) harus memberi hasil yang identik dengan sklearn."""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from app.prediction_routes import CATEGORICAL_FEATURES, model_files
+from app.tree_inference import CompiledPipeline, compile_model
+from conftest import BACKEND_DIR
+
+MODEL_FILES = [path for path in model_files.values() if os.path.exists(os.path.join(BACKEND_DIR, 'ml_models', path))]
+
+
+def _random_frame(pipeline, rng, n_rows=300):
+    """Baris acak: kategori yang dikenal/tidak dikenal/NaN, angka termasuk NaN dan pecahan."""
+    preprocessing = pipeline.named_steps['preprocessing']
+    categories = {}
+    for name, transformer, columns in preprocessing.transformers_:
+        if isinstance(transformer, Pipeline):
+            for column, values in zip(columns, transformer.named_steps['onehot'].categories_):
+                categories[column] = list(values)
+    data = {}
+    for column in pipeline.feature_names_in_:
+        if column in categories:
+            choices = categories[column] + ['TIDAK-DIKENAL', np.nan]
+            data[column] = [choices[i] for i in rng.integers(0, len(choices), n_rows)]
+        else:
+            values = rng.integers(0, 400, n_rows).astype(np.float64)
+            values[rng.random(n_rows) < 0.1] = np.nan
+            values[rng.random(n_rows) < 0.1] += 0.5
+            data[column] = values
+    return pd.DataFrame(data)
+
+
+@pytest.mark.parametrize('path', MODEL_FILES)
+def test_compiled_matches_sklearn_for_shipped_models(path):
+    pipeline = joblib.load(os.path.join(BACKEND_DIR, 'ml_models', path))
+    compiled = compile_model(pipeline)
+    assert isinstance(compiled, CompiledPipeline)
+    frame = _random_frame(pipeline, np.random.default_rng(5))
+    np.testing.assert_array_equal(compiled.predict(frame), pipeline.predict(frame))
+
+
+def _trained_pipeline(n_outputs):
+    rng = np.random.default_rng(1)
+    n = 200
+    X = pd.DataFrame({
+        'VESSEL ID (DMY)': rng.choice(['V01', 'V02', 'V03'], n),
+        'BERTH LOCATION': rng.choice(['ADP', 'BJM'], n),
+        'Voyage No.': rng.integers(1, 50, n).astype(float),
+        'TOTAL': rng.integers(0, 300, n).astype(float),
+    })
+    y = np.column_stack([X['TOTAL'] * (k + 1) * 0.3 + rng.normal(0, 5, n) for k in range(n_outputs)])
+    preprocessing = ColumnTransformer([
+        ('num', SimpleImputer(strategy='median'), ['Voyage No.', 'TOTAL']),
+        ('cat', Pipeline([('imputer', SimpleImputer(strategy='most_frequent')),
+                          ('onehot', OneHotEncoder(handle_unknown='ignore'))]), list(CATEGORICAL_FEATURES)),
+    ])
+    pipeline = Pipeline([('preprocessing', preprocessing),
+                         ('model', RandomForestRegressor(n_estimators=15, random_state=0))])
+    return pipeline.fit(X, y if n_outputs > 1 else y[:, 0])
+
+
+@pytest.mark.parametrize('n_outputs', [1, 3])
+def test_compiled_matches_sklearn_single_and_multi_output(n_outputs):
+    pipeline = _trained_pipeline(n_outputs)
+    compiled = compile_model(pipeline)
+    frame = _random_frame(pipeline, np.random.default_rng(2))
+    expected = pipeline.predict(frame)
+    assert compiled.predict(frame).shape == expected.shape
+    np.testing.assert_array_equal(compiled.predict(frame), expected)
+    # list of dict diterima seperti DataFrame
+    np.testing.assert_array_equal(compiled.predict(frame.head(5).to_dict('records')), expected[:5])
+
+
+def test_unsupported_input_falls_back_to_sklearn():
+    pipeline = _trained_pipeline(1)
+    frame = _random_frame(pipeline, np.random.default_rng(3), n_rows=5)
+    frame['BERTH LOCATION'] = frame['BERTH LOCATION'].astype(object)
+    frame.loc[0, 'BERTH LOCATION'] = 7     # bukan string: diproses sklearn apa adanya
+    compiled = compile_model(pipeline)
+    try:
+        expected = pipeline.predict(frame)
+    except Exception as e:
+        with pytest.raises(type(e)):
+            compiled.predict(frame)
+    else:
+        np.testing.assert_array_equal(compiled.predict(frame), expected)
+
+
+def test_unsupported_model_is_returned_unchanged():
+    model = DummyRegressor().fit(np.zeros((2, 1)), [1.0, 2.0])
+    assert compile_model(model) is model
@@ -0,0 +1,154 @@
+"""Impor workbook .xlsx: header bertingkat, pembersihan seperti cleaning.ipynb, hasil sama dengan CSV."""
+import io
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.importer import ImportFileError, import_frame, read_csv
+from app.workbook import clean_date, clean_port, flatten_headers, import_workbook
+from conftest import CSV_PATH, make_app
+from test_importer import _snapshot
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def _cell(header, text):
+    if text == '':
+        return None
+    if header in ('VESSEL ID (DMY)', 'Voyage No.', 'OBSTACLES', 'BERTH LOCATION'):
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+
+def _workbook(frame, blank_rows_at=(), extra=None):
+    """DataFrame layout CSV -> .xlsx seperti workbook operasional (4 baris header)."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    # Nama kembar ditulis tanpa akhiran .1 (diberi lagi oleh flatten_headers)
+    headers = [header[:-2] if header.endswith('.1') else header for header in frame.columns]
+    sheet.append(headers)
+    for _ in range(3):
+        sheet.append([])
+    for i, row in enumerate(frame.itertuples(index=False)):
+        if i in blank_rows_at:
+            sheet.append([])
+        values = [_cell(header, text) for header, text in zip(frame.columns, row)]
+        date_pos = list(frame.columns).index('Date Berth')
+        berth = datetime.strptime(row[date_pos], '%Y-%m-%d %H:%M:%S')
+        # Tanggal sebagai sel tanggal Excel dan sebagai teks "dd/mm/yyyy HH.MM" bergantian
+        values[date_pos] = berth if i % 2 else berth.strftime('%d/%m/%Y %H.%M')
+        for (pos, header), value in (extra or {}).items():
+            if pos == i:
+                values[list(frame.columns).index(header)] = value
+        sheet.append(values)
+    for _ in range(3):
+        sheet.append([None] * len(headers))     # baris kosong di akhir sheet diabaikan
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def app():
+    app = make_app(PREDICTION_REFRESH_ENABLED='0')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_workbook_imports_like_the_cleaned_csv(app):
+    frame = read_csv(CSV_PATH).head(40)
+    port = frame['BERTH LOCATION'].iloc[0]
+    workbook = _workbook(frame, extra={
+        # Port dengan nomor dermaga dan huruf kecil, error formula = sel kosong (0)
+        (0, 'BERTH LOCATION'): f" {port.lower()}107 ",
+        (1, 'TURUN CY_TEUS'): '#N/A',
+    })
+    expected_frame = frame.copy()
+    expected_frame.loc[expected_frame.index[1], 'TURUN CY_TEUS'] = ''
+
+    report = import_workbook(workbook, chunk_rows=7, batch_size=5, enqueue_derived=False)
+    assert (report['rows'], report['imported'], report['error_count']) == (40, 40, 0)
+    assert {'read', 'clean', 'parse'} <= set(report['stages'])
+    imported = _snapshot()
+
+    reference = make_app(PREDICTION_REFRESH_ENABLED='0')
+    with reference.app_context():
+        import_frame(expected_frame, enqueue_derived=False)
+        expected = _snapshot()
+        db.session.remove()
+        db.drop_all()
+    assert imported == expected
+
+
+def test_errors_use_excel_row_numbers_and_strict_writes_nothing(app):
+    frame = read_csv(CSV_PATH).head(10)
+    # Baris kosong di tengah sebelum data ke-4 (baris Excel 8) dan tanggal tidak dikenali di data ke-9
+    workbook = _workbook(frame, blank_rows_at=(3,), extra={(8, 'Date Berth'): 'besok'})
+
+    report = import_workbook(workbook, strict=True, chunk_rows=4, enqueue_derived=False)
+    assert report['aborted'] and report['imported'] == 0
+    assert db.session.execute(db.text('select count(*) from voyages')).scalar() == 0
+
+    workbook.seek(0)
+    report = import_workbook(workbook, chunk_rows=4, enqueue_derived=False)
+    assert report['imported'] == 9 and report['rows'] == 11
+    assert sorted({error['row'] for error in report['errors']}) == [8, 14]
+
+
+def test_upload_endpoint_accepts_xlsx(client, headers):
+    workbook = _workbook(read_csv(CSV_PATH).head(3))
+    response = client.post('/container_movements/import', headers=headers,
+                           data={'file': (workbook, 'Ship Operation Data 2024-25.xlsx')})
+    assert response.status_code == 200 and response.get_json()['imported'] == 3
+
+    response = client.post('/container_movements/import', headers=headers,
+                           data={'file': (io.BytesIO(b'bukan zip'), 'data.xlsx')})
+    assert response.status_code == 400
+
+
+def test_empty_workbook_is_rejected(app):
+    with pytest.raises(ImportFileError):
+        import_workbook(_workbook(read_csv(CSV_PATH).head(0)))
+
+
+def test_flatten_multi_level_headers():
+    rows = [
+        ['VESSEL ID (DMY)', 'TOTAL BONGKARAN', None, None, None, '0', None, None],
+        [None, 'EMPTY', None, 'FULL', None, 'TOTAL_BOX', None, 'TEUS'],
+        [None, '20 DC', '40 HC', '20 DC', '40 HC', '20 DC', '40 HC', None],
+        [None, None, None, None, None, None, None, None],
+    ]
+    assert flatten_headers(rows) == [
+        'VESSEL ID (DMY)', 'TOTAL BONGKARAN_EMPTY_20 DC', 'TOTAL BONGKARAN_EMPTY_40 HC',
+        'TOTAL BONGKARAN_FULL_20 DC', 'TOTAL BONGKARAN_FULL_40 HC', '0_TOTAL_BOX_20 DC', '0_TOTAL_BOX_40 HC',
+        '0_TEUS',
+    ]
+    assert flatten_headers([['A', 'A', 'A.1', 'A']]) == ['A', 'A.1', 'A.1.1', 'A.2']
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('CELEBES107', 'CELEBES'), ('MSA 210', 'MSA'), ('adp ', 'ADP'), (None, ''),
+])
+def test_clean_port(value, expected):
+    assert clean_port(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('08/05/2024 18.00', '2024-05-08 18:00:00'),
+    ('08/05/2024', '2024-05-08 00:00:00'),
+    (datetime(2024, 5, 8, 18, 0), '2024-05-08 18:00:00'),
+    ('', ''),
+    ('bukan tanggal', ''),
+])
+def test_clean_date(value, expected):
+    assert clean_date(value) == expected